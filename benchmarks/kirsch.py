@@ -0,0 +1,59 @@
+"""
+Compara filtros.filtro_kirsch con la implementación anterior (8 pasadas de
+cv2.filter2D y np.max sobre la lista de respuestas).
+
+    python -m benchmarks.kirsch
+"""
+import time
+
+import cv2
+import numpy as np
+
+from src.logic import filtros
+
+TAMANOS = {"512": (512, 512), "2K": (1080, 1920), "4K": (2160, 3840)}
+REPETICIONES = 5
+
+
+def kirsch_referencia(imagen):
+    """Implementación original, tal cual"""
+    img = filtros.convertir_a_grises(imagen)
+    kernels = [
+        np.array([[5, 5, 5], [-3, 0, -3], [-3, -3, -3]]),      # N
+        np.array([[-3, 5, 5], [-3, 0, 5], [-3, -3, -3]]),      # NE
+        np.array([[-3, -3, 5], [-3, 0, 5], [-3, -3, 5]]),      # E
+        np.array([[-3, -3, -3], [-3, 0, 5], [-3, 5, 5]]),      # SE
+        np.array([[-3, -3, -3], [-3, 0, -3], [5, 5, 5]]),      # S
+        np.array([[-3, -3, -3], [5, 0, -3], [5, 5, -3]]),      # SW
+        np.array([[5, -3, -3], [5, 0, -3], [5, -3, -3]]),      # W
+        np.array([[5, 5, -3], [5, 0, -3], [-3, -3, -3]])       # NW
+    ]
+    respuestas = [cv2.filter2D(img, -1, k) for k in kernels]
+    return np.max(respuestas, axis=0)
+
+
+def medir(funcion, imagen):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion(imagen)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'Tamaño':<8} {'Anterior':>10} {'Nuevo':>10} {'+Dirección':>11} {'Mejora':>8}")
+    for nombre, forma in TAMANOS.items():
+        img = rng.integers(0, 256, forma, dtype=np.uint8)
+        if not np.array_equal(kirsch_referencia(img), filtros.filtro_kirsch(img)):
+            raise AssertionError(f"Los resultados difieren en {nombre}")
+
+        t_ref = medir(kirsch_referencia, img)
+        t_nuevo = medir(filtros.filtro_kirsch, img)
+        t_dir = medir(lambda i: filtros.filtro_kirsch(i, devolver_direccion=True), img)
+        print(f"{nombre:<8} {t_ref * 1000:>8.1f}ms {t_nuevo * 1000:>8.1f}ms {t_dir * 1000:>9.1f}ms {t_ref / t_nuevo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Costo de los filtros de rango al crecer el kernel (3 a 401) frente a SciPy,
+que usaban antes filtro_maximo y filtro_minimo, y de van Herk/Gil-Werman
+por separado (sirve para ajustar rango._K_MIN_VAN_HERK). Comprueba además
+que los resultados sean idénticos.
+
+    python -m benchmarks.rango
+"""
+import time
+
+import numpy as np
+import scipy.ndimage as ndimage
+
+from src.logic import rango
+
+FORMA = (1080, 1920)  # 2K en grises
+KERNELS = [3, 5, 9, 15, 31, 51, 75, 101, 201, 401]
+REPETICIONES = 3
+
+
+def medir(funcion, *args):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, FORMA, dtype=np.uint8)
+
+    print(f"{'k':>4} {'SciPy máx':>10} {'Máximo':>9} {'Mínimo':>9} {'vHGW':>9} {'Mediana':>9} {'Mejora':>8}")
+    for k in KERNELS:
+        esperado = ndimage.maximum_filter(img, size=k)
+        if not np.array_equal(rango.maximo(img, k), esperado):
+            raise AssertionError(f"Máximo difiere de SciPy con k={k}")
+        if not np.array_equal(rango.van_herk(img, k, np.maximum), esperado):
+            raise AssertionError(f"van Herk/Gil-Werman difiere de SciPy con k={k}")
+        if not np.array_equal(rango.minimo(img, k), ndimage.minimum_filter(img, size=k)):
+            raise AssertionError(f"Mínimo difiere de SciPy con k={k}")
+
+        t_scipy = medir(ndimage.maximum_filter, img, k)
+        t_max = medir(rango.maximo, img, k)
+        t_min = medir(rango.minimo, img, k)
+        t_vhgw = medir(rango.van_herk, img, k, np.maximum)
+        t_med = medir(rango.mediana, img, k | 1)
+        print(f"{k:>4} {t_scipy:>8.1f}ms {t_max:>7.1f}ms {t_min:>7.1f}ms {t_vhgw:>7.1f}ms {t_med:>7.1f}ms "
+              f"{t_scipy / t_max:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
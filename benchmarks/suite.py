@@ -0,0 +1,194 @@
+"""
+Mide todas las operaciones del registro (filtros, morfología, colores,
+mapas, aritméticas y lógicas) y las de análisis sobre imágenes sintéticas
+de 512², 2K, 4K y 8K en gris y BGR, y sobre las muestras de data/.
+
+    python -m benchmarks                          # todo
+    python -m benchmarks --tamanos 512,2K --operaciones Gauss,Canny
+    python -m benchmarks --base benchmarks/base.json --umbral 0.15
+
+Por cada operación y caso informa mediana y p95 de latencia, megapíxeles
+por segundo y memoria pico (tracemalloc, en una ejecución aparte para no
+falsear los tiempos). Guarda los resultados en JSON y, si se indica una
+base, marca las regresiones por encima del umbral (código de salida 1).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from src.logic import analisis
+from src.logic import histogramas
+from src.logic import registro
+
+TAMANOS = {"512": (512, 512), "2K": (1080, 1920), "4K": (2160, 3840), "8K": (4320, 7680)}
+CARPETA_DATOS = "data"
+CARPETA_SALIDA = os.path.join("salidas", "benchmarks")
+REPETICIONES = 5
+UMBRAL_REGRESION = 0.15  # 15 % más lento que la base
+VALOR_ESCALAR = 1.5
+
+# Funciones de análisis que no pasan por el registro
+ANALISIS = {
+    "histogramas.calcular": histogramas.calcular,
+    "analisis.separar_canales": analisis.separar_canales,
+    "analisis.etiquetar_componentes": analisis.etiquetar_componentes,
+}
+
+
+def imagen_sintetica(alto, ancho, color, semilla=0):
+    """Degradado + ondas + ruido: ni plana ni ruido puro (Canny, Otsu y la mediana dependen del contenido)"""
+    rng = np.random.default_rng(semilla)
+    y = np.linspace(0, 1, alto, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, ancho, dtype=np.float32)[None, :]
+    base = 96 * (x + y) + 48 * np.sin(x * 40) * np.cos(y * 25)
+    canales = []
+    for c in range(3 if color else 1):
+        ruido = rng.normal(0, 12, (alto, ancho)).astype(np.float32)
+        canales.append(np.clip(base + 20 * c + ruido, 0, 255).astype(np.uint8))
+    return cv2.merge(canales) if color else canales[0]
+
+
+def casos(tamanos, con_datos):
+    """Genera (nombre_caso, imagen) en gris y BGR"""
+    for nombre in tamanos:
+        alto, ancho = TAMANOS[nombre]
+        yield f"{nombre} gris", imagen_sintetica(alto, ancho, False)
+        yield f"{nombre} BGR", imagen_sintetica(alto, ancho, True)
+    if con_datos and os.path.isdir(CARPETA_DATOS):
+        for archivo in sorted(os.listdir(CARPETA_DATOS)):
+            img = cv2.imread(os.path.join(CARPETA_DATOS, archivo))
+            if img is None:
+                continue
+            yield f"data/{archivo} BGR", img
+            yield f"data/{archivo} gris", cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def operaciones(filtro):
+    """(nombre, función(imagen, secundaria)) para el registro y el análisis"""
+    ops = []
+    for op in registro.REGISTRO.values():
+        # Valores por defecto; los obligatorios escalares reciben VALOR_ESCALAR
+        valores = [None if p.imagen else p.validar(VALOR_ESCALAR if p.defecto is None else p.defecto)
+                   for p in op.parametros]
+
+        def funcion(imagen, secundaria, op=op, valores=valores):
+            args = [secundaria if p.imagen else v for p, v in zip(op.parametros, valores)]
+            return op.ejecutar(imagen, *args)
+        ops.append((op.nombre, funcion))
+        if op.por_canal:
+            ops.append((f"{op.nombre} (canales)",
+                        lambda imagen, _, op=op, valores=valores: op.ejecutar(imagen, *valores[:-1], "CANALES")))
+    for nombre, funcion in ANALISIS.items():
+        ops.append((nombre, lambda imagen, _, funcion=funcion: funcion(imagen)))
+
+    if filtro:
+        ops = [(n, f) for n, f in ops if any(t.casefold() in n.casefold() for t in filtro)]
+    return ops
+
+
+def medir(funcion, imagen, secundaria, repeticiones):
+    funcion(imagen, secundaria)  # Calentamiento (cachés de kernels, LUTs...)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(imagen, secundaria)
+        tiempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcion(imagen, secundaria)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tiempos = np.array(tiempos) * 1000
+    mediana = float(np.median(tiempos))
+    pixeles = imagen.shape[0] * imagen.shape[1]
+    return {
+        "mediana_ms": round(mediana, 3),
+        "p95_ms": round(float(np.percentile(tiempos, 95)), 3),
+        "mp_s": round(pixeles / 1e6 / (mediana / 1000), 2) if mediana > 0 else None,
+        "memoria_pico_mb": round(pico / (1024 * 1024), 2),
+    }
+
+
+def comparar(resultados, ruta_base, umbral):
+    """Lista de regresiones (mediana por encima de base * (1 + umbral))"""
+    with open(ruta_base, encoding="utf-8") as f:
+        base = {(r["operacion"], r["caso"]): r for r in json.load(f)["resultados"]}
+    regresiones = []
+    for r in resultados:
+        anterior = base.get((r["operacion"], r["caso"]))
+        if anterior and r["mediana_ms"] > anterior["mediana_ms"] * (1 + umbral):
+            regresiones.append((r, anterior))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tamanos", default=",".join(TAMANOS),
+                        help=f"Tamaños sintéticos separados por coma ({', '.join(TAMANOS)})")
+    parser.add_argument("--operaciones", default="", help="Solo las operaciones cuyo nombre contenga alguno de estos textos")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--sin-datos", action="store_true", help="No usar las muestras de data/")
+    parser.add_argument("--salida", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--base", default=None, help="JSON de referencia para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                        help="Fracción de empeoramiento tolerada frente a la base (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    tamanos = [t.strip() for t in args.tamanos.split(",") if t.strip()]
+    for t in tamanos:
+        if t not in TAMANOS:
+            parser.error(f"Tamaño desconocido: {t}")
+    filtro = [t.strip() for t in args.operaciones.split(",") if t.strip()]
+    ops = operaciones(filtro)
+    cv2.setNumThreads(1)  # Resultados comparables entre máquinas y ejecuciones
+
+    resultados = []
+    print(f"{'Operación':<32} {'Caso':<34} {'Mediana':>10} {'p95':>10} {'MP/s':>9} {'Pico MB':>9}")
+    for caso, imagen in casos(tamanos, not args.sin_datos):
+        secundaria = imagen_sintetica(imagen.shape[0], imagen.shape[1], imagen.ndim == 3, semilla=1)
+        for nombre, funcion in ops:
+            try:
+                medida = medir(funcion, imagen, secundaria, args.repeticiones)
+            except Exception as e:
+                print(f"{nombre:<32} {caso:<34} ERROR: {e}")
+                continue
+            resultados.append({"operacion": nombre, "caso": caso, "forma": list(imagen.shape), **medida})
+            print(f"{nombre:<32} {caso:<34} {medida['mediana_ms']:>8.2f}ms {medida['p95_ms']:>8.2f}ms "
+                  f"{medida['mp_s'] or 0:>9.1f} {medida['memoria_pico_mb']:>9.1f}")
+
+    ruta = args.salida or os.path.join(CARPETA_SALIDA, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "plataforma": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "repeticiones": args.repeticiones,
+            "resultados": resultados,
+        }, f, indent=1, ensure_ascii=False)
+    print(f"\nResultados guardados en {ruta}")
+
+    if args.base:
+        regresiones = comparar(resultados, args.base, args.umbral)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones (> {args.umbral:.0%} frente a {args.base}):")
+            for r, anterior in regresiones:
+                print(f"  {r['operacion']:<32} {r['caso']:<34} {anterior['mediana_ms']:.2f} -> {r['mediana_ms']:.2f} ms")
+            return 1
+        print(f"\nSin regresiones frente a {args.base}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
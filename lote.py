@@ -0,0 +1,149 @@
+"""
+Procesamiento por lotes sin interfaz gráfica.
+
+Ejemplo:
+    python lote.py "GRAY -> Gaussiano:5 -> Canny -> Apertura EX:3" --entrada data
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import cv2
+
+from src.logic import instrumentacion
+from src.logic import lectura
+from src.logic import mosaicos
+from src.logic import pipeline
+
+EXTENSIONES = lectura.EXTENSIONES
+
+
+def _iniciar_proceso():
+    # Cada proceso usa un solo hilo de OpenCV para no competir entre procesos
+    cv2.setNumThreads(1)
+
+
+def procesar_archivo(ruta, pasos, carpeta_salida):
+    """
+    Lee, procesa y guarda una imagen. Se ejecuta dentro de un proceso del pool.
+    Retorna la duración y los eventos de instrumentación de esta imagen.
+    """
+    instrumentacion.SESION.limpiar()
+    inicio = time.perf_counter()
+    img = lectura.leer(ruta, cachear=False)  # Cada archivo se lee una sola vez
+
+    resultado = pipeline.ejecutar_pipeline(img, pasos)
+
+    # Se conserva la extensión original: barbara.bmp y barbara.png no chocan
+    salida = os.path.join(carpeta_salida, os.path.basename(ruta) + ".png")
+    if not cv2.imwrite(salida, resultado):
+        raise ValueError(f"No se pudo guardar la imagen: {salida}")
+    return time.perf_counter() - inicio, list(instrumentacion.SESION.eventos)
+
+
+def imprimir_estadisticas(filas):
+    print(f"\n{'Operación':<32} {'Llamadas':>8} {'Mediana':>10} {'p95':>10} {'Total':>10}")
+    for f in filas:
+        if f["mediana_ms"] is None:
+            continue
+        print(f"{f['nombre']:<32} {f['llamadas']:>8} {f['mediana_ms']:>8.1f}ms {f['p95_ms']:>8.1f}ms "
+              f"{f['total_ms'] / 1000:>9.2f}s")
+
+
+def listar_imagenes(carpeta, extensiones=EXTENSIONES):
+    return sorted(
+        os.path.join(carpeta, f) for f in os.listdir(carpeta)
+        if f.lower().endswith(extensiones)
+    )
+
+
+def procesar_mosaicos(archivos, pasos, carpeta_salida, lado):
+    """Imágenes enormes: una a una, cada una repartida en mosaicos entre los núcleos"""
+    for ruta in archivos:
+        nombre = os.path.basename(ruta)
+        salida = os.path.join(carpeta_salida, nombre + ".npy")
+        inicio = time.perf_counter()
+        mosaicos.procesar_por_mosaicos(ruta, pasos, salida, lado=lado)
+        print(f"{nombre:<40} {(time.perf_counter() - inicio) * 1000:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica un pipeline de operaciones a todas las imágenes de una carpeta.")
+    parser.add_argument("pipeline", help="Ej: 'GRAY -> Gaussiano:5 -> Canny -> Apertura EX:3', o un archivo de pipeline")
+    parser.add_argument("--entrada", default="data", help="Carpeta con las imágenes (por defecto: data)")
+    parser.add_argument("--salida", default="salidas", help="Carpeta de resultados (por defecto: salidas)")
+    parser.add_argument("--procesos", type=int, default=None, help="Número de procesos (por defecto: núcleos de la CPU)")
+    parser.add_argument("--plan", action="store_true", help="Solo muestra el plan del pipeline, sin procesar")
+    parser.add_argument("--mosaico", type=int, default=None, metavar="LADO",
+                        help="Procesa cada imagen por mosaicos de LADO píxeles y guarda un .npy (imágenes más grandes que la RAM)")
+    parser.add_argument("--estadisticas", action="store_true", help="Muestra el tiempo por operación al terminar")
+    parser.add_argument("--traza", default=None, metavar="RUTA",
+                        help="Guarda los tiempos de cada operación como traza JSON de Chrome (chrome://tracing)")
+    args = parser.parse_args(argv)
+
+    archivos = listar_imagenes(args.entrada, EXTENSIONES + (".npy",) if args.mosaico else EXTENSIONES)
+    if not archivos:
+        print(f"No hay imágenes en {args.entrada}", file=sys.stderr)
+        return 1
+
+    # Validamos y planificamos el pipeline antes de arrancar ningún proceso
+    try:
+        if os.path.isfile(args.pipeline):
+            pasos = pipeline.cargar_pipeline(args.pipeline)
+        else:
+            pasos = pipeline.parsear_pipeline(args.pipeline)
+        plan = pipeline.planificar(pasos, 1000, 1000)
+        if args.mosaico:
+            mosaicos.calcular_halo(pasos)  # Comprueba que todas las operaciones sean locales
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.plan:
+        print(f"{'Paso':<20} {'Canales':>7} {'Costo/MP':>10}")
+        for nombre, canales, costo in plan:
+            print(f"{nombre:<20} {canales:>7} {costo / 1e6:>10.1f}")
+        return 0
+
+    carpeta_salida = os.path.join(args.salida, f"lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(carpeta_salida, exist_ok=True)
+
+    if args.mosaico:
+        inicio = time.perf_counter()
+        procesar_mosaicos(archivos, pasos, carpeta_salida, args.mosaico)
+        total = time.perf_counter() - inicio
+        print(f"\n{len(archivos)} imágenes en {total:.2f} s ({len(archivos) / total:.2f} imágenes/s)")
+        print(f"Resultados en: {carpeta_salida}")
+        return 0
+
+    errores = 0
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.procesos, initializer=_iniciar_proceso) as pool:
+        futuros = {pool.submit(procesar_archivo, ruta, pasos, carpeta_salida): ruta for ruta in archivos}
+        for futuro in as_completed(futuros):
+            nombre = os.path.basename(futuros[futuro])
+            try:
+                duracion, eventos = futuro.result()
+                instrumentacion.SESION.agregar(eventos)
+                print(f"{nombre:<40} {duracion * 1000:8.1f} ms")
+            except Exception as e:
+                errores += 1
+                print(f"{nombre:<40}    ERROR: {e}")
+    total = time.perf_counter() - inicio
+
+    procesadas = len(archivos) - errores
+    print(f"\n{procesadas} imágenes en {total:.2f} s ({procesadas / total:.2f} imágenes/s)")
+    print(f"Resultados en: {carpeta_salida}")
+    if args.estadisticas:
+        imprimir_estadisticas(instrumentacion.SESION.estadisticas())
+    if args.traza:
+        instrumentacion.SESION.exportar_traza(args.traza)
+        print(f"Traza guardada en {args.traza}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,44 @@
 import cv2
 import numpy as np
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
-def calcular_histograma(imagen, modelo_actual="RGB"):
-    fig = Figure(figsize=(5, 4), dpi=100)
-    ax = fig.add_subplot(111)
+from src.logic import colores
+from src.logic import histogramas
+
+def series_histograma(imagen, modelo_actual="RGB", paso=1):
+    """
+    Prepara las curvas del histograma según el modelo de color, a partir de
+    los histogramas precalculados (src/logic/histogramas). Con paso > 1 se
+    usa una submuestra (más rápido, aproximado).
+    Retorna (titulo, [(etiqueta, color, valores), ...]).
+    """
+    hist = histogramas.aproximar(imagen, paso)
 
     if modelo_actual == "GRAY" or len(imagen.shape) == 2:
-        ax.hist(imagen.ravel(), 256, [0, 256], color='gray')
-        ax.set_title("Histograma (Grises)")
+        return "Histograma (Grises)", [("Grises", "gray", hist[0])]
 
-    elif modelo_actual == "HSV":
-        # Separamos canales H, S, V
-        h, s, v = cv2.split(imagen)
-        
-        # Graficamos cada uno con su color representativo
+    if modelo_actual == "HSV":
         # H (Matiz): 0-179 en OpenCV, S/V: 0-255
-        hist_h = cv2.calcHist([h], [0], None, [180], [0, 180])
-        hist_s = cv2.calcHist([s], [0], None, [256], [0, 256])
-        hist_v = cv2.calcHist([v], [0], None, [256], [0, 256])
-        
-        ax.plot(hist_h, color='orange', label='Hue (Matiz)')
-        ax.plot(hist_s, color='green', label='Sat (Saturación)')
-        ax.plot(hist_v, color='purple', label='Val (Brillo)')
-        ax.set_title("Histograma HSV")
-        ax.set_xlim([0, 256])
-        ax.legend()
-
-    elif modelo_actual == "CMYK":
-        # Asumimos que la imagen entrante es una visualización BGR simulada de CMY
-        # Lo ideal sería tener la matriz CMYK original, pero si no, la recalculamos
-        # para mostrar el gráfico correcto.
-        img_float = imagen.astype(np.float32) / 255.0
-        # Invertimos BGR (que simula CMY) para obtener "tintas" aproximadas
-        # B de la imagen = Y del modelo
-        # G de la imagen = M del modelo
-        # R de la imagen = C del modelo
-        c, m, y_chn = cv2.split(img_float)
-        
-        hist_c = cv2.calcHist([c.astype('float32')], [0], None, [256], [0, 1])
-        hist_m = cv2.calcHist([m.astype('float32')], [0], None, [256], [0, 1])
-        hist_y = cv2.calcHist([y_chn.astype('float32')], [0], None, [256], [0, 1])
-        
-        ax.plot(hist_c, color='cyan', label='Cian')
-        ax.plot(hist_m, color='magenta', label='Magenta')
-        ax.plot(hist_y, color='yellow', label='Amarillo')
-        ax.set_title("Niveles de Tinta (CMY)")
-        ax.legend()
-        
-    else: # RGB por defecto
-        colores = ('b', 'g', 'r')
-        labels = ('Azul', 'Verde', 'Rojo')
-        for i, color in enumerate(colores):
-            hist = cv2.calcHist([imagen], [i], None, [256], [0, 256])
-            ax.plot(hist, color=color, label=labels[i])
-        ax.set_title("Histograma RGB")
-        ax.legend()
-        
-    ax.grid(True, alpha=0.3)
-    return fig
+        return "Histograma HSV", [
+            ("Hue (Matiz)", "orange", hist[0][:180]),
+            ("Sat (Saturación)", "green", hist[1]),
+            ("Val (Brillo)", "purple", hist[2]),
+        ]
+
+    if modelo_actual == "CMYK":
+        # La imagen es una visualización CMY: el canal 0 es Cian, 1 Magenta y 2 Amarillo.
+        # Sus 256 niveles coinciden con los 256 intervalos de [0, 1] que se usaban antes.
+        return "Niveles de Tinta (CMY)", [
+            ("Cian", "cyan", hist[0]),
+            ("Magenta", "magenta", hist[1]),
+            ("Amarillo", "yellow", hist[2]),
+        ]
+
+    # RGB por defecto (BGR en OpenCV)
+    return "Histograma RGB", [
+        ("Azul", "b", hist[0]),
+        ("Verde", "g", hist[1]),
+        ("Rojo", "r", hist[2]),
+    ]
 
 
 def separar_canales(imagen, modelo="RGB"):
@@ -95,33 +74,18 @@ def separar_canales(imagen, modelo="RGB"):
         ]
 
     elif modelo == "CMYK":
-        # En nuestra implementación, CMYK es una simulación visual donde B=Y, G=M, R=C
-        # Porque lo convertimos invirtiendo canales.
-        # c1 es Cian, c2 es Magenta, c3 es Amarillo
-        
-        # Para ver Cian: Dejamos solo el canal azul+verde o invertimos el rojo?
-        # Visualmente en pantalla: Cian = Verde + Azul.
-        cian_vis = cv2.merge([c1, c1, zeros]) # Mezcla rara para simular.
-        # Mejor enfoque: Mostrar la "tinta" negra sobre papel blanco
-        # Invertimos el canal para que lo "oscuro" sea la tinta
-        
-        # Simulación simple de tintas:
-        # CIAN puro en pantalla es (255, 255, 0) en BGR
-        # MAGENTA puro es (255, 0, 255) en BGR
-        # AMARILLO puro es (0, 255, 255) en BGR
-        
-        # Pero tus datos ya vienen transformados. Asumimos que c1=C, c2=M, c3=Y
-        # Para visualizar C, mostramos c1 pintado de cian.
-        # ¿Cómo pintar una imagen de grises de color cian? 
-        # C = B+G. Entonces ponemos el valor de c1 en los canales B y G.
-        c_vis = cv2.merge([c1, c1, zeros])
-        m_vis = cv2.merge([c2, zeros, c2])
-        y_vis = cv2.merge([zeros, c3, c3])
+        # La imagen es la vista CMY: canal 0 Cian, 1 Magenta y 2 Amarillo (sin K)
+        c, m, y = c1, c2, c3
+
+        # Cada tinta pintada de su color en pantalla (BGR): Cian = Azul + Verde, etc.
+        c_vis = cv2.merge([c, c, zeros])
+        m_vis = cv2.merge([m, zeros, m])
+        y_vis = cv2.merge([zeros, y, y])
 
         canales_visualizables = [
             ("Canal Cian", c_vis),
             ("Canal Magenta", m_vis),
-            ("Canal Amarillo", y_vis)
+            ("Canal Amarillo", y_vis),
         ]
 
     else: # RGB (o default)
@@ -147,10 +111,7 @@ def etiquetar_componentes(imagen):
     Retorna la imagen coloreada con etiquetas aleatorias.
     """
     # 1. Asegurar que sea gris/binaria
-    if len(imagen.shape) > 2:
-        gris = cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
-    else:
-        gris = imagen
+    gris = colores.gris(imagen)
 
     # 2. Binarizar si no lo está (Otsu ayuda a limpiar ruido)
     _, binaria = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
@@ -163,12 +124,12 @@ def etiquetar_componentes(imagen):
     # 4. Colorear (Mapear etiquetas a colores)
     # Creamos una paleta de colores aleatorios
     # (num_labels) colores de 3 canales (RGB)
-    colores = np.random.randint(0, 255, size=(num_labels, 3), dtype=np.uint8)
+    paleta = np.random.randint(0, 255, size=(num_labels, 3), dtype=np.uint8)
     
     # El fondo (etiqueta 0) lo forzamos a negro para que se vea limpio
-    colores[0] = [0, 0, 0] 
+    paleta[0] = [0, 0, 0] 
 
     # Aplicamos los colores a la matriz de etiquetas
-    resultado_color = colores[labels]
+    resultado_color = paleta[labels]
     
     return resultado_color, num_labels - 1 # Restamos 1 para no contar el fondo
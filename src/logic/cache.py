@@ -0,0 +1,215 @@
+"""
+Caché de resultados de operaciones.
+
+La clave es un hash blake2b del contenido de la imagen (bytes + forma + tipo)
+junto con el nombre de la operación y sus parámetros, así que volver a aplicar
+la misma operación sobre la misma imagen (deshacer Canny, probar Sobel,
+deshacer, volver a Canny...) no recalcula nada.
+
+Nivel en memoria: LRU por tamaño en bytes, con un límite configurable.
+Nivel en disco (opcional): las entradas desalojadas de memoria se guardan como
+.npy en la carpeta indicada (normalmente salidas/.cache) y se recuperan de ahí.
+
+Los resultados se comparten entre aciertos: no deben modificarse en el sitio.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.logic.por_imagen import CachePorImagen
+
+# Los arrays no se modifican en el sitio: cada uno se hashea una sola vez mientras viva
+_hashes = CachePorImagen()
+
+
+def _calcular_hash(imagen):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{imagen.shape}{imagen.dtype.str}".encode())
+    h.update(np.ascontiguousarray(imagen).data)
+    return h.hexdigest()
+
+
+def hash_imagen(imagen):
+    """Hash del contenido de un array (incluye forma y tipo)"""
+    resultado = _hashes.obtener(imagen)
+    if resultado is None:
+        resultado = _hashes.guardar(imagen, _calcular_hash(imagen))
+    return resultado
+
+
+def _hash_valor(valor):
+    if isinstance(valor, np.ndarray):
+        return hash_imagen(valor)
+    return repr(valor)
+
+
+class CacheResultados:
+    def __init__(self, limite_mb=256, carpeta_disco=None, limite_disco_mb=1024):
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self.carpeta_disco = carpeta_disco  # None = sin nivel en disco
+        self.limite_disco_bytes = limite_disco_mb * 1024 * 1024
+        self._entradas = OrderedDict()      # clave -> array (la más reciente al final)
+        self._bytes = 0
+        # Las operaciones se ejecutan en hilos de trabajo
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self._hilo = threading.local()      # Origen de la última consulta de cada hilo
+        if carpeta_disco:
+            os.makedirs(carpeta_disco, exist_ok=True)
+
+    # --- Claves ---
+
+    @staticmethod
+    def clave(nombre, imagen, parametros=()):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(nombre.encode())
+        h.update(hash_imagen(imagen).encode())
+        for valor in parametros:
+            h.update(b"|")
+            h.update(_hash_valor(valor).encode())
+        return h.hexdigest()
+
+    # --- Acceso ---
+
+    def obtener(self, clave):
+        """Retorna el resultado guardado o None"""
+        with self._cerrojo:
+            resultado = self._entradas.get(clave)
+            if resultado is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                self._hilo.origen = "memoria"
+                return resultado
+
+        resultado = self._leer_disco(clave)
+        with self._cerrojo:
+            if resultado is None:
+                self.fallos += 1
+                self._hilo.origen = None
+                return None
+            self.aciertos_disco += 1
+            self._hilo.origen = "disco"
+        self.guardar(clave, resultado)  # Sube de nuevo a memoria
+        return resultado
+
+    def origen(self):
+        """'memoria', 'disco' o None (calculado) para la última consulta de este hilo"""
+        return getattr(self._hilo, "origen", None)
+
+    def guardar(self, clave, resultado):
+        if not isinstance(resultado, np.ndarray) or resultado.nbytes > self.limite_bytes:
+            return
+        with self._cerrojo:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior.nbytes
+            self._entradas[clave] = resultado
+            self._bytes += resultado.nbytes
+            desalojadas = self._ajustar()
+        for clave_vieja, array in desalojadas:
+            self._escribir_disco(clave_vieja, array)
+
+    def ejecutar(self, operacion, imagen, *parametros):
+        """Ejecuta la operación del registro o devuelve su resultado cacheado"""
+        clave = self.clave(operacion.nombre, imagen, parametros)
+        resultado = self.obtener(clave)
+        if resultado is None:
+            resultado = operacion.ejecutar(imagen, *parametros)
+            self.guardar(clave, resultado)
+        return resultado
+
+    # --- Límites ---
+
+    def _ajustar(self):
+        """Desaloja las entradas menos recientes hasta cumplir el límite"""
+        desalojadas = []
+        while self._bytes > self.limite_bytes and self._entradas:
+            clave, array = self._entradas.popitem(last=False)
+            self._bytes -= array.nbytes
+            desalojadas.append((clave, array))
+        return desalojadas
+
+    def cambiar_limite(self, limite_mb):
+        with self._cerrojo:
+            self.limite_bytes = limite_mb * 1024 * 1024
+            desalojadas = self._ajustar()
+        for clave, array in desalojadas:
+            self._escribir_disco(clave, array)
+
+    def limpiar(self):
+        """Vacía la memoria (el nivel en disco se conserva) y reinicia los contadores"""
+        with self._cerrojo:
+            self._entradas.clear()
+            self._bytes = 0
+            self.aciertos = self.aciertos_disco = self.fallos = 0
+
+    def memoria_usada(self):
+        return self._bytes
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.aciertos_disco + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "aciertos_disco": self.aciertos_disco,
+            "fallos": self.fallos,
+            "tasa_aciertos": (self.aciertos + self.aciertos_disco) / consultas if consultas else 0.0,
+            "entradas": len(self._entradas),
+            "bytes": self._bytes,
+            "limite_bytes": self.limite_bytes,
+        }
+
+    # --- Nivel en disco ---
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta_disco, clave + ".npy")
+
+    def _leer_disco(self, clave):
+        if not self.carpeta_disco:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            resultado = np.load(ruta)
+            os.utime(ruta)  # La antigüedad en disco también es por último uso
+            return resultado
+        except (OSError, ValueError):
+            return None  # No existe o está corrupto (se recalcula)
+
+    def _escribir_disco(self, clave, array):
+        if not self.carpeta_disco:
+            return
+        ruta = self._ruta(clave)
+        if os.path.exists(ruta):
+            return
+        # Escritura atómica: otro proceso puede estar leyendo la misma carpeta
+        temporal = ruta + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                np.save(f, array)
+            os.replace(temporal, ruta)
+        except OSError:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return
+        self._recortar_disco()
+
+    def _recortar_disco(self):
+        """Borra los archivos más antiguos si la carpeta supera su límite"""
+        archivos = []
+        for entrada in os.scandir(self.carpeta_disco):
+            if entrada.name.endswith(".npy"):
+                estado = entrada.stat()
+                archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+        total = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if total <= self.limite_disco_bytes:
+                break
+            try:
+                os.remove(ruta)
+                total -= tamano
+            except OSError:
+                pass
@@ -0,0 +1,41 @@
+"""
+Modo de color por canal para las operaciones que trabajan en grises.
+
+Filtros de rango, detectores de bordes y morfologías convierten la imagen a
+grises antes de operar. Con el modo "CANALES" una imagen en color se separa
+en sus canales (B/G/R, H/S/V...), cada uno se procesa como una imagen en
+grises en un hilo distinto y el resultado se vuelve a unir. OpenCV y SciPy
+liberan el GIL durante el cálculo, así que los canales avanzan en paralelo.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+import cv2
+
+MODOS = ("GRIS", "CANALES")
+
+# Los hilos se crean al primer uso; 4 cubre BGR, HSV, CMY y BGRA
+_POOL = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="canal")
+
+
+def por_canal(funcion, imagen, *args):
+    """Aplica funcion(canal, *args) a cada canal en paralelo y une los resultados"""
+    canales = cv2.split(imagen)
+    resultados = list(_POOL.map(lambda canal: funcion(canal, *args), canales))
+    return cv2.merge(resultados)
+
+
+def con_modo(funcion):
+    """
+    Versión de 'funcion' cuyo último argumento es el modo de color.
+    El registro la usa con todos los parámetros completos, así que el modo
+    siempre llega en última posición.
+    """
+    @wraps(funcion)
+    def envuelta(imagen, *args):
+        *args, modo = args
+        if modo == "CANALES" and imagen.ndim == 3:
+            return por_canal(funcion, imagen, *args)
+        return funcion(imagen, *args)
+    return envuelta
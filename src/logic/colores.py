@@ -1,60 +1,108 @@
+"""
+Cambios de modelo de color.
+
+Todas las conversiones trabajan sobre uint8 sin pasar por float ni copiar
+de más: "RGB" sobre una imagen en color devuelve el mismo array (los arrays
+no se modifican en el sitio) y CMY es 255 - BGR con los canales invertidos.
+Las conversiones se guardan mientras viva la imagen de entrada, así que
+alternar entre vistas RGB/HSV/CMY de la misma versión no recalcula nada.
+"""
 import cv2
 import numpy as np
 
-def aplicar_modelo(imagen, modelo):
+from src.logic.por_imagen import CachePorImagen
+
+LIMITE_BYTES = 256 * 1024 * 1024  # Conversiones guardadas entre todas las imágenes
+
+# imagen -> {(modelo, umbral): resultado}
+_conversiones = CachePorImagen(LIMITE_BYTES, tamano=lambda guardadas: sum(r.nbytes for r in guardadas.values()))
+
+
+def _a_bgr(imagen):
+    if imagen.ndim == 2:
+        return cv2.cvtColor(imagen, cv2.COLOR_GRAY2BGR)
+    return imagen
+
+
+def _a_gris(imagen):
+    if imagen.ndim == 2:
+        return imagen
+    return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
+
+
+def a_cmy(imagen):
+    """CMY empaquetado (C, M, Y) en uint8: 255 - (R, G, B)"""
+    cmy = cv2.bitwise_not(_a_bgr(imagen))
+    return cv2.cvtColor(cmy, cv2.COLOR_BGR2RGB, dst=cmy)
+
+
+def _convertir(imagen, modelo, umbral):
+    if modelo == "RGB":
+        # OpenCV usa BGR por defecto, así que "RGB" para visualización es
+        # simplemente el estado original de carga
+        return _a_bgr(imagen)
+
+    if modelo == "GRAY":
+        return _a_gris(imagen)
+
+    if modelo == "BINARY":
+        gris = _a_gris(imagen)
+        if umbral:
+            _, binaria = cv2.threshold(gris, umbral, 255, cv2.THRESH_BINARY)
+        else:
+            # Umbral automático usando Otsu
+            _, binaria = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return binaria
+
+    if modelo == "HSV":
+        if imagen.ndim == 2:
+            # Gris: sin matiz ni saturación, V es el propio nivel
+            ceros = np.zeros_like(imagen)
+            return cv2.merge([ceros, ceros, imagen])
+        return cv2.cvtColor(imagen, cv2.COLOR_BGR2HSV)
+
+    if modelo == "CMYK":
+        # El modelo "CMYK" es CMY empaquetado (3 canales, sin negro K): así
+        # las demás operaciones y los visores lo tratan como cualquier imagen de 3 canales
+        return a_cmy(imagen)
+
+    return imagen
+
+
+def _buscar(imagen, clave):
+    guardadas = _conversiones.obtener(imagen)
+    return guardadas.get(clave) if guardadas is not None else None
+
+
+def _guardar(imagen, clave, resultado):
+    # Diccionario nuevo en lugar de modificar el compartido: el tamaño se
+    # vuelve a contar al guardarlo
+    guardadas = dict(_conversiones.obtener(imagen) or {})
+    guardadas[clave] = resultado
+    _conversiones.guardar(imagen, guardadas)
+
+
+def aplicar_modelo(imagen, modelo, umbral=0):
     """
     Controlador principal para cambios de espacio de color.
     modelos: 'RGB', 'GRAY', 'BINARY', 'HSV', 'CMYK'
+    umbral: solo para 'BINARY'; 0 = automático (Otsu)
     """
     if imagen is None: return None
-    
-    # 1. Recuperar imagen base en BGR (OpenCV estándar)
-    # Si la imagen ya viene en gris (2 dim), la convertimos a BGR primero para estandarizar
-    if len(imagen.shape) == 2:
-        img_bgr = cv2.cvtColor(imagen, cv2.COLOR_GRAY2BGR)
-    else:
-        img_bgr = imagen.copy()
-
-    # 2. Aplicar transformación
-    if modelo == "RGB":
-        # OpenCV usa BGR por defecto, así que "RGB" para visualización es 
-        # simplemente volver al estado original de carga.
-        return img_bgr
-
-    elif modelo == "GRAY":
-        return cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-
-    elif modelo == "BINARY":
-        # Primero a gris
-        gris = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        # Threshold (umbral) automático usando Otsu
-        _, binaria = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        return binaria
 
-    elif modelo == "HSV":
-        return cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
-
-    elif modelo == "CMYK":
-        # OpenCV no tiene conversión directa BGR -> CMYK. Hay que hacerlo manual.
-        # Normalizar a rango 0-1
-        img_float = img_bgr.astype(np.float32) / 255.0
-        
-        # BGR -> CMY
-        # K = 1 - max(R, G, B)
-        # C = (1 - R - K) / (1 - K) ... etc.
-        # Truco: CMY es simplemente 1 - RGB (invertir canales)
-        # Pero ojo: BGR -> RGB primero
-        b, g, r = cv2.split(img_float)
-        
-        # K (Key/Black) es el mínimo valor de luz (1 - max(r,g,b))
-        # Pero es más fácil visualmente mostrar la inversión CMY simple
-        # Retornaremos la imagen en formato CMY simulado para visualización
-        c = 1.0 - r
-        m = 1.0 - g
-        y = 1.0 - b
-        
-        # Juntamos para mostrar (aunque los monitores son RGB, esto simula el efecto)
-        cmy = cv2.merge((c, m, y))
-        return (cmy * 255).astype(np.uint8)
-        
-    return imagen
+    clave = (modelo, umbral if modelo == "BINARY" else 0)
+    resultado = _buscar(imagen, clave)
+    if resultado is None:
+        resultado = _convertir(imagen, modelo, umbral)
+        if resultado is not imagen:
+            _guardar(imagen, clave, resultado)
+    return resultado
+
+
+def gris(imagen):
+    """
+    Versión en grises de la imagen (la misma si ya es gris). Es la conversión
+    que comparten filtros, morfologías, mapas y componentes: se calcula una
+    vez por versión de la imagen.
+    """
+    return aplicar_modelo(imagen, "GRAY")
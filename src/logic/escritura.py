@@ -0,0 +1,140 @@
+"""
+Guardado de imágenes fuera del hilo de la interfaz.
+
+Escritor codifica y escribe en un hilo propio con una cola acotada: guardar
+no bloquea la interfaz y, si se encolan más imágenes de las que caben, se
+rechazan en lugar de acumular copias en memoria. exportar() escribe muchas
+imágenes (por ejemplo todo el historial) en paralelo: cv2.imwrite libera el
+GIL mientras codifica.
+
+Los nombres llevan fecha con microsegundos y se reservan creando el archivo
+en exclusiva, así que dos guardados seguidos (o simultáneos) nunca chocan.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import cv2
+
+# formato -> (extensión, parámetro de OpenCV, mínimo, máximo, nivel por defecto)
+FORMATOS = {
+    "PNG": (".png", cv2.IMWRITE_PNG_COMPRESSION, 0, 9, 1),        # Compresión (sin pérdida)
+    "JPEG": (".jpg", cv2.IMWRITE_JPEG_QUALITY, 0, 100, 95),        # Calidad
+    "WebP": (".webp", cv2.IMWRITE_WEBP_QUALITY, 1, 101, 90),       # Calidad (101 = sin pérdida)
+    "TIFF": (".tif", cv2.IMWRITE_TIFF_COMPRESSION, 1, 1, 1),       # Sin compresión: lo más rápido
+}
+
+
+def parametros(formato, nivel=None):
+    """Parámetros de cv2.imwrite para el formato (nivel dentro de su rango)"""
+    _, clave, minimo, maximo, defecto = FORMATOS[formato]
+    nivel = defecto if nivel is None else min(max(int(nivel), minimo), maximo)
+    return [clave, nivel]
+
+
+def reservar_nombre(carpeta, prefijo, formato):
+    """Crea un archivo vacío con nombre único y retorna su ruta"""
+    os.makedirs(carpeta, exist_ok=True)
+    extension = FORMATOS[formato][0]
+    base = f"{prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    sufijo = 0
+    while True:
+        ruta = os.path.join(carpeta, f"{base}{f'_{sufijo}' if sufijo else ''}{extension}")
+        try:
+            os.close(os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return ruta
+        except FileExistsError:
+            sufijo += 1
+
+
+def guardar(ruta, imagen, formato, nivel=None):
+    """Escribe la imagen; lanza ValueError si OpenCV no puede codificarla"""
+    try:
+        ok = cv2.imwrite(ruta, imagen, parametros(formato, nivel))
+    except cv2.error as e:
+        raise ValueError(f"No se pudo guardar la imagen: {ruta}\n{e}")
+    if not ok:
+        raise ValueError(f"No se pudo guardar la imagen: {ruta}")
+    return ruta
+
+
+class Escritor:
+    """
+    Hilo de escritura con cola acotada. al_terminar(ruta, error) se llama
+    desde ese hilo al acabar cada imagen (error es None si todo fue bien).
+    """
+    def __init__(self, capacidad=4, al_terminar=None):
+        self.al_terminar = al_terminar
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._hilo = threading.Thread(target=self._trabajar, name="escritor", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, imagen, carpeta, prefijo="resultado", formato="PNG", nivel=None, bloquear=False):
+        """
+        Encola la imagen y retorna la ruta reservada. Sin bloquear, lanza
+        queue.Full si la cola está llena. La imagen no debe modificarse después.
+        """
+        ruta = reservar_nombre(carpeta, prefijo, formato)
+        try:
+            self._cola.put((ruta, imagen, formato, nivel), block=bloquear)
+        except queue.Full:
+            os.remove(ruta)
+            raise
+        return ruta
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def _trabajar(self):
+        while True:
+            trabajo = self._cola.get()
+            if trabajo is None:
+                return
+            ruta, imagen, formato, nivel = trabajo
+            try:
+                guardar(ruta, imagen, formato, nivel)
+                error = None
+            except Exception as e:
+                error = str(e)
+                try:
+                    os.remove(ruta)  # No dejar el archivo vacío reservado
+                except OSError:
+                    pass
+            if self.al_terminar is not None:
+                self.al_terminar(ruta, error)
+
+    def cerrar(self):
+        """Termina de escribir lo encolado y detiene el hilo"""
+        self._cola.put(None)
+        self._hilo.join()
+
+
+def exportar(imagenes, carpeta, prefijo="estado", formato="PNG", nivel=None, hilos=None, progreso=None, total=None):
+    """
+    Escribe en paralelo las imágenes de un iterable (se consume a medida que
+    se escribe: como mucho dos por hilo en memoria). Nombres prefijo_001, ...
+    Retorna la lista de rutas en orden.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    hilos = hilos or os.cpu_count() or 1
+    extension = FORMATOS[formato][0]
+    rutas, pendientes, hechas = [], set(), 0
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="exportar") as pool:
+        for i, imagen in enumerate(imagenes, 1):
+            ruta = os.path.join(carpeta, f"{prefijo}_{i:03d}{extension}")
+            rutas.append(ruta)
+            pendientes.add(pool.submit(guardar, ruta, imagen, formato, nivel))
+            while len(pendientes) >= 2 * hilos:
+                listas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in listas:
+                    futuro.result()  # Propaga los errores de escritura
+                hechas += len(listas)
+                if progreso:
+                    progreso(hechas, total or len(rutas))
+        for futuro in pendientes:
+            futuro.result()
+    if progreso:
+        progreso(len(rutas), len(rutas))
+    return rutas
@@ -1,12 +1,13 @@
 import cv2
 import numpy as np
-import scipy.ndimage as ndimage
+
+from src.logic import colores
+from src.logic import kernels
+from src.logic import rango
 
 def convertir_a_grises(imagen):
-    """Convierte a escala de grises si es necesario"""
-    if len(imagen.shape) == 3:
-        return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
-    return imagen
+    """Convierte a escala de grises si es necesario (una vez por versión de la imagen)"""
+    return colores.gris(imagen)
 
 # ==========================================
 # FILTROS DE SUAVIZADO (RUIDO)
@@ -20,7 +21,7 @@ def filtro_mediana(imagen, kernel_size=3):
     """Filtro de mediana (ideal para sal y pimienta)"""
     # kernel_size debe ser impar
     k = kernel_size if kernel_size % 2 == 1 else kernel_size + 1
-    return cv2.medianBlur(imagen, k)
+    return rango.mediana(imagen, k)
 
 def filtro_gaussiano(imagen, kernel_size=3):
     """Filtro Gaussiano"""
@@ -31,12 +32,12 @@ def filtro_maximo(imagen, kernel_size=3):
     """Filtro de máximo (elimina puntos negros/pimienta)"""
     # Funciona mejor en escala de grises para visualizar
     img = convertir_a_grises(imagen)
-    return ndimage.maximum_filter(img, size=kernel_size)
+    return rango.maximo(img, kernel_size)
 
 def filtro_minimo(imagen, kernel_size=3):
     """Filtro de mínimo (elimina puntos blancos/sal)"""
     img = convertir_a_grises(imagen)
-    return ndimage.minimum_filter(img, size=kernel_size)
+    return rango.minimo(img, kernel_size)
 
 
 # ==========================================
@@ -60,13 +61,9 @@ def filtro_prewitt(imagen):
     """Operador Prewitt"""
     img = convertir_a_grises(imagen)
     
-    # Kernels de Prewitt
-    kernelx = np.array([[1, 0, -1], [1, 0, -1], [1, 0, -1]], dtype=np.float32)
-    kernely = np.array([[1, 1, 1], [0, 0, 0], [-1, -1, -1]], dtype=np.float32)
-    
-    # Aplicar filtros
-    prewittx = cv2.filter2D(img, -1, kernelx)
-    prewitty = cv2.filter2D(img, -1, kernely)
+    # Aplicar filtros (kernels de Prewitt precalculados)
+    prewittx = cv2.filter2D(img, -1, kernels.PREWITT_X)
+    prewitty = cv2.filter2D(img, -1, kernels.PREWITT_Y)
     
     # Combinar (suma ponderada aproximada o magnitud)
     # Usamos addWeighted para simular la combinación visual
@@ -77,21 +74,17 @@ def filtro_roberts(imagen):
     """Operador Roberts"""
     img = convertir_a_grises(imagen)
     
-    # Kernels de Roberts
-    kernelx = np.array([[1, 0], [0, -1]], dtype=np.float32)
-    kernely = np.array([[0, 1], [-1, 0]], dtype=np.float32)
-    
-    robertsx = cv2.filter2D(img, -1, kernelx)
-    robertsy = cv2.filter2D(img, -1, kernely)
+    # Kernels de Roberts precalculados
+    robertsx = cv2.filter2D(img, -1, kernels.ROBERTS_X)
+    robertsy = cv2.filter2D(img, -1, kernels.ROBERTS_Y)
     
     bordes = cv2.addWeighted(robertsx, 0.5, robertsy, 0.5, 0)
     return bordes
 
-def filtro_canny(imagen):
-    """Detector de bordes Canny"""
+def filtro_canny(imagen, umbral_bajo=100, umbral_alto=200):
+    """Detector de bordes Canny (umbrales de histéresis)"""
     img = convertir_a_grises(imagen)
-    # Umbrales estándar, se pueden ajustar
-    return cv2.Canny(img, 100, 200)
+    return cv2.Canny(img, umbral_bajo, umbral_alto)
 
 def filtro_laplaciano(imagen):
     """Filtro Laplaciano"""
@@ -101,25 +94,76 @@ def filtro_laplaciano(imagen):
     lap = np.uint8(np.absolute(lap))
     return lap
 
-def filtro_kirsch(imagen):
-    """Operador Kirsch (Máximo de 8 direcciones)"""
+# Vecinos del anillo 3x3 en sentido horario desde la esquina superior izquierda
+# (fila, columna). La máscara de Kirsch en la dirección d (N, NE, E, SE, S, SW, W, NW)
+# vale 5 en los vecinos d, d+1, d+2 y -3 en los otros cinco.
+_ANILLO_KIRSCH = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+_FILAS_BLOQUE_KIRSCH = 32  # Bloques pequeños: los buffers intermedios caben en caché
+
+def filtro_kirsch(imagen, devolver_direccion=False):
+    """
+    Operador Kirsch (Máximo de 8 direcciones).
+    Cada máscara da 8*T - 3*S, con T la suma de sus tres vecinos "5" y S la
+    suma del anillo, así que el máximo es 8*max(T) - 3*S. Al rotar la máscara
+    T se actualiza sumando un vecino y restando otro, sin 8 pasadas de filter2D.
+    Con devolver_direccion=True retorna también el índice (0=N ... 7=NW) de la
+    máscara ganadora.
+    """
     img = convertir_a_grises(imagen)
-    
-    # Las 8 máscaras de Kirsch
-    kernels = [
-        np.array([[5, 5, 5], [-3, 0, -3], [-3, -3, -3]]),      # N
-        np.array([[-3, 5, 5], [-3, 0, 5], [-3, -3, -3]]),      # NE
-        np.array([[-3, -3, 5], [-3, 0, 5], [-3, -3, 5]]),      # E
-        np.array([[-3, -3, -3], [-3, 0, 5], [-3, 5, 5]]),      # SE
-        np.array([[-3, -3, -3], [-3, 0, -3], [5, 5, 5]]),      # S
-        np.array([[-3, -3, -3], [5, 0, -3], [5, 5, -3]]),      # SW
-        np.array([[5, -3, -3], [5, 0, -3], [5, -3, -3]]),      # W
-        np.array([[5, 5, -3], [5, 0, -3], [-3, -3, -3]])       # NW
-    ]
-    
-    # Aplicar todos los kernels y tomar el máximo en cada píxel
-    respuestas = [cv2.filter2D(img, -1, k) for k in kernels]
-    
-    # Combinar tomando el máximo valor pixel a pixel
-    bordes = np.max(respuestas, axis=0)
+    alto, ancho = img.shape
+
+    # Mismo borde que usa cv2.filter2D por defecto
+    pad = cv2.copyMakeBorder(img, 1, 1, 1, 1, cv2.BORDER_REFLECT_101)
+    bordes = np.empty((alto, ancho), np.uint8)
+    direccion = np.empty((alto, ancho), np.uint8) if devolver_direccion else None
+
+    # Buffers reutilizados en todos los bloques (O(1) imágenes extra, no 8)
+    filas = min(_FILAS_BLOQUE_KIRSCH, alto)
+    buf_s = np.empty((filas, ancho), np.int16)
+    buf_t = np.empty_like(buf_s)
+    buf_clave = np.empty_like(buf_s)
+    buf_max = np.empty_like(buf_s)
+
+    for y0 in range(0, alto, filas):
+        y1 = min(y0 + filas, alto)
+        h = y1 - y0
+        s, t, clave, maximo = buf_s[:h], buf_t[:h], buf_clave[:h], buf_max[:h]
+
+        # Trabajamos con los valores *8: así los 3 bits bajos quedan libres para
+        # codificar la dirección y un solo np.maximum da máximo y argmax a la vez.
+        p = pad[y0:y1 + 2].astype(np.int16)
+        np.left_shift(p, 3, out=p)
+        anillo = [p[1 + dy:1 + dy + h, 1 + dx:1 + dx + ancho] for dy, dx in _ANILLO_KIRSCH]
+
+        # T de la dirección N y arranque de S
+        np.add(anillo[0], anillo[1], out=t)
+        np.add(t, anillo[2], out=t)
+        np.add(t, anillo[3], out=s)
+        np.add(s, anillo[7], out=s)
+        # Clave = 8*T + (7 - d): en empate gana la primera dirección, como np.argmax
+        np.add(t, 7, out=maximo)
+
+        for d in range(1, 8):
+            np.add(t, anillo[(d + 2) % 8], out=t)
+            np.subtract(t, anillo[d - 1], out=t)
+            if d == 4:
+                np.add(s, t, out=s)  # S = T(N) + T(S) + vecinos E y W
+            np.add(t, 7 - d, out=clave)
+            np.maximum(maximo, clave, out=maximo)
+
+        if direccion is not None:
+            np.bitwise_and(maximo, 7, out=clave)
+            np.subtract(7, clave, out=clave)
+            direccion[y0:y1] = clave
+
+        # 8*max(T) - 3*S, saturado a 0-255 como hacía filter2D sobre uint8
+        np.bitwise_and(maximo, -8, out=maximo)
+        np.right_shift(s, 3, out=s)
+        np.multiply(s, 3, out=s)
+        np.subtract(maximo, s, out=maximo)
+        np.clip(maximo, 0, 255, out=maximo)
+        bordes[y0:y1] = maximo
+
+    if devolver_direccion:
+        return bordes, direccion
     return bordes
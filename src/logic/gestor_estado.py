@@ -1,41 +1,340 @@
+import threading
+import zlib
+from collections import deque
+
+import numpy as np
+
+from src.logic import pipeline
+from src.logic import registro
+from src.logic.imagen import Imagen
+
+
+class _Instantanea:
+    """
+    Estado guardado en forma comprimida, con el modelo de color de la imagen.
+    Si es_clave es False, 'datos' es el XOR contra el estado anterior del historial.
+    """
+    __slots__ = ("datos", "forma", "tipo", "es_clave", "modelo")
+
+    def __init__(self, datos, forma, tipo, es_clave, modelo=None):
+        self.datos = datos
+        self.forma = forma
+        self.tipo = tipo
+        self.es_clave = es_clave
+        self.modelo = modelo
+
+    @property
+    def nbytes(self):
+        return len(self.datos)
+
+
 class GestorEstado:
-    def __init__(self):
-        self.historial = []  # Pila de imágenes pasadas
-        self.rehacer_stack = [] # Pila para "Adelante"
-        self.max_pasos = 20  # Límite para no llenar la RAM
+    """
+    Historial de imágenes comprimidas. Recibe objetos Imagen: deshacer y
+    rehacer restauran también el modelo de color de cada estado. Ambos
+    actualizan el historial al momento y retornan una función que
+    reconstruye la imagen, que se puede llamar desde otro hilo.
+    """
+    def __init__(self, presupuesto_mb=256, intervalo_clave=5, nivel_compresion=1):
+        self.historial = deque()      # Pila de estados pasados (comprimidos)
+        self.rehacer_stack = deque()  # Pila para "Adelante" (fotogramas clave comprimidos)
+        self.presupuesto_bytes = presupuesto_mb * 1024 * 1024  # Límite para no llenar la RAM
+        self.intervalo_clave = intervalo_clave  # Cada cuántos pasos se guarda un estado completo
+        self.nivel_compresion = nivel_compresion
+        self._bytes = 0
+        # Último estado guardado sin comprimir: base para calcular el siguiente delta
+        self._ultima = None
+        self._pasos_desde_clave = 0
+
+    # --- Codificación ---
+
+    def _comprimir(self, imagen, base=None, modelo=None):
+        """Comprime la imagen completa o, si hay base compatible, su XOR contra ella"""
+        imagen = np.ascontiguousarray(imagen)
+        if base is not None and base.shape == imagen.shape and base.dtype == imagen.dtype:
+            datos = np.bitwise_xor(base.view(np.uint8), imagen.view(np.uint8))
+            es_clave = False
+        else:
+            datos = imagen
+            es_clave = True
+        comprimido = zlib.compress(datos.data, self.nivel_compresion)
+        return _Instantanea(comprimido, imagen.shape, imagen.dtype, es_clave, modelo)
+
+    @staticmethod
+    def _descomprimir(inst, base=None):
+        plano = np.frombuffer(zlib.decompress(inst.datos), dtype=np.uint8)
+        if not inst.es_clave:
+            plano = np.bitwise_xor(base.reshape(-1).view(np.uint8), plano)
+        else:
+            plano = plano.copy()  # frombuffer es de solo lectura
+        return plano.view(inst.tipo).reshape(inst.forma)
+
+    def _cadena(self, indice):
+        """Instantáneas necesarias para historial[indice]: desde el fotograma clave más cercano hacia atrás"""
+        inicio = indice
+        while not self.historial[inicio].es_clave:
+            inicio -= 1
+        return [self.historial[i] for i in range(inicio, indice + 1)]
+
+    @classmethod
+    def _reconstruir(cls, cadena):
+        imagen = cls._descomprimir(cadena[0])
+        for inst in cadena[1:]:
+            imagen = cls._descomprimir(inst, imagen)
+        return imagen
+
+    # --- Memoria ---
+
+    def memoria_usada(self):
+        """Bytes ocupados por el historial y la pila de rehacer"""
+        return self._bytes
 
-    def guardar_estado(self, imagen_nueva):
-        """Llama a esto ANTES de modificar la imagen actual"""
+    def cambiar_presupuesto(self, presupuesto_mb):
+        self.presupuesto_bytes = presupuesto_mb * 1024 * 1024
+        self._ajustar_presupuesto()
+
+    def _ajustar_presupuesto(self):
+        """Descarta los estados más viejos hasta entrar en el presupuesto"""
+        while self._bytes > self.presupuesto_bytes and len(self.historial) > 1:
+            viejo = self.historial.popleft()
+            self._bytes -= viejo.nbytes
+            siguiente = self.historial[0]
+            if not siguiente.es_clave:
+                # El nuevo primer estado pierde su base: lo convertimos en fotograma clave
+                imagen = self._descomprimir(siguiente, self._descomprimir(viejo))
+                clave = self._comprimir(imagen, modelo=siguiente.modelo)
+                self.historial[0] = clave
+                self._bytes += clave.nbytes - siguiente.nbytes
+
+        while self._bytes > self.presupuesto_bytes and self.rehacer_stack:
+            self._bytes -= self.rehacer_stack.popleft().nbytes  # El futuro más lejano
+
+    # --- API pública ---
+
+    def guardar_estado(self, imagen_nueva, receta=None):
+        """Llama a esto ANTES de modificar la imagen actual (la receta no se usa aquí)"""
         if imagen_nueva is None: return
-        
-        self.historial.append(imagen_nueva.copy())
-        if len(self.historial) > self.max_pasos:
-            self.historial.pop(0) # Borra el más viejo
-        
-        self.rehacer_stack.clear() # Al hacer algo nuevo, se borra el futuro
+
+        usar_delta = self._ultima is not None and self._pasos_desde_clave < self.intervalo_clave
+        inst = self._comprimir(imagen_nueva.datos, self._ultima if usar_delta else None, imagen_nueva.modelo)
+        self._pasos_desde_clave = 0 if inst.es_clave else self._pasos_desde_clave + 1
+
+        self.historial.append(inst)
+        self._bytes += inst.nbytes
+        self._ultima = imagen_nueva.datos  # Las operaciones no modifican su entrada: basta la referencia
+
+        # Al hacer algo nuevo, se borra el futuro
+        self._bytes -= sum(r.nbytes for r in self.rehacer_stack)
+        self.rehacer_stack.clear()
+
+        self._ajustar_presupuesto()
+
+    def reemplazar_ultimo(self, receta=None):
+        """
+        El último paso se recalculó con otros parámetros sobre la misma
+        entrada. Aquí no cambia nada: lo guardado es esa entrada.
+        """
 
     def deshacer(self, imagen_actual):
-        """Retorna la imagen anterior y guarda la actual en rehacer"""
+        """Guarda la actual en rehacer; retorna la función que reconstruye la anterior (None si no hay)"""
         if not self.historial:
             return None
-        
+
         # Guardamos la actual en rehacer por si queremos volver
         if imagen_actual is not None:
-            self.rehacer_stack.append(imagen_actual)
+            inst = self._comprimir(imagen_actual.datos, modelo=imagen_actual.modelo)
+            self.rehacer_stack.append(inst)
+            self._bytes += inst.nbytes
+
+        # Solo se reconstruye el estado que se pide (desde su fotograma clave),
+        # al llamar a la función: las instantáneas no se modifican nunca
+        cadena = self._cadena(len(self.historial) - 1)
+        inst = self.historial.pop()
+        self._bytes -= inst.nbytes
 
-        return self.historial.pop()
+        # La base del próximo delta ya no es válida; el siguiente guardado será clave
+        self._ultima = None
+        self._ajustar_presupuesto()
+        return lambda: Imagen(self._reconstruir(cadena), inst.modelo)
 
     def rehacer(self, imagen_actual):
-        """Retorna la imagen siguiente"""
+        """Retorna la función que reconstruye la imagen siguiente (None si no hay)"""
         if not self.rehacer_stack:
             return None
-        
+
         # Guardamos la actual en historial
         if imagen_actual is not None:
-            self.historial.append(imagen_actual)
-            
-        return self.rehacer_stack.pop()
+            inst = self._comprimir(imagen_actual.datos, modelo=imagen_actual.modelo)
+            self.historial.append(inst)
+            self._bytes += inst.nbytes
+            self._ultima = imagen_actual.datos
+            self._pasos_desde_clave = 0
+
+        inst = self.rehacer_stack.pop()
+        self._bytes -= inst.nbytes
+        self._ajustar_presupuesto()
+        return lambda: Imagen(self._descomprimir(inst), inst.modelo)
+
+    def num_estados(self):
+        """Estados pasados, el actual y los de rehacer"""
+        return len(self.historial) + 1 + len(self.rehacer_stack)
+
+    def estados(self, imagen_actual):
+        """
+        Todos los estados en orden (pasados, el actual y los de rehacer) como
+        Imagen, descomprimidos de uno en uno. Trabaja sobre una copia del
+        historial: se puede consumir en otro hilo mientras se sigue editando.
+        """
+        historial, futuro = list(self.historial), list(self.rehacer_stack)
+
+        def generar():
+            datos = None
+            for inst in historial:
+                # Cada delta es contra el estado anterior, que acabamos de reconstruir
+                datos = self._descomprimir(inst, None if inst.es_clave else datos)
+                yield Imagen(datos, inst.modelo)
+            yield imagen_actual
+            for inst in reversed(futuro):  # El último apilado es el siguiente paso
+                yield Imagen(self._descomprimir(inst), inst.modelo)
+        return generar()
+
+    def reiniciar(self, imagen_base=None):
+        self.historial.clear()
+        self.rehacer_stack.clear()
+        self._bytes = 0
+        self._ultima = None
+        self._pasos_desde_clave = 0
+
+
+class GestorRecetas:
+    """
+    Historial alternativo: en lugar de imágenes guarda la receta de cada paso
+    (nombre de la operación y parámetros, con la ruta de la imagen secundaria)
+    aplicada desde la imagen base. Deshacer reproduce los pasos desde el
+    punto de control más cercano, así que la memoria casi no crece con el historial.
+    El modelo de color de cada estado se deduce de las operaciones reproducidas.
+    Como en GestorEstado, deshacer y rehacer retornan una función que hace la
+    reproducción y se puede llamar desde otro hilo.
+    """
+    def __init__(self, intervalo_control=5, max_controles=4):
+        self.historial = []      # Recetas (nombre, parametros) aplicadas desde la base
+        self.rehacer_stack = []
+        self.intervalo_control = intervalo_control  # Cada cuántos pasos se guarda un punto de control
+        self.max_controles = max_controles          # Puntos de control en memoria (además de la base)
+        self.presupuesto_bytes = None               # Sin límite: la memoria depende de los controles
+        self._controles = {}  # índice de estado -> Imagen (0 es la imagen base)
+        # Los controles también se guardan desde el hilo que reproduce las recetas
+        self._cerrojo = threading.Lock()
+        self._generacion = 0  # Cambia con cada paso nuevo o reemplazado: invalida reproducciones en curso
+
+    def _guardar_control(self, indice, imagen, generacion=None):
+        """Con el cerrojo tomado. Si se pasa 'generacion', solo se guarda si el historial no cambió"""
+        if generacion is not None and generacion != self._generacion:
+            return
+        self._controles[indice] = imagen
+        # Conservamos la base y los puntos de control más recientes
+        sobrantes = sorted(i for i in self._controles if i != 0)[:-self.max_controles]
+        for i in sobrantes:
+            del self._controles[i]
+
+    def _estado(self, indice):
+        """Función que reconstruye el estado 'indice' reproduciendo recetas desde el control más cercano"""
+        with self._cerrojo:
+            inicio = max(i for i in self._controles if i <= indice)
+            imagen = self._controles[inicio]
+            recetas = self.historial[inicio:indice]
+            generacion = self._generacion
+
+        def reproducir():
+            resultado = imagen
+            for i, receta in enumerate(recetas, inicio):
+                resultado = self._aplicar(resultado, receta)
+                if (i + 1) % self.intervalo_control == 0:
+                    with self._cerrojo:
+                        self._guardar_control(i + 1, resultado, generacion)
+            return resultado
+        return reproducir
+
+    @staticmethod
+    def _aplicar(imagen, receta):
+        nombre, parametros = receta
+        datos = pipeline.ejecutar_paso(imagen.datos, nombre, parametros)
+        return imagen.aplicar(registro.obtener(nombre), parametros, datos)
+
+    def memoria_usada(self):
+        with self._cerrojo:
+            return sum(img.nbytes for img in self._controles.values())
+
+    def guardar_estado(self, imagen_nueva, receta=None):
+        """Llama a esto ANTES de modificar la imagen actual, con la receta del paso a aplicar"""
+        if imagen_nueva is None: return
+        if receta is None:
+            raise ValueError("El historial por recetas necesita la receta de cada paso.")
+
+        indice = len(self.historial)
+        with self._cerrojo:
+            self._generacion += 1
+            # Los controles posteriores pertenecían al futuro que se descarta
+            for i in [i for i in self._controles if i > indice]:
+                del self._controles[i]
+            if indice % self.intervalo_control == 0:
+                self._guardar_control(indice, imagen_nueva)
+
+        self.historial.append(receta)
+        self.rehacer_stack.clear()
+
+    def reemplazar_ultimo(self, receta):
+        """El último paso se recalculó con otros parámetros sobre la misma entrada"""
+        with self._cerrojo:
+            self._generacion += 1
+            # Los controles que reproducían el paso viejo ya no valen
+            for i in [i for i in self._controles if i >= len(self.historial)]:
+                del self._controles[i]
+        self.historial[-1] = receta
+
+    def deshacer(self, imagen_actual):
+        if not self.historial:
+            return None
+        self.rehacer_stack.append(self.historial.pop())
+        return self._estado(len(self.historial))
+
+    def rehacer(self, imagen_actual):
+        if not self.rehacer_stack:
+            return None
+        receta = self.rehacer_stack.pop()
+        self.historial.append(receta)
+        # Rehacer es aplicar un solo paso a la imagen actual
+        if imagen_actual is None:
+            return self._estado(len(self.historial))
+        return lambda: self._aplicar(imagen_actual, receta)
+
+    def num_estados(self):
+        return len(self.historial) + 1 + len(self.rehacer_stack)
+
+    def estados(self, imagen_actual):
+        """Todos los estados en orden, reproduciendo las recetas desde la base (sobre una copia)"""
+        historial, futuro = list(self.historial), list(self.rehacer_stack)
+        with self._cerrojo:
+            base = self._controles.get(0)
+
+        def generar():
+            imagen = base
+            for receta in historial:
+                yield imagen
+                imagen = self._aplicar(imagen, receta)
+            yield imagen
+            for receta in reversed(futuro):
+                imagen = self._aplicar(imagen, receta)
+                yield imagen
+        return generar()
+
+    def exportar_pipeline(self, ruta):
+        """Escribe las recetas como un archivo de pipeline que lote.py puede ejecutar"""
+        pipeline.guardar_pipeline(ruta, self.historial)
 
-    def reiniciar(self):
+    def reiniciar(self, imagen_base=None):
         self.historial.clear()
         self.rehacer_stack.clear()
+        with self._cerrojo:
+            self._generacion += 1
+            self._controles = {0: imagen_base} if imagen_base is not None else {}
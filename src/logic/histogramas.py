@@ -0,0 +1,81 @@
+"""
+Motor de histogramas.
+
+Calcula los histogramas de todos los canales (256 niveles) con cv2.calcHist,
+sin pasar por Matplotlib, y los guarda mientras viva la imagen: los arrays
+no se modifican en el sitio, así que cada array es una versión distinta.
+Tras una operación puntual el histograma nuevo se obtiene reasignando los
+niveles del anterior a través de la LUT, sin volver a recorrer los píxeles.
+"""
+import cv2
+import numpy as np
+
+from src.logic.por_imagen import CachePorImagen
+
+_cache = CachePorImagen()
+
+
+def calcular(imagen):
+    """Histogramas de cada canal en una pasada por canal: array (canales, 256)"""
+    canales = imagen.shape[2] if imagen.ndim == 3 else 1
+    if imagen.dtype != np.uint8:
+        imagen = cv2.convertScaleAbs(imagen)
+    hist = np.empty((canales, 256), np.float64)
+    for c in range(canales):
+        hist[c] = cv2.calcHist([imagen], [c], None, [256], [0, 256]).ravel()
+    return hist
+
+
+def aproximar(imagen, paso):
+    """
+    Histograma sobre una submuestra (1 de cada 'paso' filas y columnas),
+    escalado al número de píxeles de la imagen completa. paso=1 es exacto.
+    """
+    if paso <= 1 or min(imagen.shape[:2]) < paso or _cache.obtener(imagen) is not None:
+        return obtener(imagen)  # El exacto ya guardado sale gratis
+    # INTER_NEAREST toma una de cada 'paso' muestras y deja el resultado
+    # contiguo (calcHist es mucho más lento sobre vistas con saltos)
+    muestra = cv2.resize(imagen, None, fx=1 / paso, fy=1 / paso, interpolation=cv2.INTER_NEAREST)
+    return calcular(muestra) * (imagen.shape[0] * imagen.shape[1] / (muestra.shape[0] * muestra.shape[1]))
+
+
+def registrar(imagen, hist):
+    """Asocia un histograma ya conocido a la imagen"""
+    hist.setflags(write=False)
+    _cache.guardar(imagen, hist)
+
+
+def obtener(imagen):
+    """Histograma de la imagen (calculado solo la primera vez)"""
+    hist = _cache.obtener(imagen)
+    if hist is None:
+        hist = calcular(imagen)
+        registrar(imagen, hist)
+    return hist
+
+
+def remapear(hist, lut):
+    """
+    Histograma tras aplicar una LUT de pipeline.construir_lut: cada nivel de
+    entrada suma su cuenta en el nivel de salida que le asigna la LUT.
+    Con entrada gris y LUT de color (mapas), el único histograma se reparte
+    en cada canal de salida.
+    """
+    lut = lut.reshape(256, -1)
+    resultado = np.empty((lut.shape[1], 256), np.float64)
+    for c in range(lut.shape[1]):
+        origen = hist[c] if len(hist) == lut.shape[1] else hist[0]
+        resultado[c] = np.bincount(lut[:, c], weights=origen, minlength=256)
+    return resultado
+
+
+def propagar(entrada, resultado, lut):
+    """
+    Registra el histograma de 'resultado' a partir del de 'entrada' si este ya
+    estaba calculado. Retorna True si se pudo evitar el recálculo.
+    """
+    hist = _cache.obtener(entrada)
+    if hist is None:
+        return False
+    registrar(resultado, remapear(hist, lut))
+    return True
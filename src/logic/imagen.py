@@ -0,0 +1,44 @@
+"""
+Contenedor de imagen: el array junto con su modelo de color, para que el
+modelo viaje con los píxeles (historial, visores, histogramas) en lugar de
+llevarse aparte.
+
+Es solo ese par. No lleva número de versión, hash ni productos derivados:
+los arrays no se modifican en el sitio, así que el propio array ya es la
+versión, y grises, histograma, pirámide y hash se guardan una vez por array
+en las cachés de cada módulo (src/logic/por_imagen.py), que también usan
+las funciones de src/logic que solo reciben el array. Esas funciones siguen
+distinguiendo gris y color por imagen.ndim.
+"""
+
+
+def modelo_tras(op, parametros, datos, modelo_anterior):
+    """Modelo de color de 'datos', resultado de aplicar 'op' a una imagen en 'modelo_anterior'"""
+    modelo = op.modelo_salida(tuple(parametros))
+    if modelo is not None:
+        return modelo
+    if datos.ndim == 2:
+        return "GRAY"
+    if modelo_anterior == "GRAY":
+        return "RGB"  # Gris -> color (mapas de color, etiquetas...)
+    return modelo_anterior
+
+
+class Imagen:
+    __slots__ = ("datos", "modelo")
+
+    def __init__(self, datos, modelo=None):
+        self.datos = datos
+        self.modelo = modelo or ("GRAY" if datos.ndim == 2 else "RGB")
+
+    def __repr__(self):
+        return f"Imagen({self.modelo}, {self.datos.shape}, {self.datos.dtype})"
+
+    @property
+    def nbytes(self):
+        return self.datos.nbytes
+
+    def aplicar(self, op, parametros, datos):
+        """Nueva versión con 'datos', el resultado de aplicar 'op' a esta imagen"""
+        return Imagen(datos, modelo_tras(op, parametros, datos, self.modelo))
+
@@ -0,0 +1,211 @@
+"""
+Instrumentación de operaciones.
+
+Cada llamada medida registra un evento con tiempo real y de CPU (del hilo
+que llama: no incluye los hilos internos de OpenCV), forma, tipo y bytes de
+la entrada y la salida. Se guardan los últimos eventos de la sesión (para
+exportarlos como traza de Chrome, que se abre en chrome://tracing o
+https://ui.perfetto.dev) y una ventana de los últimos tiempos de cada
+operación para las estadísticas.
+
+Bajo demanda, una llamada se puede perfilar con cProfile (tiempo por
+función) o tracemalloc (memoria pico y dónde se reservó). tracemalloc es
+global al proceso: las llamadas con perfil de memoria se hacen de una en
+una, y lo que reserven otros hilos mientras tanto también cuenta.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+import numpy as np
+
+MAX_EVENTOS = 10000      # Eventos guardados para la traza
+VENTANA_ESTADISTICAS = 200  # Tiempos por operación para mediana/p95
+MODOS_PERFIL = ("cprofile", "memoria")
+
+# Un solo perfil de memoria a la vez: otro start()/stop() falsearía el pico
+_cerrojo_memoria = threading.Lock()
+
+
+def _describir(valor):
+    """(forma, tipo, bytes) de un array, o None"""
+    if isinstance(valor, np.ndarray):
+        return list(valor.shape), valor.dtype.str, valor.nbytes
+    return None
+
+
+class Instrumentacion:
+    def __init__(self, max_eventos=MAX_EVENTOS, ventana=VENTANA_ESTADISTICAS):
+        self.eventos = deque(maxlen=max_eventos)
+        self.ventana = ventana
+        self._tiempos = defaultdict(lambda: deque(maxlen=self.ventana))  # nombre -> duraciones (ms)
+        self._llamadas = defaultdict(int)
+        self._desde_cache = defaultdict(int)
+        self._errores = defaultdict(int)
+        self._cerrojo = threading.Lock()
+
+    # --- Medición ---
+
+    def medir(self, nombre, funcion, *args, anotar=None, perfil=None):
+        """
+        Ejecuta funcion(*args) y retorna (resultado, evento). 'anotar' es una
+        función sin argumentos que se llama después en el mismo hilo y cuyo
+        diccionario se añade al evento (ej. si el resultado vino de la caché).
+        Con perfil ('cprofile' o 'memoria') el informe queda en evento["perfil"].
+        """
+        if perfil is not None and perfil not in MODOS_PERFIL:
+            raise ValueError(f"Modo de perfilado desconocido: {perfil}")
+        entrada = next((_describir(a) for a in args if isinstance(a, np.ndarray)), None)
+
+        perfilador = cProfile.Profile() if perfil == "cprofile" else None
+        if perfil == "memoria":
+            _cerrojo_memoria.acquire()
+            # Si ya se estaba trazando (PYTHONTRACEMALLOC, benchmarks) no se detiene al final
+            ya_activo = tracemalloc.is_tracing()
+            if ya_activo:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+        inicio = time.perf_counter()
+        inicio_cpu = time.thread_time()
+        error = None
+        resultado = None
+        try:
+            if perfilador is not None:
+                resultado = perfilador.runcall(funcion, *args)
+            else:
+                resultado = funcion(*args)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            fin = time.perf_counter()
+            fin_cpu = time.thread_time()
+            evento = {
+                "nombre": nombre,
+                "inicio": inicio,
+                "duracion_ms": (fin - inicio) * 1000,
+                "cpu_ms": (fin_cpu - inicio_cpu) * 1000,
+                "entrada": entrada,
+                "salida": _describir(resultado),
+                "pid": os.getpid(),
+                "hilo": threading.get_native_id(),
+            }
+            if error is not None:
+                evento["error"] = error
+            if perfil == "memoria":
+                try:
+                    evento["perfil"] = self._informe_memoria()
+                    evento["memoria_pico"] = tracemalloc.get_traced_memory()[1]
+                finally:
+                    if not ya_activo:
+                        tracemalloc.stop()
+                    _cerrojo_memoria.release()
+            elif perfilador is not None:
+                evento["perfil"] = self._informe_cprofile(perfilador)
+            if anotar is not None and error is None:
+                evento.update(anotar())
+            self.agregar((evento,))
+        return resultado, evento
+
+    @staticmethod
+    def _informe_cprofile(perfilador, lineas=30):
+        texto = io.StringIO()
+        pstats.Stats(perfilador, stream=texto).sort_stats("cumulative").print_stats(lineas)
+        return texto.getvalue()
+
+    @staticmethod
+    def _informe_memoria(lineas=20):
+        actual, pico = tracemalloc.get_traced_memory()
+        texto = [f"Memoria pico: {pico / (1024 * 1024):.2f} MB (al terminar: {actual / (1024 * 1024):.2f} MB)", ""]
+        for estadistica in tracemalloc.take_snapshot().statistics("lineno")[:lineas]:
+            texto.append(str(estadistica))
+        return "\n".join(texto)
+
+    def agregar(self, eventos):
+        """Incorpora eventos (propios o medidos en otro proceso)"""
+        with self._cerrojo:
+            for evento in eventos:
+                nombre = evento["nombre"]
+                self.eventos.append(evento)
+                self._llamadas[nombre] += 1
+                if "error" in evento:
+                    self._errores[nombre] += 1
+                elif evento.get("cache"):
+                    self._desde_cache[nombre] += 1  # No es tiempo de la operación
+                else:
+                    self._tiempos[nombre].append(evento["duracion_ms"])
+
+    def limpiar(self):
+        with self._cerrojo:
+            self.eventos.clear()
+            self._tiempos.clear()
+            self._llamadas.clear()
+            self._desde_cache.clear()
+            self._errores.clear()
+
+    # --- Consulta ---
+
+    def estadisticas(self):
+        """Por operación: llamadas, aciertos de caché, errores y tiempos recientes (ms)"""
+        with self._cerrojo:
+            filas = []
+            for nombre, llamadas in self._llamadas.items():
+                tiempos = np.array(self._tiempos.get(nombre, ()), dtype=np.float64)
+                fila = {
+                    "nombre": nombre,
+                    "llamadas": llamadas,
+                    "cache": self._desde_cache[nombre],
+                    "errores": self._errores[nombre],
+                    "media_ms": None, "mediana_ms": None, "p95_ms": None, "max_ms": None, "total_ms": 0.0,
+                }
+                if len(tiempos):
+                    fila.update(media_ms=float(tiempos.mean()), mediana_ms=float(np.median(tiempos)),
+                                p95_ms=float(np.percentile(tiempos, 95)), max_ms=float(tiempos.max()),
+                                total_ms=float(tiempos.sum()))
+                filas.append(fila)
+        return sorted(filas, key=lambda f: f["total_ms"], reverse=True)
+
+    def exportar_traza(self, ruta):
+        """Guarda la sesión en formato Trace Event (JSON) de Chrome"""
+        with self._cerrojo:
+            eventos = list(self.eventos)
+        origen = min((e["inicio"] for e in eventos), default=0.0)
+        traza = []
+        for e in eventos:
+            argumentos = {k: v for k, v in e.items()
+                          if k not in ("nombre", "inicio", "duracion_ms", "pid", "hilo", "perfil")}
+            traza.append({
+                "name": e["nombre"],
+                "cat": "operacion",
+                "ph": "X",
+                "ts": (e["inicio"] - origen) * 1e6,
+                "dur": e["duracion_ms"] * 1000,
+                "pid": e["pid"],
+                "tid": e["hilo"],
+                "args": argumentos,
+            })
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": traza, "displayTimeUnit": "ms"}, f)
+        return len(traza)
+
+
+# Instancia de la sesión (interfaz y lotes)
+SESION = Instrumentacion()
+
+
+def formatear(evento):
+    """Resumen de una línea para la barra de estado"""
+    if evento.get("cache"):
+        return f"desde caché ({evento['cache']}) en {evento['duracion_ms']:.1f} ms"
+    texto = f"{evento['duracion_ms']:.1f} ms (CPU {evento['cpu_ms']:.1f} ms)"
+    if evento["salida"] is not None:
+        forma, _, nbytes = evento["salida"]
+        texto += f", {'×'.join(map(str, forma))}, {nbytes / (1024 * 1024):.1f} MB"
+    return texto
@@ -0,0 +1,73 @@
+"""
+Kernels y elementos estructurantes precalculados.
+
+Se construyen una sola vez y se reutilizan (caché LRU por tamaño y forma),
+así que las operaciones no vuelven a reservar memoria para ellos en cada
+llamada. Los arrays son de solo lectura porque se comparten.
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+FORMAS = {
+    "RECT": cv2.MORPH_RECT,
+    "ELIPSE": cv2.MORPH_ELLIPSE,
+    "CRUZ": cv2.MORPH_CROSS,
+}
+
+# A partir de este tamaño las elipses se descomponen en rectángulos. OpenCV ya
+# aplica los rectángulos como dos pasadas 1-D (fila y columna) y la cruz le sale
+# igual de barata, pero la elipse le cuesta O(k²) por píxel.
+KERNEL_MIN_DESCOMPOSICION = 25
+
+
+def _solo_lectura(array):
+    array.setflags(write=False)
+    return array
+
+
+@lru_cache(maxsize=128)
+def elemento_estructurante(kernel_size, forma="RECT"):
+    """Elemento estructurante cuadrado de lado kernel_size ('RECT', 'ELIPSE' o 'CRUZ')"""
+    if forma not in FORMAS:
+        raise ValueError(f"Forma desconocida: {forma}")
+    return _solo_lectura(cv2.getStructuringElement(FORMAS[forma], (kernel_size, kernel_size)))
+
+
+@lru_cache(maxsize=128)
+def descomponer(kernel_size, forma="RECT"):
+    """
+    Descompone el elemento en una unión de rectángulos, cada uno con su ancla
+    (x, y) relativa al centro del elemento original. Como la erosión por una
+    unión es el mínimo de las erosiones (y la dilatación el máximo), el
+    resultado es idéntico pero cada rectángulo cuesta O(k) en lugar de O(k²).
+    Retorna una tupla de (kernel, ancla); ancla (-1, -1) es el centro.
+    """
+    elemento = elemento_estructurante(kernel_size, forma)
+    if forma != "ELIPSE" or kernel_size < KERNEL_MIN_DESCOMPOSICION:
+        return ((elemento, (-1, -1)),)
+
+    # Tramo de columnas ocupado por cada fila (la elipse es convexa por filas)
+    tramos = {}
+    for fila in range(elemento.shape[0]):
+        cols = np.flatnonzero(elemento[fila])
+        if len(cols):
+            tramos.setdefault((cols[0], cols[-1]), []).append(fila)
+
+    # Para cada tramo distinto, el rectángulo cubre todas las filas que lo contienen
+    centro = kernel_size // 2
+    partes = []
+    for (izq, der) in tramos:
+        filas = [f for (a, b), fs in tramos.items() if a <= izq and der <= b for f in fs]
+        arriba, abajo = min(filas), max(filas)
+        rect = np.ones((abajo - arriba + 1, der - izq + 1), np.uint8)
+        partes.append((_solo_lectura(rect), (int(centro - izq), int(centro - arriba))))
+    return tuple(partes)
+
+
+# --- Kernels fijos de los detectores de bordes ---
+PREWITT_X = _solo_lectura(np.array([[1, 0, -1], [1, 0, -1], [1, 0, -1]], dtype=np.float32))
+PREWITT_Y = _solo_lectura(np.array([[1, 1, 1], [0, 0, 0], [-1, -1, -1]], dtype=np.float32))
+ROBERTS_X = _solo_lectura(np.array([[1, 0], [0, -1]], dtype=np.float32))
+ROBERTS_Y = _solo_lectura(np.array([[0, 1], [-1, 0]], dtype=np.float32))
@@ -0,0 +1,255 @@
+"""
+Lectura de imágenes con caché de decodificación.
+
+leer() devuelve lo mismo que cv2.imread(ruta) (BGR) y guarda el resultado en
+una LRU por tamaño en bytes cuya clave es la ruta, la reducción pedida y la
+fecha de modificación del archivo: volver a abrir el mismo archivo (imagen
+secundaria, pipeline, deshacer y reabrir) no vuelve a decodificarlo, y si el
+archivo cambia en disco se lee de nuevo.
+
+Los BMP de 24 bits sin compresión y los TIFF RGB de 8 bits sin compresión
+(en tiras contiguas) grandes no se decodifican: se mapean en memoria y el
+array es una vista del archivo, que se abre al instante y solo se lee al
+tocar cada zona. El archivo no debe sobrescribirse mientras esté abierto.
+
+Con reduccion = 2, 4 u 8 se usa cv2.IMREAD_REDUCED_COLOR_*, que en JPEG
+decodifica directamente a menor resolución (miniaturas rápidas).
+
+Los arrays devueltos son de solo lectura: se comparten entre llamadas.
+"""
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+EXTENSIONES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+LIMITE_BYTES = 256 * 1024 * 1024  # Imágenes decodificadas en memoria (las mapeadas no cuentan)
+MAPEO_MIN_BYTES = 8 * 1024 * 1024  # Por debajo, decodificar es inmediato y más seguro
+
+REDUCCIONES = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# (ruta, reduccion) -> (fecha de modificación, tamaño, imagen); la más reciente al final
+_cache = OrderedDict()
+_bytes = 0
+_cerrojo = threading.Lock()
+
+
+# --- Mapeo en memoria de formatos sin compresión ---
+
+def _mapear_bmp(ruta):
+    with open(ruta, "rb") as f:
+        cabecera = f.read(54)
+    if len(cabecera) < 54 or cabecera[:2] != b"BM":
+        return None
+    inicio, = struct.unpack_from("<I", cabecera, 10)
+    tam_cabecera, ancho, alto, planos, bits, compresion = struct.unpack_from("<IiiHHI", cabecera, 14)
+    if tam_cabecera < 40 or planos != 1 or bits != 24 or compresion != 0 or ancho <= 0 or alto == 0:
+        return None
+
+    filas = abs(alto)
+    paso = (ancho * 3 + 3) // 4 * 4  # Cada fila se rellena hasta múltiplo de 4 bytes
+    datos = np.memmap(ruta, dtype=np.uint8, mode="r", offset=inicio, shape=(filas, paso))
+    imagen = np.asarray(datos[:, :ancho * 3]).reshape(filas, ancho, 3)
+    # Alto positivo: las filas se guardan de abajo hacia arriba
+    return imagen[::-1] if alto > 0 else imagen
+
+
+def _leer_ifd(f, orden):
+    """Etiquetas del primer IFD de un TIFF clásico: {etiqueta: tupla de valores}"""
+    tamanos = {1: "B", 3: "H", 4: "I"}  # BYTE, SHORT, LONG
+    f.seek(4)
+    desplazamiento, = struct.unpack(orden + "I", f.read(4))
+    f.seek(desplazamiento)
+    cantidad, = struct.unpack(orden + "H", f.read(2))
+    entradas = [struct.unpack(orden + "HHI4s", f.read(12)) for _ in range(cantidad)]
+
+    etiquetas = {}
+    for etiqueta, tipo, n, valor in entradas:
+        formato = tamanos.get(tipo)
+        if formato is None:
+            continue
+        tamano = struct.calcsize(formato) * n
+        if tamano > 4:
+            f.seek(struct.unpack(orden + "I", valor)[0])
+            valor = f.read(tamano)
+        etiquetas[etiqueta] = struct.unpack(orden + formato * n, valor[:tamano])
+    return etiquetas
+
+
+def _mapear_tiff(ruta):
+    with open(ruta, "rb") as f:
+        cabecera = f.read(4)
+        if cabecera not in (b"II*\x00", b"MM\x00*"):
+            return None  # BigTIFF u otro formato
+        etiquetas = _leer_ifd(f, "<" if cabecera[:2] == b"II" else ">")
+
+    def valor(etiqueta, defecto=None):
+        return etiquetas.get(etiqueta, (defecto,))
+
+    # Sin compresión, RGB de 8 bits intercalado, sin alfa ni mosaicos ni rotación
+    if (valor(259) != (1,) or valor(262) != (2,) or valor(277) != (3,) or valor(258) != (8, 8, 8)
+            or valor(284, 1) != (1,) or valor(274, 1) != (1,) or 338 in etiquetas or 322 in etiquetas):
+        return None
+    ancho, alto = valor(256)[0], valor(257)[0]
+    inicios, longitudes = valor(273), valor(279)
+    if None in (ancho, alto, inicios[0], longitudes[0]):
+        return None
+    # Las tiras deben ser contiguas para verlas como un solo array
+    if any(inicios[i] + longitudes[i] != inicios[i + 1] for i in range(len(inicios) - 1)):
+        return None
+    if sum(longitudes) < ancho * alto * 3:
+        return None
+
+    datos = np.memmap(ruta, dtype=np.uint8, mode="r", offset=inicios[0], shape=(alto, ancho, 3))
+    return np.asarray(datos)[:, :, ::-1]  # RGB -> BGR como cv2.imread, sin copiar
+
+
+def mapear(ruta):
+    """Vista mapeada en memoria del archivo (como cv2.imread), o None si el formato no lo permite"""
+    extension = os.path.splitext(ruta)[1].lower()
+    try:
+        if extension == ".bmp":
+            return _mapear_bmp(ruta)
+        if extension in (".tif", ".tiff"):
+            return _mapear_tiff(ruta)
+    except (OSError, ValueError, struct.error):
+        pass  # Cabecera inesperada: se decodifica con OpenCV
+    return None
+
+
+# --- Tamaño sin decodificar ---
+
+def _tamano_png(f):
+    cabecera = f.read(24)
+    if cabecera[:8] != b"\x89PNG\r\n\x1a\n" or cabecera[12:16] != b"IHDR":
+        return None
+    ancho, alto = struct.unpack(">II", cabecera[16:24])
+    return alto, ancho
+
+
+def _tamano_jpeg(f):
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        marca = f.read(1)
+        if marca != b"\xff":
+            return None
+        tipo = f.read(1)
+        while tipo == b"\xff":  # Relleno entre segmentos
+            tipo = f.read(1)
+        if not tipo:
+            return None
+        tipo = tipo[0]
+        if 0xD0 <= tipo <= 0xD9 or tipo == 0x01:
+            continue  # Marcas sin longitud
+        longitud, = struct.unpack(">H", f.read(2))
+        # SOF0..SOF15 salvo DHT (C4), JPG (C8) y DAC (CC)
+        if 0xC0 <= tipo <= 0xCF and tipo not in (0xC4, 0xC8, 0xCC):
+            alto, ancho = struct.unpack(">xHH", f.read(5))
+            return alto, ancho
+        f.seek(longitud - 2, os.SEEK_CUR)
+
+
+def _tamano_bmp(f):
+    cabecera = f.read(26)
+    if len(cabecera) < 26 or cabecera[:2] != b"BM":
+        return None
+    ancho, alto = struct.unpack_from("<ii", cabecera, 18)
+    return abs(alto), ancho
+
+
+def _tamano_tiff(f):
+    cabecera = f.read(4)
+    if cabecera not in (b"II*\x00", b"MM\x00*"):
+        return None
+    etiquetas = _leer_ifd(f, "<" if cabecera[:2] == b"II" else ">")
+    if 256 not in etiquetas or 257 not in etiquetas:
+        return None
+    return etiquetas[257][0], etiquetas[256][0]
+
+
+_TAMANOS = {".png": _tamano_png, ".jpg": _tamano_jpeg, ".jpeg": _tamano_jpeg, ".bmp": _tamano_bmp,
+            ".tif": _tamano_tiff, ".tiff": _tamano_tiff}
+
+
+def dimensiones(ruta):
+    """(alto, ancho) leídos de la cabecera, sin decodificar; None si no se reconoce"""
+    leer_tamano = _TAMANOS.get(os.path.splitext(ruta)[1].lower())
+    if leer_tamano is None:
+        return None
+    try:
+        with open(ruta, "rb") as f:
+            return leer_tamano(f)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+# --- Lectura con caché ---
+
+def _decodificar(ruta, reduccion):
+    if reduccion == 1 and os.path.getsize(ruta) >= MAPEO_MIN_BYTES:
+        imagen = mapear(ruta)
+        if imagen is not None:
+            return imagen
+    imagen = cv2.imread(ruta, REDUCCIONES[reduccion])
+    if imagen is None:
+        raise ValueError(f"No se pudo leer la imagen: {ruta}")
+    imagen.setflags(write=False)
+    return imagen
+
+
+def _ocupado(imagen):
+    """Bytes en memoria: las vistas mapeadas no cuentan (sus páginas son del sistema)"""
+    base = imagen
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return 0
+        base = base.base
+    return imagen.nbytes
+
+
+def leer(ruta, reduccion=1, cachear=True):
+    """
+    Imagen BGR del archivo (como cv2.imread), decodificada solo la primera vez.
+    reduccion: 1, 2, 4 u 8. Lanza ValueError si el archivo no se puede leer.
+    """
+    global _bytes
+    if reduccion not in REDUCCIONES:
+        raise ValueError(f"Reducción no válida: {reduccion} (1, 2, 4 u 8)")
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        raise ValueError(f"No se pudo leer la imagen: {ruta}")
+
+    clave = (os.path.abspath(ruta), reduccion)
+    version = (estado.st_mtime_ns, estado.st_size)
+    with _cerrojo:
+        entrada = _cache.get(clave)
+        if entrada is not None and entrada[:2] == version:
+            _cache.move_to_end(clave)
+            return entrada[2]
+
+    imagen = _decodificar(ruta, reduccion)
+    if not cachear:
+        return imagen
+
+    with _cerrojo:
+        anterior = _cache.pop(clave, None)
+        if anterior is not None:
+            _bytes -= _ocupado(anterior[2])
+        _cache[clave] = (*version, imagen)
+        _bytes += _ocupado(imagen)
+        while _bytes > LIMITE_BYTES and len(_cache) > 1:
+            _, (_, _, vieja) = _cache.popitem(last=False)
+            _bytes -= _ocupado(vieja)
+    return imagen
+
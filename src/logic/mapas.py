@@ -2,6 +2,8 @@ import cv2
 import numpy as np
 from matplotlib.colors import LinearSegmentedColormap
 
+from src.logic import colores
+
 # --- UTILIDADES PARA CREAR LOS MAPAS ---
 def crear_lut_desde_matplotlib(cmap_name, colors_list):
     """Crea una Lookup Table (LUT) de 256 colores compatible con OpenCV"""
@@ -61,10 +63,7 @@ def aplicar_mapa_color(imagen, nombre_mapa):
     if imagen is None: return None
     
     # Aseguramos que trabajamos sobre una imagen de intensidad (Grises)
-    if len(imagen.shape) == 3:
-        gris = cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
-    else:
-        gris = imagen
+    gris = colores.gris(imagen)
 
     # Mapas estándar de OpenCV
     if nombre_mapa == "JET":
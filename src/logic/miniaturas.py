@@ -0,0 +1,103 @@
+"""
+Índice persistente de miniaturas.
+
+Las miniaturas se guardan en una base SQLite (normalmente
+salidas/.miniaturas.sqlite) como JPEG pequeños, con la ruta, la fecha de
+modificación y el tamaño del archivo: mientras el archivo no cambie, volver a
+abrir la carpeta solo lee la base. Las que faltan se generan decodificando a
+resolución reducida (cv2.IMREAD_REDUCED_COLOR_*), sin pasar por la imagen
+completa cuando el formato lo permite (JPEG).
+
+IndiceMiniaturas se puede usar desde varios hilos a la vez.
+"""
+import os
+import sqlite3
+import threading
+
+import cv2
+import numpy as np
+
+from src.logic import lectura
+
+LADO = 128         # Lado mayor de las miniaturas
+CALIDAD_JPEG = 85
+
+
+def listar(carpeta, extensiones=lectura.EXTENSIONES):
+    """Imágenes de la carpeta (rutas completas, en orden alfabético)"""
+    with os.scandir(carpeta) as entradas:
+        return sorted(e.path for e in entradas if e.is_file() and e.name.lower().endswith(extensiones))
+
+
+def generar(ruta, lado=LADO):
+    """Miniatura BGR con lado mayor 'lado', decodificando con la mayor reducción suficiente"""
+    # El tamaño sale de la cabecera: el archivo se decodifica una sola vez
+    tamano = lectura.dimensiones(ruta)
+    reduccion = 1
+    if tamano is not None:
+        reduccion = next((r for r in (8, 4, 2) if max(tamano) // r >= lado), 1)
+    imagen = lectura.leer(ruta, reduccion, cachear=False)
+    alto, ancho = imagen.shape[:2]
+    escala = lado / max(alto, ancho)
+    if escala >= 1:
+        return np.ascontiguousarray(imagen)
+    tamano = (max(1, round(ancho * escala)), max(1, round(alto * escala)))
+    return cv2.resize(imagen, tamano, interpolation=cv2.INTER_AREA)
+
+
+class IndiceMiniaturas:
+    def __init__(self, ruta_db, lado=LADO):
+        self.lado = lado
+        self._cerrojo = threading.Lock()
+        self._conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        with self._cerrojo:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS miniaturas ("
+                " ruta TEXT, lado INTEGER, mtime INTEGER, tamano INTEGER, datos BLOB,"
+                " PRIMARY KEY (ruta, lado))")
+            self._conexion.commit()
+
+    def buscar(self, ruta):
+        """Miniatura guardada si el archivo no cambió desde entonces; si no, None"""
+        estado = os.stat(ruta)
+        with self._cerrojo:
+            fila = self._conexion.execute(
+                "SELECT mtime, tamano, datos FROM miniaturas WHERE ruta = ? AND lado = ?",
+                (os.path.abspath(ruta), self.lado)).fetchone()
+        if fila is None or fila[:2] != (estado.st_mtime_ns, estado.st_size):
+            return None
+        return cv2.imdecode(np.frombuffer(fila[2], np.uint8), cv2.IMREAD_COLOR)
+
+    def guardar(self, ruta, miniatura):
+        estado = os.stat(ruta)
+        ok, datos = cv2.imencode(".jpg", miniatura, [cv2.IMWRITE_JPEG_QUALITY, CALIDAD_JPEG])
+        if not ok:
+            return
+        with self._cerrojo:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO miniaturas VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(ruta), self.lado, estado.st_mtime_ns, estado.st_size, datos.tobytes()))
+            self._conexion.commit()
+
+    def obtener(self, ruta):
+        """Miniatura del archivo: del índice o, si falta o está desactualizada, generada y guardada"""
+        miniatura = self.buscar(ruta)
+        if miniatura is None:
+            miniatura = generar(ruta, self.lado)
+            self.guardar(ruta, miniatura)
+        return miniatura
+
+    def purgar(self):
+        """Elimina las miniaturas de archivos que ya no existen"""
+        with self._cerrojo:
+            rutas = [r for (r,) in self._conexion.execute("SELECT DISTINCT ruta FROM miniaturas")]
+            muertas = [(r,) for r in rutas if not os.path.isfile(r)]
+            self._conexion.executemany("DELETE FROM miniaturas WHERE ruta = ?", muertas)
+            self._conexion.commit()
+        return len(muertas)
+
+    def cerrar(self):
+        with self._cerrojo:
+            self._conexion.close()
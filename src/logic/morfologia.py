@@ -1,50 +1,70 @@
 import cv2
-import numpy as np
+
+from src.logic import colores
+from src.logic import kernels
 
 def convertir_a_grises(imagen):
-    if len(imagen.shape) == 3:
-        return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
-    return imagen
+    return colores.gris(imagen)
+
+def _morfologia(funcion, combinar, img, kernel_size, forma):
+    """
+    Aplica cv2.erode/cv2.dilate con el elemento (cacheado) de la forma pedida.
+    Si el elemento está descompuesto en rectángulos, combina sus resultados
+    con mínimo (erosión) o máximo (dilatación).
+    """
+    partes = kernels.descomponer(kernel_size, forma)
+    kernel, ancla = partes[0]
+    resultado = funcion(img, kernel, anchor=ancla, iterations=1)
+    for kernel, ancla in partes[1:]:
+        combinar(resultado, funcion(img, kernel, anchor=ancla, iterations=1), dst=resultado)
+    return resultado
+
+def _erosionar(img, kernel_size, forma):
+    return _morfologia(cv2.erode, cv2.min, img, kernel_size, forma)
+
+def _dilatar(img, kernel_size, forma):
+    return _morfologia(cv2.dilate, cv2.max, img, kernel_size, forma)
 
 # --- Operaciones Básicas ---
-def erosion(imagen, kernel_size=5):
+def erosion(imagen, kernel_size=5, forma="RECT"):
     img = convertir_a_grises(imagen)
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
-    return cv2.erode(img, kernel, iterations=1)
+    return _erosionar(img, kernel_size, forma)
 
-def dilatacion(imagen, kernel_size=5):
+def dilatacion(imagen, kernel_size=5, forma="RECT"):
     img = convertir_a_grises(imagen)
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
-    return cv2.dilate(img, kernel, iterations=1)
+    return _dilatar(img, kernel_size, forma)
 
 # --- Operaciones Compuestas (Manuales) ---
-def apertura_manual(imagen, kernel_size=5):
+def apertura_manual(imagen, kernel_size=5, forma="RECT"):
     """Erosión seguida de Dilatación (implementación manual)"""
     img = convertir_a_grises(imagen)
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
     # Paso 1: Erosión
-    eroded = cv2.erode(img, kernel, iterations=1)
+    eroded = _erosionar(img, kernel_size, forma)
     # Paso 2: Dilatación
-    return cv2.dilate(eroded, kernel, iterations=1)
+    return _dilatar(eroded, kernel_size, forma)
 
-def cierre_manual(imagen, kernel_size=5):
+def cierre_manual(imagen, kernel_size=5, forma="RECT"):
     """Dilatación seguida de Erosión (implementación manual)"""
     img = convertir_a_grises(imagen)
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
     # Paso 1: Dilatación
-    dilated = cv2.dilate(img, kernel, iterations=1)
+    dilated = _dilatar(img, kernel_size, forma)
     # Paso 2: Erosión
-    return cv2.erode(dilated, kernel, iterations=1)
+    return _erosionar(dilated, kernel_size, forma)
 
 # --- Operaciones EX (OpenCV optimizado) ---
-def apertura_ex(imagen, kernel_size=5):
+def apertura_ex(imagen, kernel_size=5, forma="RECT"):
     """Apertura usando morphologyEx"""
+    if len(kernels.descomponer(kernel_size, forma)) > 1:
+        # morphologyEx no acepta uniones de elementos: mismo resultado por pasos
+        return apertura_manual(imagen, kernel_size, forma)
     img = convertir_a_grises(imagen)
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
+    kernel = kernels.elemento_estructurante(kernel_size, forma)
     return cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel)
 
-def cierre_ex(imagen, kernel_size=5):
+def cierre_ex(imagen, kernel_size=5, forma="RECT"):
     """Cierre usando morphologyEx"""
+    if len(kernels.descomponer(kernel_size, forma)) > 1:
+        return cierre_manual(imagen, kernel_size, forma)
     img = convertir_a_grises(imagen)
-    kernel = np.ones((kernel_size, kernel_size), np.uint8)
+    kernel = kernels.elemento_estructurante(kernel_size, forma)
     return cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel)
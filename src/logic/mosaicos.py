@@ -0,0 +1,100 @@
+"""
+Procesamiento por mosaicos para imágenes más grandes que la RAM.
+
+La imagen de origen se lee por bloques solapados (el solape o "halo" se
+calcula con el radio de cada operación del registro), cada bloque pasa por
+las mismas funciones de src/logic y su zona útil se escribe en un archivo
+.npy mapeado en memoria. La memoria máxima depende del tamaño del mosaico
+y del número de hilos, no del tamaño de la imagen.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from src.logic import lectura
+from src.logic import pipeline
+from src.logic import registro
+
+LADO_MOSAICO = 1024
+
+
+def abrir_origen(ruta):
+    """
+    Abre la imagen de origen sin cargarla entera cuando es posible.
+    Los .npy, los BMP y los TIFF sin compresión se mapean en memoria; el resto
+    de formatos necesita decodificarse completo.
+    """
+    if ruta.lower().endswith(".npy"):
+        return np.load(ruta, mmap_mode="r")
+    img = lectura.mapear(ruta)
+    if img is None:
+        img = lectura.leer(ruta, cachear=False)
+    return img
+
+
+def calcular_halo(pasos):
+    """Suma de los radios de todos los pasos (los errores de borde se acumulan)"""
+    return sum(registro.obtener(nombre).halo(parametros) for nombre, parametros in pasos)
+
+
+def _rejilla(alto, ancho, lado):
+    for y in range(0, alto, lado):
+        for x in range(0, ancho, lado):
+            yield y, min(y + lado, alto), x, min(x + lado, ancho)
+
+
+def procesar_por_mosaicos(origen, pasos, ruta_salida, lado=LADO_MOSAICO, hilos=None, progreso=None):
+    """
+    Aplica el pipeline 'pasos' a 'origen' (ruta o array) mosaico a mosaico y
+    escribe el resultado en 'ruta_salida' (.npy). Retorna el array mapeado.
+    Los mosaicos se procesan en paralelo: OpenCV y NumPy liberan el GIL.
+    """
+    if isinstance(origen, str):
+        origen = abrir_origen(origen)
+
+    halo = calcular_halo(pasos)  # Lanza ValueError si alguna operación no es local
+    alto, ancho = origen.shape[:2]
+
+    def calcular(y0, y1, x0, x1):
+        # Bloque con halo, recortado a los límites de la imagen.
+        # En los bordes reales la propia operación aplica su tratamiento de borde.
+        ya, yb = max(y0 - halo, 0), min(y1 + halo, alto)
+        xa, xb = max(x0 - halo, 0), min(x1 + halo, ancho)
+        bloque = np.ascontiguousarray(origen[ya:yb, xa:xb])
+        resultado = pipeline.ejecutar_pipeline(bloque, pasos)
+        return resultado[y0 - ya:y1 - ya, x0 - xa:x1 - xa]
+
+    def procesar(y0, y1, x0, x1):
+        salida[y0:y1, x0:x1] = calcular(y0, y1, x0, x1)
+
+    mosaicos = list(_rejilla(alto, ancho, lado))
+    # Tipo y canales de salida los decide el pipeline (Sobel da float, etc.):
+    # se toman del primer mosaico, que se escribe antes de repartir el resto
+    primero = calcular(*mosaicos[0])
+    salida = np.lib.format.open_memmap(ruta_salida, mode="w+", dtype=primero.dtype,
+                                       shape=(alto, ancho) + primero.shape[2:])
+    y0, y1, x0, x1 = mosaicos[0]
+    salida[y0:y1, x0:x1] = primero
+    del primero
+    hilos = hilos or os.cpu_count() or 1
+    hechos = 1
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        # Como mucho 2 mosaicos por hilo en vuelo, para acotar la memoria
+        pendientes = set()
+        for mosaico in mosaicos[1:]:
+            if len(pendientes) >= 2 * hilos:
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for f in terminados:
+                    f.result()
+                hechos += len(terminados)
+                if progreso:
+                    progreso(hechos, len(mosaicos))
+            pendientes.add(pool.submit(procesar, *mosaico))
+        for f in pendientes:
+            f.result()
+    if progreso:
+        progreso(len(mosaicos), len(mosaicos))
+
+    salida.flush()
+    return salida
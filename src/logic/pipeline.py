@@ -0,0 +1,253 @@
+import os
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from src.logic import instrumentacion
+from src.logic import lectura
+from src.logic import registro
+
+SEPARADOR_PASOS = "->"
+COMILLAS = '"'
+
+
+def _convertir_valor(texto):
+    """Convierte un parámetro de la especificación a int, float o ruta (str)"""
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return texto
+
+
+def _citar(valor):
+    """
+    Texto de un parámetro. Las rutas con ',', '#', '->', comillas o barras
+    invertidas (o que parecerían números) van entre comillas, con \\ y \"
+    escapados, para que vuelvan a leerse igual.
+    """
+    texto = str(valor)
+    if not isinstance(valor, str):
+        return texto
+    if (any(c in texto for c in ',#"\\') or SEPARADOR_PASOS in texto
+            or texto != texto.strip() or _convertir_valor(texto) != texto):
+        return COMILLAS + texto.replace("\\", "\\\\").replace(COMILLAS, "\\" + COMILLAS) + COMILLAS
+    return texto
+
+
+def _leer_valor(texto):
+    """Operación inversa de _citar"""
+    texto = texto.strip()
+    if not texto.startswith(COMILLAS):
+        return _convertir_valor(texto)
+    if len(texto) < 2 or not texto.endswith(COMILLAS):
+        raise ValueError(f"Comillas sin cerrar: {texto}")
+    valor, escapado = [], False
+    for c in texto[1:-1]:
+        if c == "\\" and not escapado:
+            escapado = True
+            continue
+        valor.append(c)
+        escapado = False
+    return "".join(valor)
+
+
+def _partir(texto, separador):
+    """Como texto.split(separador), pero sin partir dentro de comillas"""
+    partes, inicio = [], 0
+    dentro = escapado = False
+    for i, c in enumerate(texto):
+        if escapado:
+            escapado = False
+        elif dentro and c == "\\":
+            escapado = True
+        elif c == COMILLAS:
+            dentro = not dentro
+        elif not dentro and i >= inicio and texto.startswith(separador, i):
+            partes.append(texto[inicio:i])
+            inicio = i + len(separador)
+    partes.append(texto[inicio:])
+    return partes
+
+
+def parsear_pipeline(spec):
+    """
+    Convierte 'GRAY -> Gaussiano:5 -> Canny -> Apertura EX:3' en una lista
+    de pasos (nombre, parametros). Varios parámetros se separan con coma; las
+    rutas con comas, '#' o '->' van entre comillas ("a,b.png").
+    Los parámetros se validan contra el registro antes de tocar ningún píxel.
+    """
+    pasos = []
+    for texto in _partir(spec, SEPARADOR_PASOS):
+        texto = texto.strip()
+        if not texto:
+            continue
+
+        nombre, _, args = texto.partition(":")
+        try:
+            op = registro.obtener(nombre.strip())
+        except KeyError:
+            raise ValueError(f"Operación desconocida: '{texto}'")
+
+        valores = [_leer_valor(a) for a in _partir(args, ",")] if args.strip() else []
+        pasos.append((op.nombre, op.completar(valores)))
+
+    if not pasos:
+        raise ValueError("El pipeline está vacío.")
+    return pasos
+
+
+def formatear_pipeline(pasos):
+    """Operación inversa de parsear_pipeline: lista de pasos -> especificación de texto"""
+    textos = []
+    for nombre, parametros in pasos:
+        if parametros:
+            nombre += ":" + ",".join(_citar(p) for p in parametros)
+        textos.append(nombre)
+    return f" {SEPARADOR_PASOS} ".join(textos)
+
+
+def cargar_pipeline(ruta):
+    """Lee un archivo de pipeline: un paso por línea, '#' (fuera de comillas) inicia un comentario"""
+    with open(ruta, encoding="utf-8") as f:
+        lineas = [_partir(linea, "#")[0].strip() for linea in f]
+    return parsear_pipeline(SEPARADOR_PASOS.join(l for l in lineas if l))
+
+
+def guardar_pipeline(ruta, pasos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("# Pipeline exportado desde Image Analysis App\n")
+        for nombre, parametros in pasos:
+            f.write(formatear_pipeline([(nombre, parametros)]) + "\n")
+
+
+def planificar(pasos, alto, ancho, canales=3):
+    """
+    Recorre el pipeline sin ejecutarlo: comprueba que existan las imágenes
+    secundarias y estima canales y costo de cada paso.
+    Retorna una lista de (nombre, canales_salida, costo_estimado).
+    """
+    plan = []
+    for nombre, parametros in pasos:
+        op = registro.obtener(nombre)
+        for param, valor in zip(op.parametros, parametros):
+            if param.imagen and not os.path.isfile(valor):
+                raise ValueError(f"No existe la imagen secundaria de '{nombre}': {valor}")
+        canales = op.canales_salida(canales, parametros)
+        plan.append((nombre, canales, op.estimar_costo(alto * ancho, parametros)))
+    return plan
+
+
+def _cargar_secundaria(ruta):
+    # La caché de lectura evita releerla en cada archivo (y la relee si cambia)
+    try:
+        return lectura.leer(ruta)
+    except ValueError:
+        raise ValueError(f"No se pudo leer la imagen secundaria: {ruta}")
+
+
+def ejecutar_paso(imagen, nombre, parametros):
+    """Aplica un único paso llamando directamente a la función de src/logic"""
+    op = registro.obtener(nombre)
+    # Los parámetros de imagen llegan como rutas en los pipelines
+    args = [_cargar_secundaria(valor) if param.imagen and isinstance(valor, str) else valor
+            for param, valor in zip(op.parametros, parametros)]
+    return op.ejecutar(imagen, *args)
+
+
+def _canales(imagen):
+    return imagen.shape[2] if imagen.ndim == 3 else 1
+
+
+@lru_cache(maxsize=256)
+def construir_lut(pasos, canales):
+    """
+    LUT equivalente a una cadena de operaciones puntuales. Se obtiene aplicando
+    las funciones reales a una imagen sonda con los 256 niveles (una fila por
+    nivel, repetido en cada canal), así que el resultado es idéntico bit a bit.
+    Forma (256, 1) o (256, 1, canales_salida).
+    """
+    sonda = np.arange(256, dtype=np.uint8).reshape(256, 1)
+    if canales > 1:
+        sonda = cv2.merge([sonda] * canales)
+    for nombre, parametros in pasos:
+        sonda = ejecutar_paso(sonda, nombre, parametros)
+    sonda.setflags(write=False)  # Compartida entre llamadas
+    return sonda
+
+
+def aplicar_lut(imagen, lut):
+    """Aplica una LUT de construir_lut (una sola pasada sobre la imagen)"""
+    if _canales(imagen) == 1 and lut.ndim == 3:
+        # Gris -> color (mapas de color, modelos): cv2.LUT necesita los mismos canales
+        imagen = cv2.cvtColor(imagen, cv2.COLOR_GRAY2BGR)
+    return cv2.LUT(imagen, lut)
+
+
+class PipelinePerezoso:
+    """
+    Pipeline diferido: aplicar() solo anota el paso y resultado() evalúa.
+    Las operaciones puntuales consecutivas (aritméticas con escalar,
+    inversión, NOT, mapas de color...) se fusionan en una única LUT sobre
+    imágenes uint8, sin imágenes intermedias; el resto se ejecuta tal cual.
+    """
+    def __init__(self, imagen, pasos=()):
+        self.imagen = imagen
+        self.pasos = list(pasos)
+
+    def aplicar(self, nombre, *parametros):
+        op = registro.obtener(nombre)
+        self.pasos.append((op.nombre, op.completar(parametros)))
+        return self
+
+    def __len__(self):
+        return len(self.pasos)
+
+    def segmentos(self):
+        """
+        Agrupa los pasos en ('lut', pasos) y ('paso', (nombre, parametros)),
+        siguiendo el número de canales a lo largo del pipeline.
+        """
+        canales = _canales(self.imagen)
+        fusionar = self.imagen.dtype == np.uint8
+        segmentos, actual = [], []
+        for nombre, parametros in self.pasos:
+            op = registro.obtener(nombre)
+            if fusionar and op.fusionable(canales):
+                actual.append((nombre, parametros))
+            else:
+                if actual:
+                    segmentos.append(("lut", tuple(actual)))
+                    actual = []
+                segmentos.append(("paso", (nombre, parametros)))
+            canales = op.canales_salida(canales, parametros)
+        if actual:
+            segmentos.append(("lut", tuple(actual)))
+        return segmentos
+
+    def resultado(self):
+        """Evalúa el pipeline; cada segmento queda medido en la instrumentación de la sesión"""
+        medir = instrumentacion.SESION.medir
+        imagen = self.imagen
+        for tipo, contenido in self.segmentos():
+            if tipo == "lut" and imagen.dtype == np.uint8:
+                nombre = "LUT: " + " -> ".join(n for n, _ in contenido)
+                imagen, _ = medir(nombre, _aplicar_segmento, imagen, contenido)
+            elif tipo == "lut":
+                # Un paso anterior cambió el tipo de dato: sin LUT posible
+                for nombre, parametros in contenido:
+                    imagen, _ = medir(nombre, ejecutar_paso, imagen, nombre, parametros)
+            else:
+                imagen, _ = medir(contenido[0], ejecutar_paso, imagen, *contenido)
+        return imagen
+
+
+def _aplicar_segmento(imagen, pasos):
+    return aplicar_lut(imagen, construir_lut(pasos, _canales(imagen)))
+
+
+def ejecutar_pipeline(imagen, pasos):
+    """Aplica todos los pasos (fusionando los puntuales) y retorna la imagen final"""
+    return PipelinePerezoso(imagen, pasos).resultado()
@@ -0,0 +1,66 @@
+"""
+Pirámide de resoluciones para visualizar imágenes grandes.
+
+Cada nivel es la mitad del anterior (cv2.resize con INTER_AREA) y se genera
+solo cuando se pide. Las pirámides se guardan mientras vive la imagen: los
+arrays no se modifican en el sitio, así que cada array es una versión.
+Una misma pirámide se puede usar desde varios hilos a la vez.
+"""
+import threading
+import weakref
+
+import cv2
+
+from src.logic.por_imagen import CachePorImagen
+
+_cache = CachePorImagen()
+
+
+class Piramide:
+    def __init__(self, imagen):
+        # El nivel 0 es la propia imagen: referencia débil para que la caché
+        # no la mantenga viva
+        self._base = weakref.ref(imagen)
+        self.alto, self.ancho = imagen.shape[:2]
+        self.niveles = [None]
+        self._cerrojo = threading.Lock()
+
+    def nivel(self, indice):
+        """Nivel 'indice' (0 = resolución completa), generando los que falten"""
+        if indice == 0:
+            return self._base()
+        if indice < len(self.niveles):
+            return self.niveles[indice]  # Ya generado: sin esperar al cerrojo
+        with self._cerrojo:
+            # Otro hilo pudo generarlo mientras se esperaba
+            while len(self.niveles) <= indice:
+                anterior = self.niveles[-1] if len(self.niveles) > 1 else self._base()
+                alto, ancho = anterior.shape[:2]
+                if alto < 2 or ancho < 2:
+                    return anterior  # No se puede reducir más
+                self.niveles.append(cv2.resize(anterior, (ancho // 2, alto // 2), interpolation=cv2.INTER_AREA))
+            return self.niveles[indice]
+
+    def indice_para(self, escala):
+        """Nivel más pequeño que sigue teniendo al menos la resolución pedida"""
+        indice = 0
+        while escala <= 0.5 / (2 ** indice) and min(self.alto, self.ancho) >> (indice + 1) >= 1:
+            indice += 1
+        return indice
+
+    def reducir(self, ancho, alto):
+        """Imagen de ancho x alto (<= original) a partir del nivel más cercano"""
+        escala = max(ancho / self.ancho, alto / self.alto)
+        base = self.nivel(self.indice_para(escala))
+        if base.shape[1] == ancho and base.shape[0] == alto:
+            return base
+        return cv2.resize(base, (ancho, alto), interpolation=cv2.INTER_AREA)
+
+
+def obtener(imagen):
+    """Pirámide de la imagen (se crea la primera vez)"""
+    piramide = _cache.obtener(imagen)
+    if piramide is None:
+        # Si otro hilo la creó a la vez, todos usan la misma
+        piramide = _cache.guardar(imagen, Piramide(imagen), reemplazar=False)
+    return piramide
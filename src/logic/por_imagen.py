@@ -0,0 +1,80 @@
+"""
+Caché de valores calculados a partir de un array, mientras el array viva.
+
+Los arrays no se modifican en el sitio, así que cada array es una versión:
+su histograma, sus conversiones de color, su hash o su pirámide se guardan
+con clave id(array) y una referencia débil que comprueba que el id no se ha
+reutilizado. No se usan callbacks de weakref (el recolector puede correr en
+cualquier hilo): las entradas de arrays ya liberados se purgan al guardar.
+
+Con limite_bytes se descartan primero las entradas usadas hace más tiempo.
+Se puede usar desde varios hilos a la vez.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class CachePorImagen:
+    """
+    limite_bytes: None = sin límite (las entradas duran lo que su array).
+    tamano(valor): bytes que ocupa un valor; por defecto valor.nbytes.
+    """
+    def __init__(self, limite_bytes=None, tamano=None):
+        self.limite_bytes = limite_bytes
+        self._tamano = tamano or (lambda valor: valor.nbytes)
+        # id(array) -> (referencia débil, valor, bytes); la más reciente al final
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._cerrojo = threading.Lock()
+
+    def obtener(self, imagen):
+        """Valor guardado para la imagen, o None"""
+        with self._cerrojo:
+            entrada = self._entradas.get(id(imagen))
+            if entrada is None or entrada[0]() is not imagen:
+                return None
+            self._entradas.move_to_end(id(imagen))
+            return entrada[1]
+
+    def guardar(self, imagen, valor, reemplazar=True):
+        """
+        Asocia el valor a la imagen y lo retorna. Con reemplazar=False, si
+        otro hilo ya guardó uno, se retorna ese. Los arrays que no admiten
+        referencias débiles no se guardan.
+        """
+        try:
+            ref = weakref.ref(imagen)
+        except TypeError:
+            return valor
+        ident = id(imagen)
+        with self._cerrojo:
+            self._purgar()
+            entrada = self._entradas.get(ident)
+            if entrada is not None and not reemplazar:
+                self._entradas.move_to_end(ident)
+                return entrada[1]
+            self._quitar(ident)
+            tamano = self._tamano(valor) if self.limite_bytes is not None else 0
+            self._entradas[ident] = (ref, valor, tamano)
+            self._bytes += tamano
+            while self.limite_bytes is not None and self._bytes > self.limite_bytes and len(self._entradas) > 1:
+                self._quitar(next(iter(self._entradas)))
+        return valor
+
+    def limpiar(self):
+        with self._cerrojo:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _quitar(self, ident):
+        entrada = self._entradas.pop(ident, None)
+        if entrada is not None:
+            self._bytes -= entrada[2]
+
+    def _purgar(self):
+        for muerta in [i for i, (ref, _, _) in self._entradas.items() if ref() is None]:
+            self._quitar(muerta)
@@ -0,0 +1,53 @@
+"""
+Vista previa a resolución reducida.
+
+Las operaciones se prueban primero sobre una copia reducida (proxy) de la
+imagen para dar una respuesta inmediata; el cálculo a resolución completa
+se hace después. Los tamaños de kernel se escalan con el proxy para que el
+resultado se parezca al final (un Gaussiano de 15 px sobre 6000 px equivale
+a uno de ~3 px sobre 1200 px).
+"""
+from src.logic import piramide
+from src.logic import registro
+
+LADO_PROXY = 1280                  # Lado mayor del proxy
+MIN_MEGAPIXELES = 4                # Por debajo no compensa: se calcula directamente
+CATEGORIAS = {"Filtros", "Morfologías", "Mapas Color"}
+
+
+def aplica(op, imagen):
+    """La operación admite vista previa y la imagen es lo bastante grande"""
+    alto, ancho = imagen.shape[:2]
+    return op.categoria in CATEGORIAS and alto * ancho > MIN_MEGAPIXELES * 1_000_000
+
+
+def factor_proxy(imagen, lado=LADO_PROXY):
+    return min(1.0, lado / max(imagen.shape[:2]))
+
+
+def reducir(imagen, factor):
+    """Proxy de la imagen a partir de su pirámide (INTER_AREA)"""
+    alto, ancho = imagen.shape[:2]
+    return piramide.obtener(imagen).reducir(max(1, round(ancho * factor)), max(1, round(alto * factor)))
+
+
+def escalar_parametros(op, parametros, factor):
+    """Escala los parámetros espaciales conservando la paridad del kernel"""
+    escalados = []
+    for param, valor in zip(op.parametros, parametros):
+        if param.espacial:
+            nuevo = max(1, round(valor * factor))
+            if valor % 2 == 1 and nuevo % 2 == 0:
+                nuevo += 1  # Un kernel impar sigue centrado
+            if param.minimo is not None:
+                nuevo = max(nuevo, param.minimo)
+            valor = nuevo
+        escalados.append(valor)
+    return tuple(escalados)
+
+
+def vista_previa(nombre, imagen, parametros, lado=LADO_PROXY):
+    """Resultado aproximado de la operación sobre el proxy de la imagen"""
+    op = registro.obtener(nombre)
+    factor = factor_proxy(imagen, lado)
+    return op.ejecutar(reducir(imagen, factor), *escalar_parametros(op, parametros, factor))
@@ -0,0 +1,114 @@
+"""
+Filtros de rango (máximo, mínimo y mediana) con kernel cuadrado.
+
+Máximo y mínimo dan exactamente lo mismo que scipy.ndimage.maximum_filter /
+minimum_filter (modo 'reflect', ventana desplazada hacia arriba/izquierda
+con k par). Se separan en una pasada por filas y otra por columnas con el
+algoritmo de van Herk/Gil-Werman: la línea se parte en bloques de k, se
+calculan el máximo acumulado de cada bloque hacia delante y hacia atrás, y
+cada ventana es el máximo de dos de esos valores. Son tres operaciones por
+píxel y pasada, sea cual sea k, vectorizadas con NumPy.
+
+Con kernels pequeños cv2.dilate/cv2.erode (SIMD, costo lineal en k) siguen
+siendo más rápidos; se usan mientras k no pase del umbral medido para cada
+tamaño de dato (python -m benchmarks.rango), así que el costo nunca supera
+al de van Herk/Gil-Werman.
+
+La mediana usa cv2.medianBlur, que para uint8 es de costo constante con
+cualquier k impar (histogramas por columna de Perreault-Hébert). Los tipos
+que medianBlur no admite pasan por scipy.ndimage.median_filter.
+"""
+import cv2
+import numpy as np
+import scipy.ndimage as ndimage
+
+from src.logic import kernels
+
+# Tipos que aceptan cv2.dilate/cv2.erode
+_TIPOS_OPENCV = {np.dtype(t) for t in (np.uint8, np.uint16, np.int16, np.float32, np.float64)}
+_MAX_CANALES_OPENCV = 4
+# Bytes por elemento -> k a partir del cual van Herk/Gil-Werman gana a OpenCV
+_K_MIN_VAN_HERK = {1: 1000, 2: 600, 4: 400, 8: 75}
+# Tipos que acepta cv2.medianBlur con k <= 5 (con k mayor, solo uint8)
+_TIPOS_MEDIANA_PEQUENA = {np.dtype(np.uint16), np.dtype(np.float32)}
+
+
+def _usa_opencv(imagen, k):
+    canales = imagen.shape[2] if imagen.ndim == 3 else 1
+    return (imagen.dtype in _TIPOS_OPENCV and canales <= _MAX_CANALES_OPENCV
+            and k < _K_MIN_VAN_HERK[imagen.dtype.itemsize])
+
+
+def _neutro(dtype, funcion):
+    """Valor que no altera funcion (np.maximum o np.minimum) para este tipo"""
+    if dtype.kind == "b":
+        return funcion is np.minimum
+    if dtype.kind == "f":
+        return -np.inf if funcion is np.maximum else np.inf
+    info = np.iinfo(dtype)
+    return info.min if funcion is np.maximum else info.max
+
+
+def _pasada(imagen, k, funcion):
+    """Máximo/mínimo de k filas consecutivas (eje 0), con borde 'reflect' de SciPy"""
+    n = imagen.shape[0]
+    antes, despues = k // 2, k - 1 - k // 2
+    bloques = -(-(n + k - 1) // k)
+
+    # Línea extendida con el borde reflejado y rellena hasta un múltiplo de k
+    extendida = np.empty((bloques * k,) + imagen.shape[1:], imagen.dtype)
+    if max(antes, despues) <= n:
+        extendida[antes:antes + n] = imagen
+        extendida[:antes] = imagen[antes - 1::-1] if antes else imagen[:0]
+        extendida[antes + n:n + k - 1] = imagen[::-1][:despues]
+    else:  # Kernel mayor que la imagen: el borde se refleja varias veces
+        extendida[:n + k - 1] = np.pad(imagen, [(antes, despues)] + [(0, 0)] * (imagen.ndim - 1), mode="symmetric")
+    extendida[n + k - 1:] = _neutro(imagen.dtype, funcion)
+
+    # Acumulados hacia delante (g) y hacia atrás (h) dentro de cada bloque
+    por_bloques = extendida.reshape((bloques, k) + imagen.shape[1:])
+    g = np.empty_like(por_bloques)
+    h = np.empty_like(por_bloques)
+    funcion.accumulate(por_bloques, axis=1, out=g)
+    funcion.accumulate(por_bloques[:, ::-1], axis=1, out=h[:, ::-1])
+    g = g.reshape(extendida.shape)
+    h = h.reshape(extendida.shape)
+    # La ventana [i, i + k) cruza como mucho un límite de bloque
+    return funcion(h[:n], g[k - 1:k - 1 + n])
+
+
+def van_herk(imagen, k, funcion):
+    """Máximo (np.maximum) o mínimo (np.minimum) k x k de cada canal, con costo independiente de k"""
+    filas = _pasada(imagen, k, funcion)
+    # Las columnas se procesan como filas de la traspuesta (contigua)
+    columnas = _pasada(np.ascontiguousarray(filas.swapaxes(0, 1)), k, funcion)
+    return np.ascontiguousarray(columnas.swapaxes(0, 1))
+
+
+def _rango(imagen, k, funcion_cv, funcion):
+    if k <= 1:
+        return imagen.copy()
+    if _usa_opencv(imagen, k):
+        return funcion_cv(imagen, kernels.elemento_estructurante(k, "RECT"),
+                          anchor=(k // 2, k // 2), borderType=cv2.BORDER_REFLECT)
+    return van_herk(imagen, k, funcion)
+
+
+def maximo(imagen, k):
+    """Máximo en una ventana k x k de cada canal (gris o color)"""
+    return _rango(imagen, k, cv2.dilate, np.maximum)
+
+
+def minimo(imagen, k):
+    """Mínimo en una ventana k x k de cada canal (gris o color)"""
+    return _rango(imagen, k, cv2.erode, np.minimum)
+
+
+def mediana(imagen, k):
+    """Mediana en una ventana k x k de cada canal (k impar)"""
+    canales = imagen.shape[2] if imagen.ndim == 3 else 1
+    if canales in (1, 3, 4) and (imagen.dtype == np.uint8 or (k <= 5 and imagen.dtype in _TIPOS_MEDIANA_PEQUENA)):
+        return cv2.medianBlur(imagen, k)
+    # medianBlur con k > 5 solo admite uint8. 'nearest' es su mismo borde (replicar)
+    tamano = (k, k, 1) if imagen.ndim == 3 else (k, k)
+    return ndimage.median_filter(imagen, size=tamano, mode="nearest")
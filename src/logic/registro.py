@@ -0,0 +1,296 @@
+"""
+Registro central de operaciones.
+
+Cada operación de src/logic se declara una sola vez aquí con su nombre,
+parámetros, canales de entrada/salida y una pista de costo. La interfaz,
+el procesamiento por lotes y el perfilador consultan este registro en
+lugar de despachar con cadenas if/elif.
+"""
+from src.logic import canales
+from src.logic import colores
+from src.logic import filtros
+from src.logic import kernels
+from src.logic import mapas
+from src.logic import morfologia
+from src.logic import operaciones_aritmeticas
+from src.logic import operaciones_logicas
+
+# Tamaños de kernel por defecto (antes KERNEL_STD y KERNEL_FIJO en la interfaz)
+KERNEL_FILTROS = 3
+KERNEL_MORFOLOGIA = 5
+
+
+class Parametro:
+    """Describe un parámetro de una operación"""
+    def __init__(self, nombre, defecto=None, tipo=int, minimo=None, maximo=None,
+                 espacial=False, imagen=False, opciones=None):
+        self.nombre = nombre
+        self.defecto = defecto      # None = obligatorio
+        self.tipo = tipo
+        self.minimo = minimo
+        self.maximo = maximo
+        self.espacial = espacial    # Tamaño de kernel (en píxeles)
+        self.imagen = imagen        # Es una segunda imagen (ruta en los pipelines)
+        self.opciones = opciones    # Valores permitidos (parámetros de texto)
+
+    def validar(self, valor):
+        """Convierte y comprueba el rango. Lanza ValueError si no es válido."""
+        if self.imagen:
+            return valor
+        try:
+            valor = self.tipo(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{self.nombre}' debe ser {self.tipo.__name__}, no {valor!r}")
+        if self.opciones is not None:
+            if valor not in self.opciones:
+                raise ValueError(f"'{self.nombre}' debe ser uno de: {', '.join(self.opciones)}")
+            return valor
+        if self.minimo is not None and valor < self.minimo:
+            raise ValueError(f"'{self.nombre}' debe ser >= {self.minimo}")
+        if self.maximo is not None and valor > self.maximo:
+            raise ValueError(f"'{self.nombre}' debe ser <= {self.maximo}")
+        return valor
+
+
+# Último parámetro de las operaciones con modo por canal
+_MODO_COLOR = (Parametro("modo_color", "GRIS", str, opciones=canales.MODOS),)
+
+
+class Operacion:
+    """
+    Metadatos de una operación registrada.
+    entrada: 'cualquiera' o 'gris' (la función convierte a grises internamente)
+    salida: 'igual' (mismos canales), 'gris' (1 canal) o 'color' (3 canales)
+    costo: pasadas aproximadas por píxel; se multiplica por k**exponente_kernel
+    radio: píxeles de vecindad que lee la operación (entero o función de los
+           parámetros). None si depende de toda la imagen (Otsu, normalización
+           global, histéresis...) y por tanto no se puede procesar por mosaicos.
+    puntual: cada píxel de salida depende solo de ese píxel de entrada.
+             'canales' si cada canal se transforma por separado; 'gris' si
+             mezcla canales (solo es una LUT cuando la entrada es gris).
+             El pipeline fusiona las puntuales seguidas en una única LUT.
+    por_canal: operación en grises que admite el modo "CANALES" (último
+               parámetro, modo_color): una imagen en color se procesa canal
+               a canal y conserva sus canales (ver src/logic/canales).
+    """
+    def __init__(self, nombre, funcion, categoria, fijos=(), parametros=(),
+                 entrada="cualquiera", salida="igual", modelo=None, costo=1.0,
+                 exponente_kernel=0, radio=None, etiqueta=None, grupo=None, variante_imagen=None,
+                 puntual=None, por_canal=False):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.categoria = categoria
+        self.fijos = fijos
+        self.parametros = parametros
+        self.entrada = entrada
+        self.salida = salida
+        self.modelo = modelo                # Modelo de color del resultado (None = sin cambio)
+        self.costo = costo
+        self.exponente_kernel = exponente_kernel
+        self.radio = radio
+        self.etiqueta = etiqueta            # Texto del menú (None = no aparece en menús)
+        self.grupo = grupo                  # Submenú o bloque dentro del menú
+        self.variante_imagen = variante_imagen  # Nombre de la versión con otra imagen
+        self.puntual = puntual
+        self.por_canal = por_canal
+        if por_canal:
+            self.funcion = canales.con_modo(funcion)
+            self.parametros = tuple(parametros) + _MODO_COLOR
+
+    @property
+    def secundaria(self):
+        return any(p.imagen for p in self.parametros)
+
+    def completar(self, valores=()):
+        """Completa con los valores por defecto y valida. Retorna una tupla."""
+        valores = tuple(valores)
+        if len(valores) > len(self.parametros):
+            raise ValueError(f"Demasiados parámetros para '{self.nombre}'")
+
+        resultado = []
+        for i, param in enumerate(self.parametros):
+            valor = valores[i] if i < len(valores) else param.defecto
+            if valor is None:
+                raise ValueError(f"Falta el parámetro '{param.nombre}' para '{self.nombre}'")
+            resultado.append(param.validar(valor))
+        return tuple(resultado)
+
+    def en_canales(self, parametros=()):
+        """Los parámetros piden el modo por canal"""
+        return self.por_canal and len(parametros) == len(self.parametros) and parametros[-1] == "CANALES"
+
+    def canales_salida(self, canales_entrada, parametros=()):
+        if self.en_canales(parametros):
+            return canales_entrada
+        if self.salida == "gris":
+            return 1
+        if self.salida == "color":
+            return 3
+        return canales_entrada
+
+    def modelo_salida(self, parametros=()):
+        """Modelo de color del resultado (None = sin cambio)"""
+        return None if self.en_canales(parametros) else self.modelo
+
+    def estimar_costo(self, pixeles, parametros=()):
+        """Costo relativo (pasadas por píxel * píxeles) para planificar pipelines"""
+        k = 1
+        for param, valor in zip(self.parametros, parametros):
+            if param.espacial:
+                k = valor
+        return self.costo * pixeles * k ** self.exponente_kernel
+
+    def fusionable(self, canales_entrada):
+        """Se puede expresar como LUT sobre una imagen con estos canales"""
+        if self.puntual == "canales":
+            return True
+        return self.puntual == "gris" and canales_entrada == 1
+
+    @property
+    def local(self):
+        return self.radio is not None
+
+    def halo(self, parametros=()):
+        """Margen (en píxeles) que necesita cada mosaico alrededor de su zona útil"""
+        if self.radio is None:
+            raise ValueError(f"'{self.nombre}' depende de toda la imagen; no admite mosaicos")
+        return self.radio(*parametros) if callable(self.radio) else self.radio
+
+    def ejecutar(self, imagen, *parametros):
+        return self.funcion(imagen, *self.fijos, *parametros)
+
+
+REGISTRO = {}
+_NOMBRES = {}  # nombre en minúsculas -> nombre registrado
+
+
+def registrar(operacion):
+    if operacion.nombre in REGISTRO:
+        raise ValueError(f"Operación duplicada: {operacion.nombre}")
+    REGISTRO[operacion.nombre] = operacion
+    _NOMBRES[operacion.nombre.casefold()] = operacion.nombre
+    return operacion
+
+
+def obtener(nombre):
+    """Búsqueda O(1). Acepta el nombre sin distinguir mayúsculas."""
+    op = REGISTRO.get(nombre)
+    if op is None:
+        op = REGISTRO.get(_NOMBRES.get(nombre.casefold(), ""))
+    if op is None:
+        raise KeyError(f"Operación desconocida: '{nombre}'")
+    return op
+
+
+def por_categoria(categoria):
+    """Operaciones de una categoría, en orden de registro"""
+    return [op for op in REGISTRO.values() if op.categoria == categoria]
+
+
+def ejecutar(nombre, imagen, *parametros):
+    return obtener(nombre).ejecutar(imagen, *parametros)
+
+
+# ==========================================
+# DECLARACIÓN DE OPERACIONES
+# ==========================================
+
+def _medio_kernel(k, *_):
+    return k // 2
+
+def _dos_medios_kernel(k, *_):
+    return 2 * (k // 2)  # Dos pasadas (erosión + dilatación)
+
+def _kernel(defecto):
+    return (Parametro("kernel_size", defecto, int, 1, 99, espacial=True),)
+
+_FORMA = (Parametro("forma", "RECT", str, opciones=tuple(kernels.FORMAS)),)
+
+_ESCALAR = (Parametro("valor", None, float, 0, 1000),)
+_IMAGEN = (Parametro("imagen", None, imagen=True),)
+
+# --- Modelos de color ---
+_UMBRAL = (Parametro("umbral", 0, int, 0, 255),)  # 0 = Otsu
+
+for _nombre, _etiqueta, _salida, _costo, _radio, _puntual, _parametros in [
+    ("RGB", "RGB", "color", 0.5, 0, "canales", ()),
+    ("GRAY", "Escala de Grises", "gris", 1.0, 0, "gris", ()),
+    ("BINARY", "Binarizar", "gris", 2.0, None, None, _UMBRAL),  # Otsu usa el histograma de toda la imagen
+    ("HSV", "HSV", "color", 2.0, 0, "gris", ()),
+    ("CMYK", "CMY", "color", 4.0, 0, "gris", ()),  # Sin negro K: ver colores._convertir
+]:
+    registrar(Operacion(_nombre, colores.aplicar_modelo, "Modelos Color", fijos=(_nombre,), parametros=_parametros,
+                        salida=_salida, modelo=_nombre, costo=_costo, radio=_radio, etiqueta=_etiqueta,
+                        puntual=_puntual))
+
+# --- Aritméticas ---
+for _nombre, _etiqueta, _escalar, _imagenes in [
+    ("SUMA", "Suma", operaciones_aritmeticas.suma_escalar, operaciones_aritmeticas.suma_imagenes),
+    ("RESTA", "Resta", operaciones_aritmeticas.resta_escalar, operaciones_aritmeticas.resta_imagenes),
+    ("MULT", "Multiplicación", operaciones_aritmeticas.multiplicacion_escalar, operaciones_aritmeticas.multiplicacion_imagenes),
+    ("DIV", "División", operaciones_aritmeticas.division_escalar, operaciones_aritmeticas.division_imagenes),
+]:
+    registrar(Operacion(_nombre, _escalar, "Aritméticas", parametros=_ESCALAR, radio=0, puntual="canales",
+                        etiqueta=_etiqueta, grupo="Operaciones", variante_imagen=f"{_nombre} IMG"))
+    registrar(Operacion(f"{_nombre} IMG", _imagenes, "Aritméticas", parametros=_IMAGEN, costo=2.0))
+
+registrar(Operacion("INV", operaciones_aritmeticas.inversion_aritmetica, "Aritméticas", radio=0, puntual="canales",
+                    etiqueta="Inversión", grupo="Inversión"))
+
+# --- Lógicas ---
+registrar(Operacion("NOT", operaciones_logicas.operacion_not, "Lógicas", radio=0, puntual="canales",
+                    etiqueta="NOT - Invertir", grupo="Unaria"))
+for _nombre, _etiqueta, _funcion in [
+    ("AND", "AND - Intersección", operaciones_logicas.operacion_and),
+    ("OR", "OR - Unión", operaciones_logicas.operacion_or),
+    ("XOR", "XOR", operaciones_logicas.operacion_xor),
+]:
+    registrar(Operacion(_nombre, _funcion, "Lógicas", parametros=_IMAGEN, costo=2.0,
+                        etiqueta=_etiqueta, grupo="Binarias"))
+
+# --- Mapas de color ---
+for _nombre in ["JET", "HOT", "OCEAN", "BONE", "PINK", "PROPIO 1", "PROPIO 2"]:
+    registrar(Operacion(_nombre, mapas.aplicar_mapa_color, "Mapas Color", fijos=(_nombre,),
+                        entrada="gris", salida="color", modelo="RGB", costo=2.0, radio=0, etiqueta=_nombre,
+                        puntual="gris"))
+
+# --- Morfologías ---
+for _nombre, _funcion, _grupo, _costo, _radio in [
+    ("Erosión", morfologia.erosion, "Básicas", 1.0, _medio_kernel),
+    ("Dilatación", morfologia.dilatacion, "Básicas", 1.0, _medio_kernel),
+    ("Apertura", morfologia.apertura_manual, "Aperturas", 2.0, _dos_medios_kernel),
+    ("Apertura EX", morfologia.apertura_ex, "Aperturas", 2.0, _dos_medios_kernel),
+    ("Cierre", morfologia.cierre_manual, "Cierres", 2.0, _dos_medios_kernel),
+    ("Cierre EX", morfologia.cierre_ex, "Cierres", 2.0, _dos_medios_kernel),
+]:
+    registrar(Operacion(_nombre, _funcion, "Morfologías", parametros=_kernel(KERNEL_MORFOLOGIA) + _FORMA,
+                        entrada="gris", salida="gris", modelo="GRAY", costo=_costo,
+                        exponente_kernel=1, radio=_radio, etiqueta=_nombre, grupo=_grupo, por_canal=True))
+
+# --- Filtros de ruido ---
+for _nombre, _funcion, _entrada, _salida, _modelo, _exponente in [
+    ("Promedio", filtros.filtro_promedio, "cualquiera", "igual", None, 0),
+    ("Mediana", filtros.filtro_mediana, "cualquiera", "igual", None, 1),
+    ("Gaussiano", filtros.filtro_gaussiano, "cualquiera", "igual", None, 1),
+    ("Máximo", filtros.filtro_maximo, "gris", "gris", "GRAY", 0),  # Acotado por van Herk/Gil-Werman
+    ("Mínimo", filtros.filtro_minimo, "gris", "gris", "GRAY", 0),
+]:
+    registrar(Operacion(_nombre, _funcion, "Filtros", parametros=_kernel(KERNEL_FILTROS),
+                        entrada=_entrada, salida=_salida, modelo=_modelo, exponente_kernel=_exponente,
+                        radio=_medio_kernel, etiqueta=_nombre, grupo="Reducción de Ruido",
+                        por_canal=_entrada == "gris"))
+
+# --- Detección de bordes ---
+_UMBRALES_CANNY = (Parametro("umbral_bajo", 100, int, 0, 500), Parametro("umbral_alto", 200, int, 0, 500))
+
+for _nombre, _funcion, _costo, _radio, _parametros in [
+    ("Sobel", filtros.filtro_sobel, 4.0, None, ()),    # Normaliza con el máximo global
+    ("Prewitt", filtros.filtro_prewitt, 3.0, 1, ()),
+    ("Roberts", filtros.filtro_roberts, 3.0, 1, ()),
+    ("Canny", filtros.filtro_canny, 5.0, None, _UMBRALES_CANNY),  # La histéresis propaga bordes sin límite
+    ("Laplaciano", filtros.filtro_laplaciano, 3.0, 1, ()),
+    ("Kirsch", filtros.filtro_kirsch, 10.0, 1, ()),
+]:
+    registrar(Operacion(_nombre, _funcion, "Filtros", parametros=_parametros,
+                        entrada="gris", salida="gris", modelo="GRAY", costo=_costo,
+                        radio=_radio, etiqueta=_nombre, grupo="Detección de Bordes", por_canal=True))
@@ -0,0 +1,121 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class _Senales(QObject):
+    # Se crean en el hilo de la interfaz: al emitirse desde el hilo de trabajo
+    # Qt las entrega en cola, de vuelta en el hilo de la interfaz.
+    terminado = pyqtSignal(int, object)
+    fallido = pyqtSignal(int, str)
+    progreso = pyqtSignal(int, int)
+
+
+class _Trabajo(QRunnable):
+    def __init__(self, id_trabajo, funcion, args, kwargs, senales, cancelado):
+        super().__init__()
+        self.id_trabajo = id_trabajo
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = senales
+        self.cancelado = cancelado
+
+    def run(self):
+        if self.cancelado.is_set():
+            return
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelado.is_set():
+                self.senales.fallido.emit(self.id_trabajo, str(e))
+            return
+        # OpenCV no se puede interrumpir a mitad de cálculo: si se canceló,
+        # simplemente descartamos el resultado
+        if not self.cancelado.is_set():
+            self.senales.terminado.emit(self.id_trabajo, resultado)
+
+
+class EjecutorOperaciones(QObject):
+    """
+    Ejecuta operaciones fuera del hilo de la interfaz.
+    Solo hay un trabajo vigente: enviar uno nuevo cancela (reemplaza) al anterior.
+    """
+    iniciado = pyqtSignal(str)
+    terminado = pyqtSignal(object, object)   # resultado, contexto
+    fallido = pyqtSignal(str, object)        # mensaje, contexto
+    cancelado = pyqtSignal(object)           # contexto
+    progreso = pyqtSignal(int, int)          # hecho, total
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self._senales = _Senales()
+        self._senales.terminado.connect(self._al_terminar)
+        self._senales.fallido.connect(self._al_fallar)
+        self._senales.progreso.connect(self._al_progresar)
+        self._siguiente_id = 0
+        self._id_actual = None
+        self._cancelado = None
+        self._contexto = None
+
+    @property
+    def ocupado(self):
+        return self._id_actual is not None
+
+    def enviar(self, descripcion, funcion, *args, contexto=None, con_progreso=False):
+        """
+        Ejecuta funcion(*args) en segundo plano. Si con_progreso, la función
+        recibe progreso=callback(hecho, total) para informar su avance.
+        """
+        self.cancelar()
+
+        self._siguiente_id += 1
+        self._id_actual = self._siguiente_id
+        self._cancelado = threading.Event()
+        self._contexto = contexto
+
+        kwargs = {}
+        if con_progreso:
+            id_trabajo = self._id_actual
+            kwargs["progreso"] = lambda hecho, total: self._senales.progreso.emit(id_trabajo, hecho * 1000 // max(total, 1))
+
+        self.pool.start(_Trabajo(self._id_actual, funcion, args, kwargs, self._senales, self._cancelado))
+        self.iniciado.emit(descripcion)
+        return self._id_actual
+
+    def cancelar(self):
+        """Cancela el trabajo vigente (su resultado se descartará)"""
+        if self._id_actual is None:
+            return
+        self._cancelado.set()
+        contexto = self._contexto
+        self._limpiar()
+        self.cancelado.emit(contexto)
+
+    def esperar(self, milisegundos=-1):
+        """Bloquea hasta que terminen los hilos (útil al cerrar la aplicación)"""
+        return self.pool.waitForDone(milisegundos)
+
+    def _limpiar(self):
+        self._id_actual = None
+        self._cancelado = None
+        self._contexto = None
+
+    def _al_terminar(self, id_trabajo, resultado):
+        if id_trabajo != self._id_actual:
+            return  # Resultado de un trabajo reemplazado
+        contexto = self._contexto
+        self._limpiar()
+        self.terminado.emit(resultado, contexto)
+
+    def _al_fallar(self, id_trabajo, mensaje):
+        if id_trabajo != self._id_actual:
+            return
+        contexto = self._contexto
+        self._limpiar()
+        self.fallido.emit(mensaje, contexto)
+
+    def _al_progresar(self, id_trabajo, permil):
+        if id_trabajo == self._id_actual:
+            self.progreso.emit(permil, 1000)
@@ -0,0 +1,153 @@
+"""
+Panel con las miniaturas de una carpeta.
+
+La lista se llena al instante con los nombres; las miniaturas se piden solo
+para las que están a la vista (más una pantalla de margen) a medida que se
+desplaza, y salen del índice persistente o se generan en un pool de hilos.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QSize, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtWidgets import (
+    QFileDialog, QHBoxLayout, QLabel, QListView, QListWidget, QListWidgetItem, QPushButton, QVBoxLayout, QWidget
+)
+
+from src.logic import miniaturas
+from src.ui.visualizacion import a_qimage
+
+
+class _Senales(QObject):
+    # Se emite desde los hilos del pool; Qt la entrega en el hilo de la interfaz
+    lista = pyqtSignal(int, str, object)  # generación, ruta, miniatura (None si falló)
+
+
+class PanelMiniaturas(QWidget):
+    """Emite 'abrir' con la ruta al hacer doble clic en una miniatura"""
+    abrir = pyqtSignal(str)
+
+    def __init__(self, indice, parent=None, hilos=None):
+        super().__init__(parent)
+        self.indice = indice
+        self.carpeta = None
+        self._pool = ThreadPoolExecutor(max_workers=hilos or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="miniatura")
+        self._items = {}       # ruta -> item de la lista
+        self._pendientes = {}  # ruta -> Future de la generación vigente
+        self._fallidas = set()  # No se vuelven a pedir hasta cambiar de carpeta
+        self._generacion = 0   # Cambia con la carpeta: descarta resultados viejos
+        self._senales = _Senales()
+        self._senales.lista.connect(self._al_terminar)
+
+        self.lbl_carpeta = QLabel()
+        self.lbl_carpeta.setWordWrap(True)
+        btn_carpeta = QPushButton("Carpeta...")
+        btn_carpeta.clicked.connect(self.elegir_carpeta)
+
+        self.lista = QListWidget()
+        self.lista.setViewMode(QListView.ViewMode.IconMode)
+        self.lista.setIconSize(QSize(indice.lado, indice.lado))
+        self.lista.setGridSize(QSize(indice.lado + 16, indice.lado + 32))
+        self.lista.setResizeMode(QListView.ResizeMode.Adjust)
+        self.lista.setMovement(QListView.Movement.Static)
+        self.lista.setUniformItemSizes(True)
+        self.lista.setLayoutMode(QListView.LayoutMode.Batched)  # Miles de archivos sin bloquear
+        self.lista.itemDoubleClicked.connect(lambda item: self.abrir.emit(item.data(Qt.ItemDataRole.UserRole)))
+
+        # Desplazamientos y cambios de tamaño seguidos se agrupan en una sola petición
+        self._temporizador = QTimer(self)
+        self._temporizador.setSingleShot(True)
+        self._temporizador.setInterval(50)
+        self._temporizador.timeout.connect(self.pedir_visibles)
+        # (sin pasar el valor: QTimer.start(int) lo tomaría como intervalo)
+        self.lista.verticalScrollBar().valueChanged.connect(lambda _: self._temporizador.start())
+
+        cabecera = QHBoxLayout()
+        cabecera.addWidget(self.lbl_carpeta, 1)
+        cabecera.addWidget(btn_carpeta)
+        layout = QVBoxLayout()
+        layout.addLayout(cabecera)
+        layout.addWidget(self.lista)
+        self.setLayout(layout)
+
+    def elegir_carpeta(self):
+        carpeta = QFileDialog.getExistingDirectory(self, "Carpeta de imágenes", self.carpeta or "")
+        if carpeta:
+            self.mostrar_carpeta(carpeta)
+
+    def mostrar_carpeta(self, carpeta):
+        self.cancelar()
+        self.carpeta = carpeta
+        self.lbl_carpeta.setText(carpeta)
+        self.lista.clear()
+        self._items.clear()
+        self._fallidas.clear()
+        for ruta in miniaturas.listar(carpeta):
+            item = QListWidgetItem(os.path.basename(ruta))
+            item.setData(Qt.ItemDataRole.UserRole, ruta)
+            item.setToolTip(ruta)
+            self.lista.addItem(item)
+            self._items[ruta] = item
+        self._temporizador.start()
+
+    def _filas_visibles(self):
+        """Rango de filas a la vista más una pantalla de margen (la rejilla llena por filas)"""
+        if self.lista.count() == 0:
+            return range(0)
+        vista = self.lista.viewport().rect()
+        rejilla = self.lista.gridSize()
+        # Rejilla uniforme: la posición de la barra da la primera fila visible
+        columnas = max(1, vista.width() // rejilla.width())
+        primera = self.lista.verticalScrollBar().value() // rejilla.height() * columnas
+        por_pantalla = columnas * (vista.height() // rejilla.height() + 2)
+        return range(max(primera - por_pantalla, 0), min(primera + 2 * por_pantalla, self.lista.count()))
+
+    def pedir_visibles(self):
+        generacion = self._generacion
+        for fila in self._filas_visibles():
+            item = self.lista.item(fila)
+            ruta = item.data(Qt.ItemDataRole.UserRole)
+            if not item.icon().isNull() or ruta in self._pendientes or ruta in self._fallidas:
+                continue
+            futuro = self._pool.submit(self._obtener, generacion, ruta)
+            self._pendientes[ruta] = futuro
+
+    def _obtener(self, generacion, ruta):
+        """Hilo del pool"""
+        if generacion != self._generacion:
+            return  # La carpeta cambió antes de empezar
+        try:
+            miniatura = self.indice.obtener(ruta)
+        except Exception:
+            miniatura = None  # Cualquier fallo (lectura, OpenCV, SQLite) la marca como fallida
+        self._senales.lista.emit(generacion, ruta, miniatura)
+
+    def _al_terminar(self, generacion, ruta, miniatura):
+        if generacion != self._generacion:
+            return
+        self._pendientes.pop(ruta, None)
+        if miniatura is None:
+            self._fallidas.add(ruta)
+            return
+        self._items[ruta].setIcon(QIcon(QPixmap.fromImage(a_qimage(miniatura))))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._temporizador.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._temporizador.start()
+
+    def cancelar(self):
+        """Descarta las miniaturas pendientes (las que ya están en curso terminan solas)"""
+        self._generacion += 1
+        for futuro in self._pendientes.values():
+            futuro.cancel()
+        self._pendientes.clear()
+
+    def cerrar(self):
+        self.cancelar()
+        self._pool.shutdown(wait=True)
+        self.indice.cerrar()
@@ -0,0 +1,136 @@
+"""
+Panel con controles para los parámetros de la última operación aplicada.
+"""
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QFormLayout, QSlider, QLabel, QComboBox, QHBoxLayout
+
+# Pasos del deslizador por unidad en los parámetros reales (0.1 de precisión)
+DIVISIONES_FLOAT = 10
+# Rango del deslizador cuando el parámetro no tiene máximo
+MAXIMO_POR_DEFECTO = 255
+
+
+class PanelParametros(QWidget):
+    """
+    Mientras se arrastra un deslizador emite 'cambiado' como mucho una vez
+    por intervalo (los valores intermedios se descartan). Al soltarlo, o al
+    cambiar un valor con el teclado o un desplegable, emite 'confirmado'.
+    """
+    cambiado = pyqtSignal(tuple)
+    confirmado = pyqtSignal(tuple)
+
+    def __init__(self, parent=None, intervalo_ms=80):
+        super().__init__(parent)
+        self.op = None
+        self.valores = ()
+        self._controles = []  # (param, control, etiqueta o None)
+
+        self.layout_form = QFormLayout()
+        self.setLayout(self.layout_form)
+        self.lbl_vacio = QLabel("Aplica una operación con parámetros para ajustarla aquí.")
+        self.lbl_vacio.setWordWrap(True)
+        self.layout_form.addRow(self.lbl_vacio)
+
+        self._temporizador = QTimer(self)
+        self._temporizador.setSingleShot(True)
+        self._temporizador.setInterval(intervalo_ms)
+        self._temporizador.timeout.connect(self._emitir_pendiente)
+
+    # --- Construcción ---
+
+    def configurar(self, op, valores):
+        """Muestra los controles de 'op' con los valores aplicados"""
+        self.limpiar()
+        self.op = op
+        self.valores = tuple(valores)
+        for param, valor in zip(op.parametros, valores):
+            if param.imagen:
+                continue
+            if param.opciones is not None:
+                control = QComboBox()
+                control.addItems(param.opciones)
+                control.setCurrentText(valor)
+                control.currentTextChanged.connect(self._confirmar)
+                self.layout_form.addRow(param.nombre, control)
+                self._controles.append((param, control, None))
+                continue
+
+            factor = self._factor(param)
+            control = QSlider(Qt.Orientation.Horizontal)
+            control.setRange(round((param.minimo or 0) * factor),
+                             round((param.maximo if param.maximo is not None else MAXIMO_POR_DEFECTO) * factor))
+            control.setValue(round(valor * factor))
+            etiqueta = QLabel()
+            etiqueta.setMinimumWidth(40)
+            fila = QHBoxLayout()
+            fila.addWidget(control, 1)
+            fila.addWidget(etiqueta)
+            self.layout_form.addRow(param.nombre, fila)
+            self._controles.append((param, control, etiqueta))
+
+            control.valueChanged.connect(self._al_mover)
+            control.sliderReleased.connect(self._confirmar)
+
+        self._refrescar_etiquetas()
+        self.lbl_vacio.setVisible(not self._controles)
+
+    def limpiar(self):
+        self._temporizador.stop()
+        while self.layout_form.rowCount() > 1:
+            self.layout_form.removeRow(1)
+        self._controles = []
+        self.op = None
+        self.valores = ()
+        self.lbl_vacio.show()
+
+    @staticmethod
+    def _factor(param):
+        return DIVISIONES_FLOAT if param.tipo is float else 1
+
+    # --- Lectura ---
+
+    def leer_valores(self):
+        """Valores actuales de los controles (los de imagen se conservan)"""
+        nuevos = []
+        controles = iter(self._controles)
+        for param, valor in zip(self.op.parametros, self.valores):
+            if param.imagen:
+                nuevos.append(valor)
+                continue
+            _, control, _ = next(controles)
+            if isinstance(control, QComboBox):
+                nuevos.append(control.currentText())
+            else:
+                nuevos.append(param.tipo(control.value() / self._factor(param)))
+        return tuple(nuevos)
+
+    def _refrescar_etiquetas(self):
+        for param, control, etiqueta in self._controles:
+            if etiqueta is not None:
+                valor = control.value() / self._factor(param)
+                etiqueta.setText(f"{valor:g}")
+
+    # --- Señales ---
+
+    def _al_mover(self):
+        self._refrescar_etiquetas()
+        arrastrando = any(isinstance(c, QSlider) and c.isSliderDown() for _, c, _ in self._controles)
+        if arrastrando:
+            # Si ya hay un envío programado, este valor lo sustituye (se lee al vencer)
+            if not self._temporizador.isActive():
+                self._temporizador.start()
+        else:
+            self._confirmar()  # Teclado o clic en la barra: valor definitivo
+
+    def _emitir_pendiente(self):
+        if self.op is not None:
+            self.cambiado.emit(self.leer_valores())
+
+    def _confirmar(self):
+        self._temporizador.stop()
+        if self.op is None:
+            return
+        valores = self.leer_valores()
+        if valores != self.valores:
+            self.valores = valores
+            self.confirmado.emit(valores)
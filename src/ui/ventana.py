@@ -1,25 +1,44 @@
-import cv2
+import numpy as np
 import os
+import queue
 from datetime import datetime
+from functools import partial
 from PyQt6.QtWidgets import (
     QMainWindow, QLabel, QScrollArea, QPushButton, QVBoxLayout, QHBoxLayout, 
-    QWidget, QFileDialog, QMessageBox, QMenu, QSizePolicy, QInputDialog
+    QWidget, QFileDialog, QMessageBox, QMenu, QInputDialog, QProgressBar,
+    QDockWidget
 )
-from PyQt6.QtGui import QImage, QPixmap, QAction
-from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QAction
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 # Importamos tus módulos de lógica
-from src.logic.gestor_estado import GestorEstado
-from src.ui.ventanas_aux import VentanaHistograma, VentanaCanales
+from src.logic.gestor_estado import GestorEstado, GestorRecetas
+from src.logic.cache import CacheResultados
+from src.logic.imagen import Imagen
+from src.ui.ventanas_aux import VentanaHistograma, VentanaCanales, PanelHistograma, VentanaEstadisticas, VentanaPerfil
+from src.ui.ejecutor import EjecutorOperaciones
+from src.ui.visor_mosaicos import VisorMosaicos
+from src.ui.panel_parametros import PanelParametros
+from src.ui.panel_miniaturas import PanelMiniaturas
 from src.logic import analisis
-from src.logic import operaciones_aritmeticas
-from src.logic import operaciones_logicas
-from src.logic import colores
-from src.logic import mapas
-from src.logic import filtros
-from src.logic import morfologia
+from src.logic import escritura
+from src.logic import histogramas
+from src.logic import instrumentacion
+from src.logic import lectura
+from src.logic import miniaturas
+from src.logic import pipeline
+from src.logic import proxy
+from src.logic import registro
+
+# Menús de operaciones, en el orden en que aparecen en la barra
+CATEGORIAS_MENU = ["Modelos Color", "Aritméticas", "Lógicas", "Mapas Color", "Morfologías", "Filtros"]
+# En estas categorías cada grupo del registro es un submenú
+CATEGORIAS_CON_SUBMENU = {"Filtros"}
 
 class VentanaPrincipal(QMainWindow):
+    # El hilo de escritura avisa por aquí; Qt lo entrega en el hilo de la interfaz
+    guardado = pyqtSignal(str, str)  # ruta, error ("" si se guardó bien)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Image Analysis App")
@@ -32,10 +51,53 @@ class VentanaPrincipal(QMainWindow):
         os.makedirs(self.ruta_salidas, exist_ok=True)
         
         self.gestor = GestorEstado()
+        # Resultados ya calculados (imagen + operación + parámetros)
+        self.ruta_cache = os.path.join(self.ruta_salidas, ".cache")
+        self.cache = CacheResultados()
+
+        # Las operaciones se ejecutan fuera del hilo de la interfaz
+        self.ejecutor = EjecutorOperaciones(self)
+        self.ejecutor.iniciado.connect(self.mostrar_ocupado)
+        self.ejecutor.progreso.connect(self.mostrar_progreso)
+        self.ejecutor.terminado.connect(self.operacion_terminada)
+        self.ejecutor.fallido.connect(self.operacion_fallida)
+        self.ejecutor.cancelado.connect(self.operacion_cancelada)
+
+        # La vista previa sobre el proxy corre aparte, en paralelo al cálculo completo
+        self.ejecutor_previa = EjecutorOperaciones(self)
+        self.ejecutor_previa.terminado.connect(self.vista_previa_lista)
+
+        # Los archivos también se decodifican en segundo plano
+        self.ejecutor_lectura = EjecutorOperaciones(self)
+        self.ejecutor_lectura.terminado.connect(self.imagen_cargada)
+        self.ejecutor_lectura.fallido.connect(self.carga_fallida)
+
+        # Guardado en un hilo de escritura con cola acotada; la exportación
+        # del historial escribe en paralelo desde su propio trabajo
+        self.formato_guardado = "PNG"
+        self.nivel_guardado = None  # None = nivel por defecto del formato
+        self.escritor = escritura.Escritor(al_terminar=lambda ruta, error: self.guardado.emit(ruta, error or ""))
+        self.guardado.connect(self.imagen_guardada)
+        self.ejecutor_exportar = EjecutorOperaciones(self)
+        self.ejecutor_exportar.progreso.connect(
+            lambda hecho, total: self.statusBar().showMessage(f"Exportando historial... {hecho * 100 // total}%"))
+        self.ejecutor_exportar.terminado.connect(self.historial_exportado)
+        self.ejecutor_exportar.fallido.connect(
+            lambda mensaje, _: QMessageBox.critical(self, "Error", f"Error al exportar el historial:\n{mensaje}"))
         
         # Variables de estado
         self.imagen_original = None
-        self.imagen_mostrada = None
+        self.actual = None  # Imagen mostrada (array + modelo de color)
+        self.restauracion = None  # Contexto del deshacer/rehacer en curso
+        self.archivo_secundario = None
+        self.ventana_histograma = None
+        self.ventana_estadisticas = None
+        self.modo_perfil = None  # Perfilado pedido para la siguiente operación
+
+        # Paneles acoplables (antes de los menús: Ver tiene sus acciones)
+        self.crear_panel_parametros()
+        self.crear_panel_histograma()
+        self.crear_panel_miniaturas()
 
         # 1. Crear Menús (Barra superior)
         self.crear_menus()
@@ -49,22 +111,17 @@ class VentanaPrincipal(QMainWindow):
         self.layout_visores = QHBoxLayout()
         
         # --- Visor Izquierdo (Original / Anterior) ---
-        self.visor_izq = QLabel("Original")
-        self.visor_izq.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.visor_izq = VisorMosaicos()
         self.visor_izq.setStyleSheet("border: 1px dashed #555;")
-        self.visor_izq.setScaledContents(False) # Importante para evitar efecto lupa
         
         # --- Visor Derecho (Resultado) ---
-        self.visor_der = QLabel("Resultado")
-        self.visor_der.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.visor_der = VisorMosaicos()
         self.visor_der.setStyleSheet("border: 2px solid #0078d7;") # Borde azul para destacar
-        self.visor_der.setScaledContents(False)
 
-        # Política de tamaño para evitar que exploten
-        from PyQt6.QtWidgets import QSizePolicy
-        policy = QSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-        self.visor_izq.setSizePolicy(policy)
-        self.visor_der.setSizePolicy(policy)
+        # Zoom y desplazamiento sincronizados entre ambos visores
+        self._sincronizando = False
+        self.visor_izq.vista_cambiada.connect(lambda: self.sincronizar_visores(self.visor_izq, self.visor_der))
+        self.visor_der.vista_cambiada.connect(lambda: self.sincronizar_visores(self.visor_der, self.visor_izq))
 
         # Agregamos al layout
         self.layout_visores.addWidget(self.visor_izq)
@@ -78,95 +135,98 @@ class VentanaPrincipal(QMainWindow):
         widget_central.setLayout(self.layout_visores)
         self.setCentralWidget(widget_central)
 
+        # Indicador permanente de la memoria que ocupa el historial
+        self.lbl_memoria = QLabel()
+        self.statusBar().addPermanentWidget(self.lbl_memoria)
+        self.actualizar_memoria_historial()
+
+        # Indicador de operación en curso (oculto mientras no hay trabajo)
+        self.barra_progreso = QProgressBar()
+        self.barra_progreso.setMaximumWidth(150)
+        self.barra_progreso.setTextVisible(False)
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.clicked.connect(self.ejecutor.cancelar)
+        self.statusBar().addPermanentWidget(self.barra_progreso)
+        self.statusBar().addPermanentWidget(self.btn_cancelar)
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+
+    @property
+    def imagen_mostrada(self):
+        return self.actual.datos if self.actual is not None else None
+
+    @property
+    def modelo_actual(self):
+        return self.actual.modelo if self.actual is not None else "RGB"
+
     def crear_menus(self):
         barra_menu = self.menuBar()
         
         # 1. ARCHIVO
         menu_archivo = barra_menu.addMenu("Archivo")
         menu_archivo.addAction("Cargar Imagen", self.cargar_imagen)
-        menu_archivo.addAction("Guardar Imagen (PNG)", self.guardar_imagen)
+        menu_archivo.addAction("Explorar Carpeta...", self.explorar_carpeta)
+        menu_archivo.addAction("Guardar Imagen", self.guardar_imagen)
+        menu_archivo.addAction("Formato de Guardado...", self.configurar_formato)
+        menu_archivo.addAction("Exportar Historial...", self.exportar_historial)
+        menu_archivo.addSeparator()
+        menu_archivo.addAction("Exportar Pipeline...", self.exportar_pipeline)
         
         # 2. EDICIÓN (Undo/Redo)
         menu_edicion = barra_menu.addMenu("Edición")
+        accion_cancelar = menu_edicion.addAction("Cancelar Operación", self.ejecutor.cancelar)
+        accion_cancelar.setShortcut("Esc")
+        menu_edicion.addSeparator()
         menu_edicion.addAction("Atrás", self.accion_atras)
         menu_edicion.addAction("Adelante", self.accion_adelante)
         menu_edicion.addSeparator()
         menu_edicion.addAction("Restablecer", self.accion_restablecer)
+        menu_edicion.addSeparator()
+        menu_edicion.addAction("Memoria del Historial...", self.configurar_memoria_historial)
+        self.accion_recetas = menu_edicion.addAction("Historial por Recetas")
+        self.accion_recetas.setCheckable(True)
+        self.accion_recetas.toggled.connect(self.cambiar_modo_historial)
+        menu_edicion.addSeparator()
+        menu_edicion.addAction("Caché de Resultados...", self.configurar_cache)
+        accion_disco = menu_edicion.addAction("Caché en Disco")
+        accion_disco.setCheckable(True)
+        accion_disco.toggled.connect(self.cambiar_cache_disco)
+        menu_edicion.addSeparator()
+        # Filtros de rango, bordes y morfologías: cada canal por separado en lugar de grises
+        self.accion_por_canal = menu_edicion.addAction("Procesar Canales por Separado")
+        self.accion_por_canal.setCheckable(True)
 
         # 3. VER (Histograma y Canales)
         menu_ver = barra_menu.addMenu("Ver")
         menu_ver.addAction("Mostrar Histograma", self.mostrar_histograma) 
+        menu_ver.addAction(self.dock_parametros.toggleViewAction())
+        menu_ver.addAction(self.dock_histograma.toggleViewAction())
+        menu_ver.addAction(self.dock_miniaturas.toggleViewAction())
+        self.accion_vista_previa = menu_ver.addAction("Vista Previa Rápida")
+        self.accion_vista_previa.setCheckable(True)
+        self.accion_vista_previa.setChecked(True)
         menu_ver.addAction("Mostrar Canales", self.mostrar_canales)
         menu_ver.addAction("Componentes Conexas", self.mostrar_componentes)
-
-        # 4. MODELOS DE COLOR
-        menu_color = barra_menu.addMenu("Modelos Color")
-        menu_color.addAction("RGB", lambda: self.aplicar_modelo("RGB"))
-        menu_color.addAction("Escala de Grises", lambda: self.aplicar_modelo("GRAY"))
-        menu_color.addAction("Binarizar", lambda: self.aplicar_modelo("BINARY"))
-        menu_color.addAction("HSV", lambda: self.aplicar_modelo("HSV"))
-        menu_color.addAction("CMYK", lambda: self.aplicar_modelo("CMYK"))
-
-        # 5. ARITMÉTICAS
-        menu_arit = barra_menu.addMenu("Aritméticas")
-        menu_arit.addAction("Suma", lambda: self.gestionar_aritmetica("SUMA"))
-        menu_arit.addAction("Resta", lambda: self.gestionar_aritmetica("RESTA"))
-        menu_arit.addAction("Multiplicación", lambda: self.gestionar_aritmetica("MULT"))
-        menu_arit.addAction("División", lambda: self.gestionar_aritmetica("DIV"))
-        menu_arit.addSeparator()
-        menu_arit.addAction("Inversión", lambda: self.gestionar_aritmetica("INV"))
-
-        # 6. OPERACIONES LÓGICAS
-        menu_logicas = barra_menu.addMenu("Lógicas")
-        menu_logicas.addAction("NOT - Invertir", lambda: self.aplicar_logica("NOT"))
-        menu_logicas.addSeparator()
-        # Estas requieren una segunda imagen
-        menu_logicas.addAction("AND - Intersección", lambda: self.aplicar_logica("AND"))
-        menu_logicas.addAction("OR - Unión", lambda: self.aplicar_logica("OR"))
-        menu_logicas.addAction("XOR", lambda: self.aplicar_logica("XOR"))
-
-        # 7. MAPAS DE COLOR
-        menu_mapas = barra_menu.addMenu("Mapas Color")
-        menu_mapas.addAction("JET", lambda: self.aplicar_mapa_color("JET"))
-        menu_mapas.addAction("HOT", lambda: self.aplicar_mapa_color("HOT"))
-        menu_mapas.addAction("OCEAN", lambda: self.aplicar_mapa_color("OCEAN"))
-        menu_mapas.addAction("BONE", lambda: self.aplicar_mapa_color("BONE"))
-        menu_mapas.addAction("PINK", lambda: self.aplicar_mapa_color("PINK"))
-        menu_mapas.addAction("PROPIO 1", lambda: self.aplicar_mapa_color("PROPIO 1"))
-        menu_mapas.addAction("PROPIO 2", lambda: self.aplicar_mapa_color("PROPIO 2"))
-
-        # 8. MORFOLOGÍAS
-        menu_morfo = barra_menu.addMenu("Morfologías")
-        # Operaciones Directas
-        menu_morfo.addAction("Erosión", lambda: self.aplicar_morfologia("Erosión"))
-        menu_morfo.addAction("Dilatación", lambda: self.aplicar_morfologia("Dilatación"))
-        menu_morfo.addSeparator()
-        # Aperturas
-        menu_morfo.addAction("Apertura", lambda: self.aplicar_morfologia("Apertura"))
-        menu_morfo.addAction("Apertura EX", lambda: self.aplicar_morfologia("Apertura EX"))
-        menu_morfo.addSeparator()
-        # Cierres
-        menu_morfo.addAction("Cierre", lambda: self.aplicar_morfologia("Cierre"))
-        menu_morfo.addAction("Cierre EX", lambda: self.aplicar_morfologia("Cierre EX"))
-
-        # 9. FILTRADO
-        menu_filtros = barra_menu.addMenu("Filtros")
-        # Submenú Ruido
-        menu_ruido = menu_filtros.addMenu("Reducción de Ruido")
-        menu_ruido.addAction("Promedio", lambda: self.aplicar_filtro("Promedio"))
-        menu_ruido.addAction("Mediana", lambda: self.aplicar_filtro("Mediana"))
-        menu_ruido.addAction("Gaussiano", lambda: self.aplicar_filtro("Gaussiano"))
-        menu_ruido.addAction("Máximo", lambda: self.aplicar_filtro("Máximo"))
-        menu_ruido.addAction("Mínimo", lambda: self.aplicar_filtro("Mínimo"))
-        menu_filtros.addSeparator()
-        # Submenú Bordes
-        menu_bordes = menu_filtros.addMenu("Detección de Bordes")
-        menu_bordes.addAction("Sobel", lambda: self.aplicar_filtro("Sobel"))
-        menu_bordes.addAction("Prewitt", lambda: self.aplicar_filtro("Prewitt"))
-        menu_bordes.addAction("Roberts", lambda: self.aplicar_filtro("Roberts"))
-        menu_bordes.addAction("Canny", lambda: self.aplicar_filtro("Canny"))
-        menu_bordes.addAction("Laplaciano", lambda: self.aplicar_filtro("Laplaciano"))
-        menu_bordes.addAction("Kirsch", lambda: self.aplicar_filtro("Kirsch"))
+        menu_ver.addSeparator()
+        menu_ver.addAction("Estadísticas de Operaciones...", self.mostrar_estadisticas)
+        menu_perfil = menu_ver.addMenu("Perfilar Siguiente Operación")
+        menu_perfil.addAction("Tiempo por Función (cProfile)", lambda: self.perfilar_siguiente("cprofile"))
+        menu_perfil.addAction("Memoria (tracemalloc)", lambda: self.perfilar_siguiente("memoria"))
+
+        # 4..9. OPERACIONES (generadas desde el registro central)
+        for categoria in CATEGORIAS_MENU:
+            menu = barra_menu.addMenu(categoria)
+            grupo_actual = None
+            destino = menu
+            for op in registro.por_categoria(categoria):
+                if op.etiqueta is None:
+                    continue  # Variantes internas (ej. "SUMA IMG")
+                if op.grupo != grupo_actual:
+                    if grupo_actual is not None:
+                        menu.addSeparator()
+                    grupo_actual = op.grupo
+                    destino = menu.addMenu(op.grupo) if categoria in CATEGORIAS_CON_SUBMENU else menu
+                destino.addAction(op.etiqueta, lambda _=False, nombre=op.nombre: self.aplicar_operacion(nombre))
 
 
     # ==========================================
@@ -176,62 +236,201 @@ class VentanaPrincipal(QMainWindow):
     def cargar_imagen(self):
         archivo, _ = QFileDialog.getOpenFileName(self, "Abrir imagen", self.ruta_data, "Imagenes (*.png *.jpg *.bmp *.tif)")
         if archivo:
-            img = cv2.imread(archivo)
-            if img is None:
-                QMessageBox.critical(self, "Error", "No se pudo leer la imagen.")
-                return
-            
-            # Reset total
-            self.gestor.reiniciar()
-            self.modelo_actual = "RGB"  # Reset del modelo de color
-            
-            # Guardamos la original limpia
-            self.imagen_original = img
-            # La mostrada inicial es una copia de la original
-            self.imagen_mostrada = img.copy()
-            
-            # Actualizamos interfaz
-            self.actualizar_visores()
+            self.abrir_archivo(archivo)
+
+    def abrir_archivo(self, archivo):
+        self.statusBar().showMessage(f"Abriendo {os.path.basename(archivo)}...")
+        # La caché de lectura devuelve al instante los archivos ya abiertos
+        self.ejecutor_lectura.enviar(archivo, lectura.leer, archivo, contexto={"archivo": archivo})
+
+    def imagen_cargada(self, img, contexto):
+        self.ejecutor.cancelar()
+        self.terminar_ajuste()
+
+        # Guardamos la original limpia; la mostrada parte de ella en RGB
+        self.imagen_original = img
+        self.actual = Imagen(img)
+
+        # Reset total
+        self.gestor.reiniciar(self.actual)
+
+        # Actualizamos interfaz
+        self.actualizar_visores()
+        self.statusBar().showMessage(f"Abierta: {os.path.basename(contexto['archivo'])}", 3000)
+
+    def carga_fallida(self, mensaje, contexto):
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Error", "No se pudo leer la imagen.")
 
     def guardar_imagen(self):
         if self.imagen_mostrada is None:
             QMessageBox.warning(self, "Aviso", "No hay imagen para guardar.")
             return
 
-        nombre_archivo = f"resultado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        ruta_completa = os.path.join(self.ruta_salidas, nombre_archivo)
-        
-        cv2.imwrite(ruta_completa, self.imagen_mostrada)
-        QMessageBox.information(self, "Guardado", f"Imagen guardada en:\n{ruta_completa}")
+        try:
+            # Los arrays no se modifican en el sitio: se encola sin copiar
+            ruta = self.escritor.enviar(self.imagen_mostrada, self.ruta_salidas, "resultado",
+                                        self.formato_guardado, self.nivel_guardado)
+        except queue.Full:
+            QMessageBox.warning(self, "Aviso", "Hay demasiados guardados pendientes. Espera un momento.")
+            return
+        self.statusBar().showMessage(f"Guardando {os.path.basename(ruta)}...")
+
+    def imagen_guardada(self, ruta, error):
+        if error:
+            QMessageBox.critical(self, "Error", error)
+        else:
+            self.statusBar().showMessage(f"Imagen guardada en: {ruta}", 5000)
+
+    def configurar_formato(self):
+        formatos = list(escritura.FORMATOS)
+        formato, ok = QInputDialog.getItem(self, "Formato de Guardado", "Formato:", formatos,
+                                           formatos.index(self.formato_guardado), False)
+        if not ok:
+            return
+        _, _, minimo, maximo, defecto = escritura.FORMATOS[formato]
+        nivel = None
+        if minimo != maximo:
+            etiqueta = "Compresión (0-9):" if formato == "PNG" else f"Calidad ({minimo}-{maximo}):"
+            nivel, ok = QInputDialog.getInt(self, "Formato de Guardado", etiqueta, defecto, minimo, maximo)
+            if not ok:
+                return
+        self.formato_guardado, self.nivel_guardado = formato, nivel
+
+    def exportar_historial(self):
+        """Escribe todos los estados del historial (pasados, actual y rehacer) en paralelo"""
+        if self.imagen_mostrada is None:
+            QMessageBox.warning(self, "Aviso", "No hay imagen para exportar.")
+            return
+        carpeta = os.path.join(self.ruta_salidas, f"historial_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+        # estados() copia el historial: se puede seguir editando mientras se escribe
+        if self.restaurando():
+            return
+        imagenes = (estado.datos for estado in self.gestor.estados(self.actual))
+        exportar = partial(escritura.exportar, total=self.gestor.num_estados())
+        self.ejecutor_exportar.enviar("Exportar Historial", exportar, imagenes, carpeta, "estado",
+                                      self.formato_guardado, self.nivel_guardado, con_progreso=True)
+        self.statusBar().showMessage("Exportando historial...")
+
+    def historial_exportado(self, rutas, _):
+        self.statusBar().showMessage(f"{len(rutas)} estados exportados en: {os.path.dirname(rutas[0])}", 5000)
 
     def accion_atras(self):
-        imagen_anterior = self.gestor.deshacer(self.imagen_mostrada)
-        
-        if imagen_anterior is not None:
-            self.imagen_mostrada = imagen_anterior
-            # Reseteamos el modelo a RGB por seguridad para evitar conflictos con histogramas
-            self.modelo_actual = "RGB"
-            # Actualizamos la interfaz de doble visor
-            self.actualizar_visores() 
+        if self.restaurando():
+            return
+        self.ejecutor.cancelar()
+        self.terminar_ajuste()
+        # El historial retrocede al momento; la imagen se reconstruye en el hilo de trabajo
+        reconstruir = self.gestor.deshacer(self.actual)
+        if reconstruir is not None:
+            self.restaurar_estado("Deshacer", reconstruir)
 
     def accion_adelante(self):
-        imagen_siguiente = self.gestor.rehacer(self.imagen_mostrada)
-        
-        if imagen_siguiente is not None:
-            self.imagen_mostrada = imagen_siguiente
-            self.modelo_actual = "RGB"
-            self.actualizar_visores()
+        if self.restaurando():
+            return
+        self.ejecutor.cancelar()
+        self.terminar_ajuste()
+        reconstruir = self.gestor.rehacer(self.actual)
+        if reconstruir is not None:
+            self.restaurar_estado("Rehacer", reconstruir)
+
+    def restaurar_estado(self, descripcion, reconstruir):
+        """
+        Reconstruye el estado (descomprimir o reproducir recetas) fuera del hilo
+        de la interfaz. Hasta que llegue, self.actual no corresponde al historial:
+        no se admiten otras operaciones ni se puede cancelar.
+        """
+        self.restauracion = {"descripcion": descripcion}
+        self.ejecutor.enviar(descripcion, reconstruir, contexto=self.restauracion)
+        self.btn_cancelar.hide()
+
+    def restaurando(self):
+        if self.restauracion is None:
+            return False
+        self.statusBar().showMessage(f"Espera a que termine {self.restauracion['descripcion']}...", 3000)
+        return True
 
     def accion_restablecer(self):
         if self.imagen_original is not None:
-            self.gestor.reiniciar()
-            self.imagen_mostrada = self.imagen_original.copy()
-            self.modelo_actual = "RGB"
+            self.ejecutor.cancelar()
+            self.terminar_ajuste()
+            self.actual = Imagen(self.imagen_original)
+            self.gestor.reiniciar(self.actual)
             self.actualizar_visores()
 
 
+    def cambiar_modo_historial(self, por_recetas):
+        """Cambia entre historial de imágenes y de recetas. La imagen actual pasa a ser la base."""
+        if self.restaurando():
+            self.accion_recetas.blockSignals(True)
+            self.accion_recetas.setChecked(not por_recetas)
+            self.accion_recetas.blockSignals(False)
+            return
+        self.ejecutor.cancelar()
+        self.terminar_ajuste()
+        self.gestor = GestorRecetas() if por_recetas else GestorEstado()
+        self.gestor.reiniciar(self.actual)
+        self.actualizar_visores()
+        self.actualizar_memoria_historial()
+        modo = "recetas" if por_recetas else "imágenes"
+        self.statusBar().showMessage(f"Historial por {modo}")
+
+    def exportar_pipeline(self):
+        if not isinstance(self.gestor, GestorRecetas):
+            QMessageBox.warning(self, "Aviso", "Activa 'Edición > Historial por Recetas' para exportar el pipeline.")
+            return
+        if not self.gestor.historial:
+            QMessageBox.warning(self, "Aviso", "No hay pasos para exportar.")
+            return
+
+        ruta, _ = QFileDialog.getSaveFileName(self, "Exportar Pipeline",
+                                              os.path.join(self.ruta_salidas, "pipeline.txt"),
+                                              "Pipeline (*.txt)")
+        if ruta:
+            self.gestor.exportar_pipeline(ruta)
+            self.statusBar().showMessage(f"Pipeline exportado en {ruta}")
+
+    def configurar_memoria_historial(self):
+        if self.gestor.presupuesto_bytes is None:
+            QMessageBox.information(self, "Historial", "El historial por recetas no guarda imágenes: no necesita presupuesto.")
+            return
+        actual = self.gestor.presupuesto_bytes // (1024 * 1024)
+        mb, ok = QInputDialog.getInt(self, "Memoria del Historial",
+                                     "Presupuesto máximo (MB):", actual, 1, 65536)
+        if ok:
+            self.gestor.cambiar_presupuesto(mb)
+            self.actualizar_memoria_historial()
+
+    def configurar_cache(self):
+        e = self.cache.estadisticas()
+        texto = (f"Aciertos: {e['aciertos']} (disco: {e['aciertos_disco']})\n"
+                 f"Fallos: {e['fallos']}\n"
+                 f"Tasa de aciertos: {e['tasa_aciertos']:.0%}\n"
+                 f"Entradas: {e['entradas']}, {e['bytes'] / (1024 * 1024):.1f} MB\n\n"
+                 "Límite de memoria (MB):")
+        mb, ok = QInputDialog.getInt(self, "Caché de Resultados", texto,
+                                     e["limite_bytes"] // (1024 * 1024), 0, 65536)
+        if ok:
+            self.cache.cambiar_limite(mb)
+
+    def cambiar_cache_disco(self, activada):
+        if activada:
+            os.makedirs(self.ruta_cache, exist_ok=True)
+        self.cache.carpeta_disco = self.ruta_cache if activada else None
+
+    def actualizar_memoria_historial(self):
+        usado = self.gestor.memoria_usada() / (1024 * 1024)
+        pasos = len(self.gestor.historial)
+        if self.gestor.presupuesto_bytes is None:
+            self.lbl_memoria.setText(f"Historial (recetas): {pasos} pasos, {usado:.1f} MB")
+        else:
+            limite = self.gestor.presupuesto_bytes / (1024 * 1024)
+            self.lbl_memoria.setText(f"Historial: {pasos} pasos, {usado:.1f} / {limite:.0f} MB")
+
     def actualizar_visores(self):
         """Muestra las imágenes en los visores correspondientes"""
+        self.actualizar_memoria_historial()
+        self.programar_histograma()
         if self.imagen_mostrada is None:
             return
 
@@ -242,73 +441,106 @@ class VentanaPrincipal(QMainWindow):
         if not self.gestor.historial:
             # Caso inicial: Solo una imagen
             self.visor_izq.hide()
-            self.mostrar_en_label(self.visor_der, self.imagen_mostrada)
+            self.visor_der.mostrar(self.imagen_mostrada)
         else:
             # Caso edición: Mostramos comparación
+            recien_visible = self.visor_izq.isHidden()
             self.visor_izq.show()
-            self.mostrar_en_label(self.visor_izq, self.imagen_original) # Siempre mostramos la original base a la izquierda
-            self.mostrar_en_label(self.visor_der, self.imagen_mostrada)
+            self._sincronizando = True  # Ajustar la original no debe mover el resultado
+            self.visor_izq.mostrar(self.imagen_original) # Siempre mostramos la original base a la izquierda
+            self._sincronizando = False
+            if recien_visible:
+                self.visor_izq.copiar_vista(self.visor_der)
+            self.visor_der.mostrar(self.imagen_mostrada)
+
+    def sincronizar_visores(self, origen, destino):
+        if self._sincronizando or not destino.isVisible():
+            return
+        self._sincronizando = True
+        destino.copiar_vista(origen)
+        self._sincronizando = False
 
-    def mostrar_en_label(self, label, img_cv):
-        """Convierte OpenCV -> Qt y pone la imagen en el label"""
-        if img_cv is None: return
-        
-        # Detección de formato para conversión
-        if len(img_cv.shape) == 2: # Grises/Binario
-            h, w = img_cv.shape
-            fmt = QImage.Format.Format_Grayscale8
-            bytes_line = w
-            q_img = QImage(img_cv.data, w, h, bytes_line, fmt)
-            
-        else: # Color
-            h, w, c = img_cv.shape
-            # Convertimos BGR a RGB para visualizar correctamente
-            # PERO si es una simulación CMYK o HSV rara, igual la mostramos como RGB
-            img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
-            fmt = QImage.Format.Format_RGB888
-            bytes_line = 3 * w
-            q_img = QImage(img_rgb.data, w, h, bytes_line, fmt)
-
-        pixmap = QPixmap.fromImage(q_img)
-        
-        # Escalado suave
-        label.setPixmap(pixmap.scaled(
-            label.width(), label.height(), 
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        ))
+    # ==========================================
+    #              EXPLORADOR
+    # ==========================================
+
+    def crear_panel_miniaturas(self):
+        # Índice persistente: la segunda vez la carpeta se abre sin decodificar nada
+        indice = miniaturas.IndiceMiniaturas(os.path.join(self.ruta_salidas, ".miniaturas.sqlite"))
+        self.panel_miniaturas = PanelMiniaturas(indice)
+        self.panel_miniaturas.abrir.connect(self.abrir_archivo)
+        self.dock_miniaturas = QDockWidget("Miniaturas", self)
+        self.dock_miniaturas.setWidget(self.panel_miniaturas)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.dock_miniaturas)
+        self.dock_miniaturas.hide()
+        # La carpeta de datos se lista al mostrar el panel por primera vez
+        self.dock_miniaturas.visibilityChanged.connect(self._mostrar_data_si_vacio)
+
+    def _mostrar_data_si_vacio(self, visible):
+        if visible and self.panel_miniaturas.carpeta is None:
+            self.panel_miniaturas.mostrar_carpeta(self.ruta_data)
+
+    def explorar_carpeta(self):
+        self.dock_miniaturas.show()
+        self.panel_miniaturas.elegir_carpeta()
 
     # ==========================================
     #           FUNCIONES DE ANÁLISIS
     # ==========================================
 
+    def crear_panel_histograma(self):
+        self.panel_histograma = PanelHistograma()
+        self.dock_histograma = QDockWidget("Histograma en Vivo", self)
+        self.dock_histograma.setWidget(self.panel_histograma)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dock_histograma)
+        self.dock_histograma.hide()
+
+        # Se calcula en su propio hilo; un cálculo nuevo reemplaza al pendiente
+        self.ejecutor_histograma = EjecutorOperaciones(self)
+        self.ejecutor_histograma.terminado.connect(lambda series, _: self.panel_histograma.actualizar(*series))
+
+        # Los cambios seguidos (atrás/adelante rápidos) se agrupan en uno solo
+        self.temporizador_histograma = QTimer(self)
+        self.temporizador_histograma.setSingleShot(True)
+        self.temporizador_histograma.setInterval(150)
+        self.temporizador_histograma.timeout.connect(self.calcular_histograma_vivo)
+
+        self.panel_histograma.combo_precision.currentTextChanged.connect(self.programar_histograma)
+        self.dock_histograma.visibilityChanged.connect(self.programar_histograma)
+
+    def programar_histograma(self, *_):
+        if self.dock_histograma.isVisible() and self.imagen_mostrada is not None:
+            self.temporizador_histograma.start()  # Reinicia la espera si ya estaba en marcha
+
+    def calcular_histograma_vivo(self):
+        if self.imagen_mostrada is None:
+            return
+        self.ejecutor_histograma.enviar("Histograma", analisis.series_histograma,
+                                        self.imagen_mostrada, self.modelo_actual, self.panel_histograma.paso)
+
     def mostrar_histograma(self):
         if self.imagen_mostrada is None:
             QMessageBox.warning(self, "Aviso", "Primero carga una imagen.")
             return
-            
-        # Nos aseguramos de tener un modelo definido, si no, RGB por defecto
-        if not hasattr(self, 'modelo_actual'):
-            self.modelo_actual = "RGB"
 
-        # 1. Calculamos la gráfica pasando el MODELO ACTUAL
-        fig = analisis.calcular_histograma(self.imagen_mostrada, self.modelo_actual)
-        
-        # 2. Abrimos la subventana
-        dialogo = VentanaHistograma(fig)
-        dialogo.exec() 
+
+        # 1. Curvas según el MODELO ACTUAL (el histograma se calcula una vez por imagen)
+        titulo, series = analisis.series_histograma(self.imagen_mostrada, self.modelo_actual)
+
+        # 2. Reutilizamos la misma subventana (y su canvas) entre llamadas
+        if self.ventana_histograma is None:
+            self.ventana_histograma = VentanaHistograma(self)
+        self.ventana_histograma.actualizar(titulo, series)
+        self.ventana_histograma.exec()
 
     def mostrar_canales(self):
         if self.imagen_mostrada is None:
             QMessageBox.warning(self, "Aviso", "Primero carga una imagen.")
             return
 
-        # Validación por seguridad
-        if not hasattr(self, 'modelo_actual'):
-            self.modelo_actual = "RGB"
-            
         # Pasamos el modelo para que sepa cómo interpretar los datos
-        canales = analisis.separar_canales(self.imagen_mostrada, self.modelo_actual)
+        canales, _ = instrumentacion.SESION.medir("Separar Canales", analisis.separar_canales,
+                                                  self.imagen_mostrada, self.modelo_actual)
         
         dialogo = VentanaCanales(canales)
         dialogo.exec()
@@ -320,7 +552,8 @@ class VentanaPrincipal(QMainWindow):
             return
 
         # Llamamos a la lógica
-        img_etiquetada, cantidad = analisis.etiquetar_componentes(self.imagen_mostrada)
+        (img_etiquetada, cantidad), _ = instrumentacion.SESION.medir("Componentes Conexas", analisis.etiquetar_componentes,
+                                                                     self.imagen_mostrada)
         
         QMessageBox.information(self, "Análisis", f"Se encontraron {cantidad} objetos (componentes conexas).")
         
@@ -331,246 +564,277 @@ class VentanaPrincipal(QMainWindow):
         dialogo.setWindowTitle(f"Componentes Conexas ({cantidad} objetos)")
         dialogo.exec()
 
-    #           TRANSFORMACIONES DE COLOR
-
-    def aplicar_modelo(self, modelo):
-        if self.imagen_mostrada is None:
-            QMessageBox.warning(self, "Aviso", "Primero carga una imagen.")
-            return
-
-        self.gestor.guardar_estado(self.imagen_mostrada)
-        
-        # Guardamos el modelo para que el histograma sepa qué mostrar
-        self.modelo_actual = modelo 
-        
-        resultado = colores.aplicar_modelo(self.imagen_mostrada, modelo)
-        self.imagen_mostrada = resultado
-        
-        # Actualizamos ambos visores (Original vs Resultado)
-        self.actualizar_visores()
-
-    def aplicar_mapa_color(self, mapa):
-        # 1. Validación de seguridad
-        if self.imagen_mostrada is None:
-            QMessageBox.warning(self, "Aviso", "Primero carga una imagen.")
-            return
-
-        self.gestor.guardar_estado(self.imagen_mostrada)
-        self.modelo_actual = "RGB" 
-        resultado = mapas.aplicar_mapa_color(self.imagen_mostrada, mapa)
-        self.imagen_mostrada = resultado
-        self.actualizar_visores()
-        
-    # OPERACIONES MORFOLOGICAS
+    #           OPERACIONES (REGISTRO CENTRAL)
 
-    def aplicar_morfologia(self, operacion):
+    def aplicar_operacion(self, nombre):
+        """Punto de entrada de todos los menús de operaciones"""
         if self.imagen_mostrada is None:
             QMessageBox.warning(self, "Aviso", "Carga una imagen primero.")
             return
-
-        # 1. Guardar estado para deshacer
-        self.gestor.guardar_estado(self.imagen_mostrada)
-        
-        # 2. DEFINIMOS EL KERNEL FIJO AQUÍ (Estándar 5x5)
-        # Si quisieras cambiarlo en el futuro, solo cambias este número.
-        KERNEL_FIJO = 5  
-
-        resultado = None
-
-        # 3. Aplicar operación
-        if operacion == "Erosión":
-            resultado = morfologia.erosion(self.imagen_mostrada, KERNEL_FIJO)
-            
-        elif operacion == "Dilatación":
-            resultado = morfologia.dilatacion(self.imagen_mostrada, KERNEL_FIJO)
-            
-        elif operacion == "Apertura":
-            resultado = morfologia.apertura_manual(self.imagen_mostrada, KERNEL_FIJO)
-            
-        elif operacion == "Apertura EX":
-            resultado = morfologia.apertura_ex(self.imagen_mostrada, KERNEL_FIJO)
-            
-        elif operacion == "Cierre":
-            resultado = morfologia.cierre_manual(self.imagen_mostrada, KERNEL_FIJO)
-            
-        elif operacion == "Cierre EX":
-            resultado = morfologia.cierre_ex(self.imagen_mostrada, KERNEL_FIJO)
-
-        # 4. Mostrar resultado
-        if resultado is not None:
-            self.imagen_mostrada = resultado
-            self.modelo_actual = "GRAY" # Morfología siempre devuelve gris
-            self.actualizar_visores()
-            self.statusBar().showMessage(f"Aplicado: {operacion}")
-
-    # FILTROS RUIDO Y BORDES
-    
-    def aplicar_filtro(self, nombre_filtro):
-        if self.imagen_mostrada is None:
-            QMessageBox.warning(self, "Aviso", "Carga una imagen primero.")
+        if self.restaurando():
             return
 
-        # 1. Guardar estado
-        self.gestor.guardar_estado(self.imagen_mostrada)
-
-        # 2. 
-        KERNEL_STD = 3  # Tamaño estándar para filtros que lo requieran
-
-        resultado = None
+        op = registro.obtener(nombre)
 
-        try:
-            # --- RUIDO ---
-            if nombre_filtro == "Promedio":
-                resultado = filtros.filtro_promedio(self.imagen_mostrada, KERNEL_STD)
-            elif nombre_filtro == "Mediana":
-                resultado = filtros.filtro_mediana(self.imagen_mostrada, KERNEL_STD)
-            elif nombre_filtro == "Gaussiano":
-                resultado = filtros.filtro_gaussiano(self.imagen_mostrada, KERNEL_STD)
-            elif nombre_filtro == "Máximo":
-                resultado = filtros.filtro_maximo(self.imagen_mostrada, KERNEL_STD)
-            elif nombre_filtro == "Mínimo":
-                resultado = filtros.filtro_minimo(self.imagen_mostrada, KERNEL_STD)
-                
-            # --- BORDES ---
-            elif nombre_filtro == "Sobel":
-                resultado = filtros.filtro_sobel(self.imagen_mostrada)
-            elif nombre_filtro == "Prewitt":
-                resultado = filtros.filtro_prewitt(self.imagen_mostrada)
-            elif nombre_filtro == "Roberts":
-                resultado = filtros.filtro_roberts(self.imagen_mostrada)
-            elif nombre_filtro == "Canny":
-                resultado = filtros.filtro_canny(self.imagen_mostrada)
-            elif nombre_filtro == "Laplaciano":
-                resultado = filtros.filtro_laplaciano(self.imagen_mostrada)
-            elif nombre_filtro == "Kirsch":
-                resultado = filtros.filtro_kirsch(self.imagen_mostrada)
-
-            # 3. Mostrar
-            if resultado is not None:
-                self.imagen_mostrada = resultado
-                # La mayoría de filtros de bordes devuelven gris, aseguramos el modelo visual
-                if len(resultado.shape) == 2:
-                    self.modelo_actual = "GRAY"
-                self.actualizar_visores()
-                self.statusBar().showMessage(f"Filtro aplicado: {nombre_filtro}")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al aplicar filtro {nombre_filtro}:\n{str(e)}")
-    
-    # operaciones logicas
-    
-    def aplicar_logica(self, tipo_operacion):
-        if self.imagen_mostrada is None:
-            QMessageBox.warning(self, "Aviso", "Carga una imagen base primero.")
+        # Suma, resta, etc. pueden hacerse con un escalar o con otra imagen
+        if op.variante_imagen is not None:
+            opciones = ["Con otra Imagen", "Con un valor Escalar"]
+            item, ok = QInputDialog.getItem(self, "Seleccionar Modo",
+                                            f"¿Cómo deseas aplicar la {op.etiqueta}?",
+                                            opciones, 0, False)
+            if not ok:
+                return
+            if item == "Con otra Imagen":
+                op = registro.obtener(op.variante_imagen)
+
+        parametros = self.pedir_parametros(op)
+        if parametros is None:
+            return  # El usuario canceló
+        self.ejecutar_operacion(op, parametros)
+
+    def pedir_parametros(self, op):
+        """
+        Pide al usuario los parámetros obligatorios (segunda imagen o escalar).
+        Los demás toman su valor por defecto del registro. Retorna None si se cancela.
+        """
+        valores = []
+        self.archivo_secundario = None
+        for param in op.parametros:
+            if param.imagen:
+                archivo, _ = QFileDialog.getOpenFileName(
+                    self,
+                    f"Seleccionar imagen para {op.nombre}",
+                    "",
+                    "Imágenes (*.png *.jpg *.jpeg *.bmp *.tif)"
+                )
+                if not archivo:
+                    return None
+                try:
+                    img = lectura.leer(archivo)
+                except ValueError:
+                    QMessageBox.critical(self, "Error", "No se pudo cargar la segunda imagen.")
+                    return None
+                self.archivo_secundario = archivo
+                valores.append(img)
+            elif param.defecto is None:
+                val, ok = QInputDialog.getDouble(self, "Valor Escalar", "Introduce el valor:", 1.0,
+                                                 param.minimo, param.maximo, 2)
+                if not ok:
+                    return None
+                valores.append(val)
+            elif param.nombre == "modo_color":
+                valores.append("CANALES" if self.accion_por_canal.isChecked() else param.defecto)
+            else:
+                valores.append(param.defecto)
+        return valores
+
+    def ejecutar_operacion(self, op, parametros, reemplazar=False):
+        """
+        Envía la operación al hilo de trabajo. Si ya había otra en curso, queda
+        reemplazada. El historial solo se actualiza cuando el resultado llega.
+        Con reemplazar, se recalcula el último paso (el del panel de parámetros)
+        sobre su misma entrada en lugar de añadir uno nuevo.
+        """
+        base = self.ajuste["base"] if reemplazar else self.actual
+        entrada = base.datos
+        archivo = self.ajuste["archivo"] if reemplazar else self.archivo_secundario
+        contexto = {
+            "op": op,
+            "base": base,
+            "entrada": entrada,
+            "parametros": parametros,
+            # La receta lleva la ruta de la imagen secundaria en lugar de sus píxeles
+            "receta": (op.nombre, tuple(archivo if p.imagen else v
+                                        for p, v in zip(op.parametros, parametros))),
+            "archivo": archivo,
+            "reemplazar": reemplazar,
+            "perfil": self.modo_perfil,
+        }
+        self.modo_perfil = None
+        self.ejecutor.enviar(op.nombre, self.calcular_operacion, contexto, op, entrada, *parametros, contexto=contexto)
+        # Después de enviar: cancelar el trabajo anterior restaura los visores.
+        # Sin vista previa al perfilar memoria: sus reservas contarían en la memoria pico
+        if self.accion_vista_previa.isChecked() and proxy.aplica(op, entrada) and contexto["perfil"] != "memoria":
+            self.mostrar_vista_previa(op, entrada, parametros)
+
+    def calcular_operacion(self, contexto, op, entrada, *parametros):
+        """Hilo de trabajo: resultado (de la caché si ya existe) medido; la medición va en el contexto"""
+        resultado, contexto["medicion"] = instrumentacion.SESION.medir(
+            op.nombre, self.cache.ejecutar, op, entrada, *parametros,
+            anotar=lambda: {"cache": self.cache.origen()}, perfil=contexto["perfil"])
+        return resultado
+
+    def calcular_previa(self, contexto, funcion, *args):
+        """Hilo de trabajo: vista previa del panel de parámetros, medida aparte"""
+        resultado, contexto["medicion"] = instrumentacion.SESION.medir(
+            f"{contexto['op'].nombre} (vista previa)", funcion, *args)
+        return resultado
+
+    def mostrar_vista_previa(self, op, entrada, parametros):
+        """
+        Calcula en segundo plano el resultado sobre un proxy reducido (kernels
+        escalados). Solo cambia el visor: el historial y imagen_mostrada
+        esperan al resultado a resolución completa, que lo reemplaza.
+        Si falla no se muestra nada: el cálculo completo informará del error.
+        """
+        contexto = {"op": op, "entrada": entrada}
+        self.ejecutor_previa.enviar(op.nombre, self.calcular_previa, contexto,
+                                    proxy.vista_previa, op.nombre, entrada, parametros, contexto=contexto)
+
+    def vista_previa_lista(self, previa, contexto):
+        if not self.ejecutor.ocupado:
+            return  # El resultado completo ya llegó (o se canceló)
+        alto, ancho = contexto["entrada"].shape[:2]
+        self.visor_der.mostrar(previa, tamano=(ancho, alto))
+        self.statusBar().showMessage(f"Vista previa: {contexto['op'].nombre} (calculando a resolución completa...)")
+
+    def crear_panel_parametros(self):
+        self.ajuste = None  # Última operación aplicada que se puede reajustar
+        self.panel_parametros = PanelParametros()
+        self.panel_parametros.cambiado.connect(self.previsualizar_ajuste)
+        self.panel_parametros.confirmado.connect(self.confirmar_ajuste)
+        self.dock_parametros = QDockWidget("Parámetros", self)
+        self.dock_parametros.setWidget(self.panel_parametros)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dock_parametros)
+
+    def previsualizar_ajuste(self, valores):
+        """Mientras se arrastra: recalcula sobre la misma entrada sin tocar el historial"""
+        if self.ajuste is None:
             return
-
-        # Operación NOT (Solo requiere 1 imagen)
-        if tipo_operacion == "NOT":
-            self.gestor.guardar_estado(self.imagen_mostrada)
-            self.imagen_mostrada = operaciones_logicas.operacion_not(self.imagen_mostrada)
-            self.actualizar_visores()
-            self.statusBar().showMessage("Operación NOT aplicada")
+        op, entrada = self.ajuste["op"], self.ajuste["entrada"]
+        if proxy.aplica(op, entrada):
+            funcion = proxy.vista_previa
+            args = (op.nombre, entrada, valores)
+        else:
+            funcion = op.ejecutar
+            args = (entrada, *valores)
+        # El ejecutor descarta la previsualización anterior si aún no había terminado
+        contexto = {"op": op, "entrada": entrada, "previa": True}
+        self.ejecutor.enviar(op.nombre, self.calcular_previa, contexto, funcion, *args, contexto=contexto)
+
+    def confirmar_ajuste(self, valores):
+        """Al soltar: cálculo completo que sustituye al último paso del historial"""
+        if self.ajuste is None:
             return
-
-        # Operaciones Binarias (AND, OR, XOR) - Requieren seleccionar otra imagen
-        archivo, _ = QFileDialog.getOpenFileName(
-            self, 
-            f"Seleccionar imagen para {tipo_operacion}", 
-            "", 
-            "Imágenes (*.png *.jpg *.jpeg *.bmp)"
-        )
-        
-        if not archivo:
-            return  # El usuario canceló la selección
-
-        # Cargar la segunda imagen
-        img_secundaria = cv2.imread(archivo)
-        
-        if img_secundaria is None:
-            QMessageBox.critical(self, "Error", "No se pudo cargar la segunda imagen.")
+        self.ejecutar_operacion(self.ajuste["op"], valores, reemplazar=True)
+
+    def terminar_ajuste(self):
+        """El último paso deja de ser ajustable (deshacer, cargar, etc.)"""
+        self.ajuste = None
+        self.panel_parametros.limpiar()
+
+    def mostrar_ocupado(self, descripcion):
+        self.barra_progreso.setRange(0, 0)  # Indeterminada
+        self.barra_progreso.show()
+        self.btn_cancelar.show()
+        self.statusBar().showMessage(f"Aplicando {descripcion}...")
+
+    def mostrar_progreso(self, hecho, total):
+        self.barra_progreso.setRange(0, total)
+        self.barra_progreso.setValue(hecho)
+
+    def ocultar_ocupado(self):
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+
+    def operacion_cancelada(self, contexto):
+        self.ocultar_ocupado()
+        self.ejecutor_previa.cancelar()
+        if contexto is self.restauracion:
+            # Solo se cancela al abrir otra imagen o restablecer, que reinician el historial
+            self.restauracion = None
             return
-
-        self.gestor.guardar_estado(self.imagen_mostrada)
-
-        try:
-            resultado = None
-            if tipo_operacion == "AND":
-                resultado = operaciones_logicas.operacion_and(self.imagen_mostrada, img_secundaria)
-            elif tipo_operacion == "OR":
-                resultado = operaciones_logicas.operacion_or(self.imagen_mostrada, img_secundaria)
-            elif tipo_operacion == "XOR":
-                resultado = operaciones_logicas.operacion_xor(self.imagen_mostrada, img_secundaria)
-            
-            if resultado is not None:
-                self.imagen_mostrada = resultado
-                self.actualizar_visores()
-                self.statusBar().showMessage(f"Operación {tipo_operacion} aplicada con {archivo.split('/')[-1]}")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al aplicar lógica:\n{str(e)}")
-
-    def gestionar_aritmetica(self, operacion):
-        if self.imagen_mostrada is None:
-            QMessageBox.warning(self, "Aviso", "Carga una imagen base primero.")
+        if contexto.get("previa"):
+            return  # La sustituye otra vista previa: se deja la actual en pantalla
+        self.actualizar_visores()  # Retira la vista previa si la había
+        self.statusBar().showMessage(f"Cancelado: {contexto['op'].nombre}", 3000)
+
+    def operacion_fallida(self, mensaje, contexto):
+        self.ocultar_ocupado()
+        self.ejecutor_previa.cancelar()
+        if contexto is self.restauracion:
+            # El historial ya avanzó sin su imagen: se reinicia desde la que se ve
+            descripcion, self.restauracion = contexto["descripcion"], None
+            self.gestor.reiniciar(self.actual)
+            self.actualizar_visores()
+            QMessageBox.critical(self, "Error", f"Error al {descripcion.lower()}; el historial se reinicia:\n{mensaje}")
             return
-
-        # La inversión no requiere segunda imagen ni escalar variable.
-        if operacion == "INV":
-            from src.logic import operaciones_aritmeticas
-            self.gestor.guardar_estado(self.imagen_mostrada)
-            self.imagen_mostrada = operaciones_aritmeticas.inversion_aritmetica(self.imagen_mostrada)
+        self.actualizar_visores()
+        QMessageBox.critical(self, "Error", f"Error al aplicar {contexto['op'].nombre}:\n{mensaje}")
+
+    def operacion_terminada(self, resultado, contexto):
+        self.ocultar_ocupado()
+        self.ejecutor_previa.cancelar()  # La vista previa ya no hace falta
+        if contexto is self.restauracion:
+            # El historial guarda el modelo de color junto a cada estado
+            self.restauracion = None
+            self.actual = resultado
             self.actualizar_visores()
+            self.statusBar().showMessage(f"{contexto['descripcion']}: {resultado.modelo}", 3000)
             return
-
-        # Preguntar al usuario el modo
-        opciones = ["Con otra Imagen", "Con un valor Escalar"]
-        item, ok = QInputDialog.getItem(self, "Seleccionar Modo", 
-                                        f"¿Cómo deseas aplicar la {operacion}?", 
-                                        opciones, 0, False)
-        
-        if not ok:
+        op = contexto["op"]
+        if contexto.get("previa"):
+            alto, ancho = contexto["entrada"].shape[:2]
+            self.visor_der.mostrar(resultado, tamano=(ancho, alto))
+            self.statusBar().showMessage(f"Vista previa: {op.nombre} (suelta para aplicar) — "
+                                         f"{instrumentacion.formatear(contexto['medicion'])}")
             return
 
-        if item == "Con otra Imagen":
-            self.aplicar_aritmetica_imagen(operacion)
+        # Guardamos el estado solo si la operación tuvo éxito
+        if contexto["reemplazar"]:
+            self.gestor.reemplazar_ultimo(contexto["receta"])
         else:
-            self.aplicar_aritmetica_escalar(operacion)
-
-    def aplicar_aritmetica_imagen(self, tipo):
-        archivo, _ = QFileDialog.getOpenFileName(self, "Seleccionar segunda imagen", "", "Imágenes (*.png *.jpg *.jpeg)")
-        if not archivo: return
-        
-        img_sec = cv2.imread(archivo)
-        if img_sec is None: return
-
-        self.gestor.guardar_estado(self.imagen_mostrada)
-        
-        res = None
-        if tipo == "SUMA": res = operaciones_aritmeticas.suma_imagenes(self.imagen_mostrada, img_sec)
-        elif tipo == "RESTA": res = operaciones_aritmeticas.resta_imagenes(self.imagen_mostrada, img_sec)
-        elif tipo == "MULT": res = operaciones_aritmeticas.multiplicacion_imagenes(self.imagen_mostrada, img_sec)
-        elif tipo == "DIV": res = operaciones_aritmeticas.division_imagenes(self.imagen_mostrada, img_sec)
-
-        if res is not None:
-            self.imagen_mostrada = res
-            self.actualizar_visores()
+            self.gestor.guardar_estado(contexto["base"], contexto["receta"])
+            # La operación queda disponible para ajustarla en el panel
+            self.ajuste = {"op": op, "base": contexto["base"], "entrada": contexto["entrada"],
+                           "archivo": contexto["archivo"]}
+            self.panel_parametros.configurar(op, contexto["parametros"])
+        # El resultado lleva su modelo para que el histograma sepa qué mostrar
+        self.actual = contexto["base"].aplicar(op, contexto["parametros"], resultado)
+        self.propagar_histograma(op, contexto)
 
-    def aplicar_aritmetica_escalar(self, tipo):
-        # Pedir el número
-        val, ok = QInputDialog.getDouble(self, "Valor Escalar", "Introduce el valor:", 1.0, 0, 1000, 2)
-        if not ok: return
-
-        from src.logic import operaciones_aritmeticas
-        self.gestor.guardar_estado(self.imagen_mostrada)
-
-        res = None
-        if tipo == "SUMA": res = operaciones_aritmeticas.suma_escalar(self.imagen_mostrada, val)
-        elif tipo == "RESTA": res = operaciones_aritmeticas.resta_escalar(self.imagen_mostrada, val)
-        elif tipo == "MULT": res = operaciones_aritmeticas.multiplicacion_escalar(self.imagen_mostrada, val)
-        elif tipo == "DIV": res = operaciones_aritmeticas.division_escalar(self.imagen_mostrada, val)
-
-        if res is not None:
-            self.imagen_mostrada = res
-            self.actualizar_visores()
+        self.actualizar_visores()
+        mensaje = f"Aplicado: {op.nombre}"
+        if contexto["archivo"]:
+            mensaje += f" con {os.path.basename(contexto['archivo'])}"
+        medicion = contexto["medicion"]
+        self.statusBar().showMessage(f"{mensaje} — {instrumentacion.formatear(medicion)}")
+        if "perfil" in medicion:
+            VentanaPerfil(f"Perfil de {op.nombre}", medicion["perfil"], self).exec()
 
+    # ==========================================
+    #              INSTRUMENTACIÓN
+    # ==========================================
 
+    def mostrar_estadisticas(self):
+        if self.ventana_estadisticas is None:
+            self.ventana_estadisticas = VentanaEstadisticas(instrumentacion.SESION, self.ruta_salidas, self)
+        self.ventana_estadisticas.show()
+        self.ventana_estadisticas.raise_()
+
+    def perfilar_siguiente(self, modo):
+        self.modo_perfil = modo
+        self.statusBar().showMessage("La siguiente operación se perfilará", 3000)
+
+    def propagar_histograma(self, op, contexto):
+        """Tras una operación puntual, el histograma sale de la LUT sin recorrer la imagen"""
+        entrada = contexto["entrada"]
+        canales = entrada.shape[2] if entrada.ndim == 3 else 1
+        if entrada.dtype == np.uint8 and op.fusionable(canales):
+            lut = pipeline.construir_lut((contexto["receta"],), canales)
+            histogramas.propagar(entrada, self.imagen_mostrada, lut)
+
+    def closeEvent(self, event):
+        # No dejamos hilos de trabajo vivos al cerrar
+        self.ejecutor.cancelar()
+        self.ejecutor.esperar()
+        self.ejecutor_previa.cancelar()
+        self.ejecutor_previa.esperar()
+        self.ejecutor_histograma.cancelar()
+        self.ejecutor_histograma.esperar()
+        self.ejecutor_lectura.cancelar()
+        self.ejecutor_lectura.esperar()
+        self.ejecutor_exportar.esperar()  # Exportación y guardados pendientes se terminan
+        self.escritor.cerrar()
+        self.panel_miniaturas.cerrar()
+        super().closeEvent(event)
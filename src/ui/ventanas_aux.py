@@ -1,21 +1,93 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QWidget
-from PyQt6.QtGui import QImage, QPixmap
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QWidget, QComboBox,
+                             QTableWidget, QTableWidgetItem, QPushButton, QPlainTextEdit, QFileDialog,
+                             QHeaderView)
+from PyQt6.QtGui import QImage, QPixmap, QFontDatabase
+from PyQt6.QtCore import Qt, QTimer
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
 import cv2
+import numpy as np
+import os
+from datetime import datetime
+
+class LienzoHistograma(FigureCanvas):
+    """
+    Dibuja curvas ya calculadas (analisis.series_histograma).
+    La figura y las líneas se crean una vez y se reutilizan entre llamadas.
+    """
+    def __init__(self, parent=None):
+        self.figura = Figure(figsize=(5, 4), dpi=100)
+        super().__init__(self.figura)
+        self.setParent(parent)
+        self.ax = self.figura.add_subplot(111)
+        self.ax.grid(True, alpha=0.3)
+        self.lineas = []
+
+    def actualizar(self, titulo, series):
+        # Solo se crean líneas nuevas si cambia el número de curvas
+        if len(self.lineas) != len(series):
+            for linea in self.lineas:
+                linea.remove()
+            self.lineas = [self.ax.plot([], [])[0] for _ in series]
+
+        for linea, (etiqueta, color, valores) in zip(self.lineas, series):
+            linea.set_data(np.arange(len(valores)), valores)
+            linea.set_color(color)
+            linea.set_label(etiqueta)
+
+        self.ax.set_title(titulo)
+        self.ax.set_xlim(0, 256)
+        self.ax.set_ylim(0, max(float(v.max()) for _, _, v in series) * 1.05 or 1)
+        leyenda = self.ax.get_legend()
+        if len(series) > 1:
+            self.ax.legend()
+        elif leyenda is not None:
+            leyenda.remove()
+        self.draw_idle()
 
 class VentanaHistograma(QDialog):
-    def __init__(self, figura_matplotlib):
-        super().__init__()
+    def __init__(self, parent=None):
+        super().__init__(parent)
         self.setWindowTitle("Histograma")
         self.resize(600, 500)
         
         layout = QVBoxLayout()
         # El canvas de Matplotlib es un widget de Qt
-        canvas = FigureCanvas(figura_matplotlib)
-        layout.addWidget(canvas)
+        self.lienzo = LienzoHistograma(self)
+        layout.addWidget(self.lienzo)
+        self.setLayout(layout)
+
+    def actualizar(self, titulo, series):
+        self.lienzo.actualizar(titulo, series)
+
+class PanelHistograma(QWidget):
+    """Contenido del panel acoplable: selector de precisión + histograma"""
+    # Texto del selector -> paso de submuestreo (1 = todos los píxeles)
+    PRECISIONES = {"Exacta": 1, "Alta (1/4)": 2, "Media (1/16)": 4, "Baja (1/64)": 8}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.combo_precision = QComboBox()
+        self.combo_precision.addItems(self.PRECISIONES)
+        self.combo_precision.setCurrentText("Media (1/16)")
+
+        fila = QHBoxLayout()
+        fila.addWidget(QLabel("Precisión:"))
+        fila.addWidget(self.combo_precision, 1)
+
+        layout = QVBoxLayout()
+        layout.addLayout(fila)
+        self.lienzo = LienzoHistograma(self)
+        layout.addWidget(self.lienzo)
         self.setLayout(layout)
 
+    @property
+    def paso(self):
+        return self.PRECISIONES[self.combo_precision.currentText()]
+
+    def actualizar(self, titulo, series):
+        self.lienzo.actualizar(titulo, series)
+
 class VentanaCanales(QDialog):
     def __init__(self, lista_canales):
         super().__init__()
@@ -54,3 +126,93 @@ class VentanaCanales(QDialog):
             layout.addLayout(v_box)
             
         self.setLayout(layout)
+
+class VentanaEstadisticas(QDialog):
+    """Tabla de tiempos por operación de la sesión (se refresca sola mientras está abierta)"""
+    COLUMNAS = [("Operación", "nombre"), ("Llamadas", "llamadas"), ("Caché", "cache"), ("Errores", "errores"),
+                ("Media (ms)", "media_ms"), ("Mediana (ms)", "mediana_ms"), ("p95 (ms)", "p95_ms"),
+                ("Máx (ms)", "max_ms"), ("Total (s)", "total_ms")]
+
+    def __init__(self, instrumentacion, carpeta_trazas, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Estadísticas de Operaciones")
+        self.resize(760, 400)
+        self.instrumentacion = instrumentacion
+        self.carpeta_trazas = carpeta_trazas
+
+        self.tabla = QTableWidget(0, len(self.COLUMNAS))
+        self.tabla.setHorizontalHeaderLabels([titulo for titulo, _ in self.COLUMNAS])
+        self.tabla.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.tabla.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla.verticalHeader().hide()
+
+        btn_limpiar = QPushButton("Limpiar")
+        btn_limpiar.clicked.connect(self.limpiar)
+        btn_traza = QPushButton("Exportar Traza...")
+        btn_traza.clicked.connect(self.exportar_traza)
+        botones = QHBoxLayout()
+        botones.addStretch(1)
+        botones.addWidget(btn_limpiar)
+        botones.addWidget(btn_traza)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.tabla)
+        layout.addLayout(botones)
+        self.setLayout(layout)
+
+        self.temporizador = QTimer(self)
+        self.temporizador.setInterval(1000)
+        self.temporizador.timeout.connect(self.actualizar)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.actualizar()
+        self.temporizador.start()
+
+    def hideEvent(self, event):
+        self.temporizador.stop()
+        super().hideEvent(event)
+
+    def actualizar(self):
+        filas = self.instrumentacion.estadisticas()
+        self.tabla.setRowCount(len(filas))
+        for i, fila in enumerate(filas):
+            for j, (_, clave) in enumerate(self.COLUMNAS):
+                valor = fila[clave]
+                if valor is None:
+                    texto = "-"
+                elif clave == "total_ms":
+                    texto = f"{valor / 1000:.2f}"
+                elif isinstance(valor, float):
+                    texto = f"{valor:.1f}"
+                else:
+                    texto = str(valor)
+                item = QTableWidgetItem(texto)
+                if j > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.tabla.setItem(i, j, item)
+
+    def limpiar(self):
+        self.instrumentacion.limpiar()
+        self.actualizar()
+
+    def exportar_traza(self):
+        sugerida = os.path.join(self.carpeta_trazas, f"traza_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        ruta, _ = QFileDialog.getSaveFileName(self, "Exportar Traza", sugerida, "Traza de Chrome (*.json)")
+        if ruta:
+            self.instrumentacion.exportar_traza(ruta)
+
+
+class VentanaPerfil(QDialog):
+    """Informe de cProfile o tracemalloc de una operación"""
+    def __init__(self, titulo, texto, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(titulo)
+        self.resize(900, 500)
+        editor = QPlainTextEdit(texto)
+        editor.setReadOnly(True)
+        editor.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        editor.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout = QVBoxLayout()
+        layout.addWidget(editor)
+        self.setLayout(layout)
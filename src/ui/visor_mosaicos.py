@@ -0,0 +1,158 @@
+"""
+Visor con zoom y desplazamiento para imágenes grandes.
+
+La imagen se dibuja por mosaicos de LADO_MOSAICO píxeles tomados del nivel
+de la pirámide (src/logic/piramide) que corresponde al zoom actual. Solo se
+pintan los mosaicos visibles, y los ya convertidos a QPixmap se guardan en
+una caché LRU, así que desplazarse no vuelve a convertir ni a escalar nada.
+"""
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QRectF, pyqtSignal
+from PyQt6.QtGui import QPainter, QPixmap, QColor
+from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem
+
+from src.logic import piramide
+from src.ui.visualizacion import a_qimage
+
+LADO_MOSAICO = 256
+MAX_MOSAICOS = 384   # ~100 MB de pixmaps por visor
+ZOOM_MAXIMO = 32.0   # Píxeles de pantalla por píxel de imagen
+
+
+class _ItemImagen(QGraphicsItem):
+    """
+    Elemento de la escena que pinta solo los mosaicos expuestos.
+    'tamano' (ancho, alto) es el tamaño que ocupa en la escena; por defecto el
+    de la imagen, pero una vista previa reducida ocupa el de la original.
+    """
+    def __init__(self, visor, imagen, tamano=None):
+        super().__init__()
+        self.visor = visor
+        self.piramide = piramide.obtener(imagen)
+        self.imagen = imagen  # Mantiene viva la base de la pirámide
+        self.ancho, self.alto = tamano or (imagen.shape[1], imagen.shape[0])
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.ancho, self.alto)
+
+    def paint(self, painter, option, widget=None):
+        escala = painter.worldTransform().m11()
+        indice = self.piramide.indice_para(escala * self.ancho / self.piramide.ancho)
+        nivel = self.piramide.nivel(indice)
+        alto_n, ancho_n = nivel.shape[:2]
+        # Relación exacta nivel -> escena (los niveles redondean hacia abajo)
+        sx = self.ancho / ancho_n
+        sy = self.alto / alto_n
+
+        # Al ampliar se ven los píxeles tal cual (útil para inspeccionar filtros)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, escala * sx < 1)
+
+        visible = option.exposedRect.intersected(self.boundingRect())
+        tx0 = max(int(visible.left() / sx) // LADO_MOSAICO, 0)
+        ty0 = max(int(visible.top() / sy) // LADO_MOSAICO, 0)
+        tx1 = min(int(visible.right() / sx) // LADO_MOSAICO, (ancho_n - 1) // LADO_MOSAICO)
+        ty1 = min(int(visible.bottom() / sy) // LADO_MOSAICO, (alto_n - 1) // LADO_MOSAICO)
+
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                pixmap = self.visor.mosaico(indice, tx, ty, nivel)
+                x, y = tx * LADO_MOSAICO, ty * LADO_MOSAICO
+                destino = QRectF(x * sx, y * sy, pixmap.width() * sx, pixmap.height() * sy)
+                painter.drawPixmap(destino, pixmap, QRectF(pixmap.rect()))
+
+
+class VisorMosaicos(QGraphicsView):
+    """
+    Visor con zoom (rueda del ratón) y desplazamiento (arrastrar).
+    Doble clic vuelve a ajustar la imagen a la ventana.
+    Emite vista_cambiada para sincronizar otros visores.
+    """
+    vista_cambiada = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setBackgroundBrush(QColor(40, 40, 40))
+        self.imagen = None
+        self._item = None
+        self._mosaicos = OrderedDict()  # (nivel, tx, ty) -> QPixmap
+        self._ajustado = True  # Mientras no se haga zoom, la imagen sigue al tamaño del visor
+
+    # --- Imagen ---
+
+    def mostrar(self, imagen, tamano=None):
+        """tamano (ancho, alto): muestra 'imagen' estirada a ese tamaño (vistas previas)"""
+        if imagen is self.imagen:
+            return
+        tamano = tamano or (imagen.shape[1], imagen.shape[0])
+        misma_forma = self._item is not None and (self._item.ancho, self._item.alto) == tamano
+        self.imagen = imagen
+        self._mosaicos.clear()
+        if self._item is not None:
+            self.scene().removeItem(self._item)
+        self._item = _ItemImagen(self, imagen, tamano)
+        self.scene().addItem(self._item)
+        self.scene().setSceneRect(self._item.boundingRect())
+        # Misma forma (resultado de una operación): se conserva el zoom y la posición
+        if not misma_forma or self._ajustado:
+            self.ajustar()
+
+    def mosaico(self, indice, tx, ty, nivel):
+        clave = (indice, tx, ty)
+        pixmap = self._mosaicos.get(clave)
+        if pixmap is not None:
+            self._mosaicos.move_to_end(clave)
+            return pixmap
+        y, x = ty * LADO_MOSAICO, tx * LADO_MOSAICO
+        pixmap = QPixmap.fromImage(a_qimage(nivel[y:y + LADO_MOSAICO, x:x + LADO_MOSAICO]))
+        self._mosaicos[clave] = pixmap
+        if len(self._mosaicos) > MAX_MOSAICOS:
+            self._mosaicos.popitem(last=False)
+        return pixmap
+
+    # --- Zoom y desplazamiento ---
+
+    def ajustar(self):
+        if self._item is None:
+            return
+        self.fitInView(self._item, Qt.AspectRatioMode.KeepAspectRatio)
+        self._ajustado = True
+        self.vista_cambiada.emit()
+
+    def wheelEvent(self, event):
+        if self._item is None:
+            return
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        zoom = self.transform().m11() * factor
+        if zoom > ZOOM_MAXIMO:
+            factor = ZOOM_MAXIMO / self.transform().m11()
+        self.scale(factor, factor)
+        self._ajustado = False
+        self.vista_cambiada.emit()
+
+    def mouseDoubleClickEvent(self, event):
+        self.ajustar()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._ajustado:
+            self.ajustar()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.vista_cambiada.emit()
+
+    def copiar_vista(self, otro):
+        """Mismo zoom y posición que otro visor (sin reenviar vista_cambiada)"""
+        self.blockSignals(True)
+        self._ajustado = otro._ajustado
+        self.setTransform(otro.transform())
+        self.horizontalScrollBar().setValue(otro.horizontalScrollBar().value())
+        self.verticalScrollBar().setValue(otro.verticalScrollBar().value())
+        self.blockSignals(False)
@@ -0,0 +1,20 @@
+"""
+Conversión de arrays de OpenCV a imágenes de Qt para los visores.
+"""
+import numpy as np
+from PyQt6.QtGui import QImage
+
+
+def a_qimage(img_cv):
+    """
+    Envuelve el array en un QImage sin convertir colores: Qt lee BGR
+    directamente con Format_BGR888. El QImage comparte la memoria del array.
+    """
+    img_cv = np.ascontiguousarray(img_cv)
+    h, w = img_cv.shape[:2]
+    if img_cv.ndim == 2:  # Grises/Binario
+        q_img = QImage(img_cv.data, w, h, img_cv.strides[0], QImage.Format.Format_Grayscale8)
+    else:
+        q_img = QImage(img_cv.data, w, h, img_cv.strides[0], QImage.Format.Format_BGR888)
+    q_img._array = img_cv  # Mantiene vivo el buffer mientras viva el QImage
+    return q_img